@@ -1,10 +1,19 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import feedparser
+import analytics
+import anomaly_store
+from analytics import STOCK_SYMBOLS, lorentzian_distance
+from bars import get_bars
+from events import EventIndex
+from figures import FIGURES, data_version, render
+from predict import forecast_table
+from universes import start_warm_up, universes_for
+
+# Pre-fetch the configured universes once per server process
+start_warm_up()
 
 # Function to fetch data based on the selected period and stock symbol
 def fetch_data(period, stock_symbol):
@@ -21,7 +30,9 @@ def fetch_data(period, stock_symbol):
         return pd.DataFrame()  # Return empty DataFrame
 
     try:
-        data = yf.download(stock_symbol, start=start_date, end=end_date)
+        # Daily bars come from the shared bar store and are sliced locally
+        data = get_bars(stock_symbol, "1d", base="1d")
+        data = data[data.index >= pd.Timestamp(start_date).normalize()].copy()
         
         if data.empty:
             st.error(f"No data returned for ticker {stock_symbol}. Please check the ticker symbol.")
@@ -57,17 +68,9 @@ def calculate_support_resistance(data, window=20):
 
 # Function to fetch stock news using RSS feed
 def fetch_stock_news(stock_symbol):
-    url = "https://finance.yahoo.com/rss/headline?s=" + stock_symbol
     try:
-        feed = feedparser.parse(url)
-        articles = []
-        for entry in feed.entries:
-            articles.append({
-                'title': entry.title,
-                'publishedAt': entry.published,
-                'url': entry.link
-            })
-        return articles
+        # Served from the shared process cache filled by the warm-up stage
+        return analytics.fetch_stock_news(stock_symbol)
     except Exception as e:
         st.error(f"Error fetching news from RSS feed: {e}")
         return []
@@ -78,18 +81,12 @@ def main():
 
     # Sidebar for user input
     st.sidebar.header("Settings")
-    stock_symbols = [
-        "AAPL",  # Apple
-        "GOOGL",  # Alphabet (Google)
-        "MSFT",  # Microsoft
-        "AMZN",  # Amazon
-        "TSLA",  # Tesla
-        "META",  # Meta Platforms (Facebook)
-        "NFLX",  # Netflix
-        "NVDA",  # NVIDIA
-        "INTC",  # Intel
-        "AMD"    # AMD
-    ]
+    stock_universes = universes_for("stock")
+    universe_id = st.sidebar.selectbox(
+        "Select Universe", list(stock_universes) or ["watchlist"],
+        format_func=lambda uid: stock_universes[uid]["name"] if uid in stock_universes else uid
+    )
+    stock_symbols = stock_universes.get(universe_id, {}).get("symbols") or STOCK_SYMBOLS
     stock_symbol = st.sidebar.selectbox("Select Stock Symbol", stock_symbols)
     period = st.sidebar.selectbox("Select Time Period", ["1 Year", "6 Months", "3 Months"])
 
@@ -104,27 +101,15 @@ def main():
     close_data = data['Close']
     data_returns = close_data.pct_change().dropna()
 
-    # Define Lorentzian distance function
-    def lorentzian_distance(x, y):
-        return np.log(1 + (x - y)**2)
-
-    # Compute Lorentzian distances between consecutive returns
+    # Compute Lorentzian distances between consecutive returns and flag anomalies
     if len(data_returns) < 2:
         st.warning("Not enough data to compute Lorentzian distances.")
-        lorentzian_distances = np.array([])
-    else:
-        lorentzian_distances = [lorentzian_distance(data_returns[i], data_returns[i + 1]) for i in range(len(data_returns) - 1)]
-        lorentzian_distances = np.array(lorentzian_distances)
-
-    # Define a threshold to identify anomalies
-    if len(lorentzian_distances) > 0:
-        threshold = lorentzian_distances.mean() + 2 * lorentzian_distances.std()
-        anomalies = lorentzian_distances > threshold
-        anomaly_indices = np.where(anomalies)[0]
-        anomaly_dates = data_returns.index[anomaly_indices]
-    else:
-        threshold = None
-        anomaly_dates = []
+    lorentzian_distances = np.log1p(np.diff(np.asarray(data_returns, dtype=float).ravel()) ** 2)
+
+    # Fold new returns from the stored history into the persistent threshold state
+    history_returns = get_bars(stock_symbol, "1d", base="1d")['Close'].pct_change().dropna()
+    threshold = anomaly_store.update(stock_symbol, "1d", history_returns)
+    anomaly_dates = anomaly_store.anomaly_dates(stock_symbol, "1d", data_returns.index)
 
     # Prepare the data for candlestick chart
     data['Anomalies'] = np.where(data.index.isin(anomaly_dates), data['Close'], np.nan)
@@ -136,56 +121,70 @@ def main():
         st.error("Failed to calculate support and resistance levels.")
         return
 
-    # Create candlestick chart
-    fig = go.Figure()
-
-    # Add candlestick trace
-    fig.add_trace(go.Candlestick(
-        x=data.index,
-        open=data['Open'],
-        high=data['High'],
-        low=data['Low'],
-        close=data['Close'],
-        name='Candlestick'
-    ))
-
-    # Add support and resistance lines
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=[latest_support] * len(data),
-        mode='lines',
-        name='Support',
-        line=dict(color='green', width=2, dash='dash')
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=[latest_resistance] * len(data),
-        mode='lines',
-        name='Resistance',
-        line=dict(color='blue', width=2, dash='dash')
-    ))
-
-    # Add anomalies as scatter points
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=data['Anomalies'],
-        mode='markers',
-        name='Anomalies',
-        marker=dict(color='yellow', size=10, symbol='x')
-    ))
-
-    # Update layout
-    fig.update_layout(
-        title=f'{stock_symbol} Stock Price with Anomalies, Support, and Resistance ({period})',
-        xaxis_title='Date',
-        yaxis_title='Stock Price',
-        xaxis_rangeslider_visible=False,  # Hide range slider
-        xaxis_tickformat='%b %Y',  # Format x-axis to show month and year
-    )
+    # Chart JSON is cached per symbol, data version and settings
+    version = data_version(data) + (len(anomaly_dates),)
+
+    def build_chart():
+        # Create candlestick chart
+        fig = go.Figure()
+
+        # Add candlestick trace
+        fig.add_trace(go.Candlestick(
+            x=data.index,
+            open=data['Open'],
+            high=data['High'],
+            low=data['Low'],
+            close=data['Close'],
+            name='Candlestick'
+        ))
+
+        # Add support and resistance lines
+        fig.add_trace(go.Scatter(
+            x=data.index,
+            y=[latest_support] * len(data),
+            mode='lines',
+            name='Support',
+            line=dict(color='green', width=2, dash='dash')
+        ))
+
+        fig.add_trace(go.Scatter(
+            x=data.index,
+            y=[latest_resistance] * len(data),
+            mode='lines',
+            name='Resistance',
+            line=dict(color='blue', width=2, dash='dash')
+        ))
+
+        # Add anomalies as scatter points
+        fig.add_trace(go.Scatter(
+            x=data.index,
+            y=data['Anomalies'],
+            mode='markers',
+            name='Anomalies',
+            marker=dict(color='yellow', size=10, symbol='x')
+        ))
+
+        # Update layout
+        fig.update_layout(
+            title=f'{stock_symbol} Stock Price with Anomalies, Support, and Resistance ({period})',
+            xaxis_title='Date',
+            yaxis_title='Stock Price',
+            xaxis_rangeslider_visible=False,  # Hide range slider
+            xaxis_tickformat='%b %Y',  # Format x-axis to show month and year
+        )
+        return fig.to_json()
 
     # Display the chart
-    st.plotly_chart(fig)
+    render(FIGURES.figure((stock_symbol, period, version), build_chart), height=500)
+
+    # Anomaly screen across the selected universe
+    st.header("Recent Anomalies Across Universe")
+    recent = anomaly_store.query(stock_symbols, "1d", start=pd.Timestamp.now() - pd.Timedelta(days=30))
+    if recent.empty:
+        st.write("No anomalies recorded in the last 30 days.")
+    else:
+        recent['date'] = recent['time'].dt.strftime('%Y-%m-%d')
+        st.dataframe(recent[['date', 'symbol', 'distance', 'threshold']], hide_index=True)
 
     # News section
     st.header(f"Recent {stock_symbol} News")
@@ -200,9 +199,26 @@ def main():
     for item in news_items:
         st.subheader(item['title'])
         st.write(f"Published: {item['publishedAt']}")
+        st.write(f"Sentiment: {item['sentiment']:+.2f}")
         st.write(f"[Read more]({item['url']})")
         st.write("---")
 
+    # Headlines published around each detected anomaly
+    if len(anomaly_dates) > 0 and news_items:
+        st.header("Headlines Near Anomalies")
+        event_index = EventIndex(news_items, data)
+        nearby = event_index.headlines_near(anomaly_dates, before=2 * 24 * 60 * 60, after=24 * 60 * 60)
+        found = False
+        for anomaly_date, headlines in zip(anomaly_dates, nearby):
+            if not headlines:
+                continue
+            found = True
+            st.subheader(anomaly_date.strftime('%Y-%m-%d'))
+            for item in headlines:
+                st.write(f"[{item['title']}]({item['url']}) (return after headline: {item['post_return']:.2%})")
+        if not found:
+            st.write("No headlines were published near the detected anomalies.")
+
     # Predict the next day's return
     st.header("Prediction")
 
@@ -213,10 +229,14 @@ def main():
         
         recent_distance = lorentzian_distance(data_returns[-2], data_returns[-1])
         if threshold and recent_distance > threshold:
-            st.warning("Anomaly detected. Predicted return may be highly volatile.")
+            st.warning("Anomaly detected. Predicted return is based on the average return after past anomalies and may be highly volatile.")
         else:
             st.info("No anomaly detected. Predicted return is based on historical average.")
-        return data_returns.mean()
+
+        # Every model and horizon for this symbol, from one vectorized pass
+        forecasts = forecast_table(data_returns.to_frame(stock_symbol))
+        st.dataframe(forecasts.loc[stock_symbol].unstack('horizon'))
+        return forecasts.loc[stock_symbol, ('regime', 1)]
 
     predicted_return = predict_next_return(data_returns, lorentzian_distances)
     st.write(f"Predicted return for the next day: {predicted_return:.2f}%")
@@ -0,0 +1,157 @@
+"""Per-user paper-trading accounts with optimistic concurrency.
+
+Each account is one row (cash balance plus a version counter) and one row
+per open position in SQLite. A trade reads the account's small state,
+validates it and writes it back with `WHERE version = ?`; if another
+session changed the account in between, the write matches no row and the
+trade is retried on fresh state, so concurrent traders never lose updates
+and only ever touch their own rows. Each fill is queued in the same
+transaction as the balance update and then copied to the trade log (for
+the equity curve) under its (account, version) id, so a crash in between
+is repaired by the next flush and never records a fill twice.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+import trade_log
+from config import data_path
+
+STARTING_BALANCE = trade_log.STARTING_BALANCE
+FEE_RATE = 0.002  # 0.2% per trade
+MAX_RETRIES = 10
+
+_lock = threading.Lock()
+_db = None
+
+
+def _connect():
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(data_path('accounts.sqlite'), timeout=30, check_same_thread=False,
+                              isolation_level=None)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.executescript("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                account TEXT PRIMARY KEY, balance REAL, version INTEGER, created INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS positions (
+                account TEXT, symbol TEXT, shares REAL, purchase_price REAL, fees REAL, last_trade INTEGER,
+                PRIMARY KEY (account, symbol)
+            );
+            CREATE TABLE IF NOT EXISTS pending_fills (
+                account TEXT, version INTEGER, symbol TEXT, ts INTEGER, quantity REAL, price REAL, fee REAL,
+                PRIMARY KEY (account, version)
+            );
+        """)
+    return _db
+
+
+def open_account(account, starting_balance=STARTING_BALANCE):
+    """Create the account if it does not exist; returns True when it was created"""
+    with _lock:
+        cursor = _connect().execute("INSERT OR IGNORE INTO accounts VALUES (?, ?, 0, ?)",
+                                    (account, float(starting_balance), int(time.time())))
+        return cursor.rowcount == 1
+
+
+def flush_fills(account):
+    """Copy the account's queued fills to the trade log; safe to repeat"""
+    with _lock:
+        pending = _connect().execute("SELECT version, symbol, ts, quantity, price, fee FROM pending_fills "
+                                     "WHERE account = ? ORDER BY version", (account,)).fetchall()
+    for version, symbol, ts, quantity, price, fee in pending:
+        trade_log.record_fill(symbol, quantity, price, fee, account=account, ts=ts, fill_id=f"{account}:{version}")
+        with _lock:
+            _connect().execute("DELETE FROM pending_fills WHERE account = ? AND version = ?", (account, version))
+
+
+def get_account(account):
+    """(balance, version, positions DataFrame) of an account, opening it on first use"""
+    open_account(account)
+    flush_fills(account)
+    with _lock:
+        db = _connect()
+        balance, version = db.execute("SELECT balance, version FROM accounts WHERE account = ?",
+                                      (account,)).fetchone()
+        rows = db.execute("SELECT symbol, shares, purchase_price, fees, last_trade FROM positions "
+                          "WHERE account = ? ORDER BY symbol", (account,)).fetchall()
+    positions = pd.DataFrame(rows, columns=['Symbol', 'Shares', 'Purchase Price', 'Transaction Fee',
+                                            'Transaction Date'])
+    positions['Transaction Date'] = pd.to_datetime(positions['Transaction Date'], unit='s')
+    return balance, version, positions
+
+
+def trade(account, symbol, quantity, price, fee_rate=FEE_RATE):
+    """Buy (quantity > 0) or sell (quantity < 0) at `price`; returns (new balance, fee).
+
+    Raises ValueError for a zero quantity or insufficient cash or shares.
+    """
+    if quantity == 0:
+        raise ValueError("Quantity must be greater than zero!")
+    value = abs(quantity) * price
+    fee = value * fee_rate
+    cash_change = -(value + fee) if quantity > 0 else value - fee
+    now = int(time.time())
+    open_account(account)
+
+    for attempt in range(MAX_RETRIES):
+        with _lock:
+            db = _connect()
+            balance, version = db.execute("SELECT balance, version FROM accounts WHERE account = ?",
+                                          (account,)).fetchone()
+            row = db.execute("SELECT shares, purchase_price, fees FROM positions WHERE account = ? AND symbol = ?",
+                             (account, symbol)).fetchone()
+            shares, purchase_price, fees = row if row else (0.0, price, 0.0)
+
+            if balance + cash_change < 0:
+                raise ValueError("Insufficient balance!")
+            if shares + quantity < 0:
+                raise ValueError("Not enough shares to sell!")
+
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                updated = db.execute("UPDATE accounts SET balance = ?, version = version + 1 "
+                                     "WHERE account = ? AND version = ?",
+                                     (balance + cash_change, account, version)).rowcount
+                if updated == 0:
+                    # Another session traded on this account first; retry on fresh state
+                    db.execute("ROLLBACK")
+                    continue
+                if shares + quantity > 0:
+                    db.execute("INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?)",
+                               (account, symbol, shares + quantity,
+                                price if quantity > 0 else purchase_price, fees + fee, now))
+                else:
+                    db.execute("DELETE FROM positions WHERE account = ? AND symbol = ?", (account, symbol))
+                db.execute("INSERT INTO pending_fills VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           (account, version + 1, symbol, now, float(quantity), float(price), fee))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+        flush_fills(account)
+        return balance + cash_change, fee
+
+    raise RuntimeError(f"Could not update account {account} after {MAX_RETRIES} concurrent attempts")
+
+
+def import_portfolio_csv(path, account=trade_log.DEFAULT_ACCOUNT):
+    """Move a legacy portfolio.csv (positions plus a Balance column) into a new account"""
+    if not os.path.exists(path) or not open_account(account):
+        return False
+    data = pd.read_csv(path)
+    balance = data["Balance"].iloc[0] if "Balance" in data.columns and len(data) else STARTING_BALANCE
+    now = int(time.time())
+    with _lock:
+        db = _connect()
+        db.execute("UPDATE accounts SET balance = ? WHERE account = ?", (float(balance), account))
+        for _, row in data.dropna(subset=["Symbol"]).iterrows():
+            db.execute("INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?)",
+                       (account, row["Symbol"], float(row["Shares"]), float(row.get("Purchase Price", 0.0)),
+                        float(row.get("Transaction Fee", 0.0) or 0.0), now))
+    return True
@@ -0,0 +1,236 @@
+"""UI-free analytics shared by the Streamlit pages and the batch report generator"""
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import factor_store
+import indicators
+import news
+from cache import cached
+from sentiment import add_sentiment
+
+# Default watchlist used by the dashboards
+STOCK_SYMBOLS = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "META", "NFLX", "NVDA", "INTC", "AMD"]
+
+
+def fetch_risk_free_rate(fred=None):
+    """Fetch the current risk-free rate (10-year Treasury yield) from the factor store"""
+    return factor_store.risk_free_rate(fred)
+
+
+def fetch_market_return():
+    """Average annual market return for S&P 500 over the last 10 years"""
+    return factor_store.market_return('^GSPC', years=10)
+
+
+def calculate_sharpe_ratio(data, risk_free_rate, window=252):
+    """Calculate rolling Sharpe ratio"""
+    if risk_free_rate is None:
+        return None
+
+    # Calculate daily returns
+    daily_returns = data['Close'].pct_change()
+
+    # Calculate excess returns over risk-free rate
+    excess_returns = daily_returns - (risk_free_rate / 252)  # Daily risk-free rate
+
+    # Calculate rolling metrics
+    rolling_return = excess_returns.rolling(window=window).mean() * 252  # Annualized return
+    rolling_std = daily_returns.rolling(window=window).std() * (252 ** 0.5)  # Annualized volatility
+
+    # Calculate Sharpe ratio
+    sharpe_ratio = rolling_return / rolling_std
+    return sharpe_ratio
+
+
+def add_ema(data, periods):
+    for period in periods:
+        data[f'EMA_{period}'] = data['Close'].ewm(span=period, adjust=False).mean()
+    return data
+
+
+def add_rsi(data, window=14):
+    """Wilder-smoothed RSI; apply to the full history and slice afterwards"""
+    data['RSI'] = indicators.rsi(data['Close'], window)
+    return data
+
+
+def add_macd(data):
+    short_ema = data['Close'].ewm(span=12, adjust=False).mean()
+    long_ema = data['Close'].ewm(span=26, adjust=False).mean()
+    data['MACD'] = short_ema - long_ema
+    data['Signal Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
+    return data
+
+
+# Function to calculate support and resistance levels
+def calculate_support_resistance(data, window=20):
+    """Add rolling Support/Resistance columns and return the latest levels (None, None if unavailable)"""
+    if 'Low' not in data.columns or 'High' not in data.columns or len(data) < window:
+        return None, None
+
+    data['Support'] = data['Low'].rolling(window=window).min()
+    data['Resistance'] = data['High'].rolling(window=window).max()
+
+    support = data['Support'].dropna()
+    resistance = data['Resistance'].dropna()
+    latest_support = support.iloc[-1] if not support.empty else None
+    latest_resistance = resistance.iloc[-1] if not resistance.empty else None
+    return latest_support, latest_resistance
+
+
+# Function to identify engulfing candlesticks
+def identify_engulfing_patterns(data):
+    data['Bullish Engulfing'] = (
+        (data['Open'] < data['Close'].shift(1)) &
+        (data['Close'] > data['Open'].shift(1)) &
+        (data['Close'] > data['Open']) &
+        (data['Open'].shift(1) > data['Close'].shift(1))
+    )
+
+    data['Bearish Engulfing'] = (
+        (data['Open'] > data['Close'].shift(1)) &
+        (data['Close'] < data['Open'].shift(1)) &
+        (data['Close'] < data['Open']) &
+        (data['Open'].shift(1) < data['Close'].shift(1))
+    )
+
+    return data
+
+
+# Define Lorentzian distance function
+def lorentzian_distance(x, y):
+    return np.log(1 + (x - y)**2)
+
+
+# Function to flag anomalies from Lorentzian distances between consecutive returns
+def detect_lorentzian_anomalies(data_returns, num_std=2):
+    """Return (distances, threshold, anomaly_dates); threshold is None when there is too little data"""
+    if len(data_returns) < 2:
+        return np.array([]), None, pd.Index([])
+
+    values = np.asarray(data_returns, dtype=float)
+    lorentzian_distances = np.log1p(np.diff(values) ** 2)
+
+    threshold = lorentzian_distances.mean() + num_std * lorentzian_distances.std()
+    anomaly_indices = np.where(lorentzian_distances > threshold)[0]
+    anomaly_dates = data_returns.index[anomaly_indices]
+    return lorentzian_distances, threshold, anomaly_dates
+
+
+# Function to fetch stock news using RSS feed
+@cached(ttl=5 * 60)
+def fetch_stock_news(stock_symbol):
+    """Headlines as dicts with title, url, publishedAt, guid and sentiment (newest first)"""
+    return add_sentiment(news.fetch_news(news.yahoo_headlines_url(stock_symbol)))
+
+
+# Balance sheet rows summed into total debt for the cost of capital
+DEBT_ITEMS = ['Long Term Debt', 'Short Term Debt']
+
+
+# Function to add up debt items, counting missing ones as zero
+def total_debt(*debt_items):
+    return sum(np.nan_to_num(np.asarray(item, dtype=float)) for item in debt_items)
+
+
+# Function to compute the cost of capital from statement items
+def cost_of_capital(interest_expense, total_debt, tax_provision, pretax_income, market_cap, beta,
+                    risk_free_rate, market_return):
+    """(tax rate, cost of debt, cost of equity, WACC) for scalars or aligned arrays.
+
+    Missing (NaN) interest expense and tax provision count as zero; without
+    pretax income the tax rate is zero. Shared by the dashboard metrics and
+    the statements warehouse so both report the same WACC.
+    """
+    interest_expense = np.nan_to_num(np.asarray(interest_expense, dtype=float))
+    tax_provision = np.nan_to_num(np.asarray(tax_provision, dtype=float))
+    pretax_income = np.nan_to_num(np.asarray(pretax_income, dtype=float))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Calculate the effective tax rate
+        tax_rate = np.where(pretax_income != 0, tax_provision / pretax_income, 0.0)
+
+        # Calculate cost of debt (adjusted for taxes)
+        cost_of_debt = np.where(total_debt != 0, interest_expense / total_debt * (1 - tax_rate), 0.0)
+
+        # Calculate cost of equity using CAPM
+        cost_of_equity = risk_free_rate + beta * (market_return - risk_free_rate)
+
+        # Calculate WACC
+        V = market_cap + total_debt  # Total value (equity + debt)
+        WACC = (market_cap / V) * cost_of_equity + (total_debt / V) * cost_of_debt * (1 - tax_rate)
+    return tax_rate, cost_of_debt, cost_of_equity, WACC
+
+
+# Function to compute fundamental metrics for a ticker
+def compute_fundamental_metrics(ticker, risk_free_rate, market_return):
+    stock = yf.Ticker(ticker)
+    info = stock.info
+
+    # Fetch balance sheet and financials data
+    balance_sheet = stock.balance_sheet
+    financials = stock.financials
+
+    # Latest value of a statement row, NaN if the row is missing
+    def latest(statement, item):
+        return statement.loc[item].iloc[0] if item in statement.index else np.nan
+
+    # Get interest expense (from income statement) and total debt (from balance sheet)
+    interest_expense = latest(financials, 'Interest Expense')
+    debt = total_debt(*(latest(balance_sheet, item) for item in DEBT_ITEMS))
+
+    # Get income statement to calculate tax rate using Tax Provision and Pretax Income
+    tax_provision = latest(financials, 'Tax Provision')
+    pretax_income = latest(financials, 'Pretax Income')
+
+    # Get market capitalization (market value of equity)
+    market_cap = info.get('marketCap', None)
+
+    # Calculate cost of equity using CAPM
+    beta = info.get('beta', None)  # Beta from Yahoo Finance
+    if beta is None:
+        raise ValueError("Beta value not found. Please check the ticker information.")
+
+    tax_rate, cost_of_debt, cost_of_equity, WACC = (
+        float(value) for value in cost_of_capital(interest_expense, debt, tax_provision, pretax_income,
+                                                  market_cap, beta, risk_free_rate, market_return))
+
+    metrics = {
+        'Risk-Free Rate': f"{risk_free_rate:.2%}" if risk_free_rate is not None else 'N/A',
+        'Market Return': f"{market_return:.2%}" if market_return is not None else 'N/A',
+        'P/E Ratio': info.get('trailingPE', 'N/A'),
+        'ROE': info.get('returnOnEquity', 'N/A'),
+        'ROA': info.get('returnOnAssets', 'N/A'),
+        'Gross Margin': info.get('grossMargins', 'N/A'),
+        'Profit Margin': info.get('profitMargins', 'N/A'),
+        'Debt to Equity': info.get('debtToEquity', 'N/A'),
+        'Current Ratio': info.get('currentRatio', 'N/A'),
+        'Price to Book': info.get('priceToBook', 'N/A'),
+        'Earnings Per Share': info.get('trailingEps', 'N/A'),
+        'Dividend Yield': info.get('dividendYield', 'N/A'),
+        'Tax Rate': f"{tax_rate:.2%}",
+        'Cost of Debt': f"{cost_of_debt:.2%}",
+        'WACC': f"{WACC:.2%}",
+    }
+
+    # Clean up metrics for display
+    for key, value in metrics.items():
+        if key in ['Risk-Free Rate', 'Market Return', 'Tax Rate', 'Cost of Debt', 'WACC']:
+            continue  # Skip processing for these as they're already formatted
+        if isinstance(value, (int, float)):
+            metrics[key] = round(value, 2)
+        elif value == 'N/A':
+            metrics[key] = 'N/A'
+        else:
+            try:
+                metrics[key] = round(float(value), 2)
+            except ValueError:
+                metrics[key] = 'N/A'
+
+    return metrics
+
+
+# Function to get fundamental metrics using the shared factor store rates
+@cached(ttl=12 * 60 * 60)
+def get_fundamental_metrics(ticker):
+    return compute_fundamental_metrics(ticker, fetch_risk_free_rate(), fetch_market_return())
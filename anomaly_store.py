@@ -0,0 +1,147 @@
+"""Persistent Lorentzian-anomaly history.
+
+For every (symbol, interval) the store keeps the running count, mean and
+sum of squared deviations (Welford state) of the Lorentzian distances
+between consecutive returns. Each update only folds in returns newer than
+the last one seen, merging the batch into the state with Chan's parallel
+form of Welford's update, so the threshold update is O(1) in the history
+length. Flagged anomaly timestamps are stored and indexed for screening
+across symbols and date ranges.
+"""
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import data_path
+from events import to_epoch
+
+# Anomaly threshold is mean + NUM_STD standard deviations of the distances
+NUM_STD = 2
+
+_lock = threading.Lock()
+_db = None
+
+
+def _connect():
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(data_path('anomalies.sqlite'), check_same_thread=False)
+        _db.executescript("""
+            CREATE TABLE IF NOT EXISTS state (
+                symbol TEXT, interval TEXT, count INTEGER, mean REAL, m2 REAL,
+                last_ts INTEGER, last_return REAL,
+                PRIMARY KEY (symbol, interval)
+            );
+            CREATE TABLE IF NOT EXISTS anomalies (
+                symbol TEXT, interval TEXT, ts INTEGER, distance REAL, threshold REAL,
+                PRIMARY KEY (symbol, interval, ts)
+            );
+            CREATE INDEX IF NOT EXISTS anomalies_by_time ON anomalies (ts, symbol);
+        """)
+    return _db
+
+
+def get_state(symbol, interval):
+    """(count, mean, m2, last_ts, last_return) for a key, or None if never updated"""
+    with _lock:
+        return _connect().execute(
+            "SELECT count, mean, m2, last_ts, last_return FROM state WHERE symbol = ? AND interval = ?",
+            (symbol, interval)
+        ).fetchone()
+
+
+def threshold_from_state(count, mean, m2, num_std=NUM_STD):
+    if not count:
+        return None
+    return mean + num_std * np.sqrt(m2 / count)
+
+
+def update(symbol, interval, data_returns, num_std=NUM_STD):
+    """Fold returns newer than the stored state into it; returns the current threshold"""
+    epochs = to_epoch(data_returns.index)
+    values = np.asarray(data_returns, dtype=float).ravel()
+
+    with _lock:
+        db = _connect()
+        row = db.execute(
+            "SELECT count, mean, m2, last_ts, last_return FROM state WHERE symbol = ? AND interval = ?",
+            (symbol, interval)
+        ).fetchone()
+        count, mean, m2, last_ts, last_return = row if row else (0, 0.0, 0.0, None, None)
+
+        # Prepend the last stored return so the first new distance bridges the two batches
+        new = epochs > last_ts if last_ts is not None else np.ones(len(epochs), dtype=bool)
+        if not new.any():
+            return threshold_from_state(count, mean, m2, num_std)
+        new_epochs, new_values = epochs[new], values[new]
+        if last_ts is not None:
+            new_epochs = np.concatenate(([last_ts], new_epochs))
+            new_values = np.concatenate(([last_return], new_values))
+
+        if len(new_values) >= 2:
+            # Distance i compares returns i and i + 1 and is dated at return i
+            distances = np.log1p(np.diff(new_values) ** 2)
+            dated = new_epochs[:-1]
+
+            # Merge the batch statistics into the running state
+            n_b = len(distances)
+            mean_b = distances.mean()
+            m2_b = ((distances - mean_b) ** 2).sum()
+            total = count + n_b
+            delta = mean_b - mean
+            mean = mean + delta * n_b / total
+            m2 = m2 + m2_b + delta ** 2 * count * n_b / total
+            count = total
+
+            threshold = threshold_from_state(count, mean, m2, num_std)
+            flagged = distances > threshold
+            db.executemany(
+                "INSERT OR REPLACE INTO anomalies VALUES (?, ?, ?, ?, ?)",
+                [(symbol, interval, int(ts), float(d), float(threshold))
+                 for ts, d in zip(dated[flagged], distances[flagged])]
+            )
+
+        db.execute(
+            "INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (symbol, interval, int(count), float(mean), float(m2), int(new_epochs[-1]), float(new_values[-1]))
+        )
+        db.commit()
+        return threshold_from_state(count, mean, m2, num_std)
+
+
+def query(symbols=None, interval=None, start=None, end=None):
+    """Stored anomalies as a DataFrame (symbol, interval, time, distance, threshold), newest first"""
+    clauses, params = [], []
+    if symbols:
+        clauses.append(f"symbol IN ({','.join('?' * len(symbols))})")
+        params.extend(symbols)
+    if interval:
+        clauses.append("interval = ?")
+        params.append(interval)
+    if start is not None:
+        clauses.append("ts >= ?")
+        params.append(int(to_epoch([pd.Timestamp(start)])[0]))
+    if end is not None:
+        clauses.append("ts <= ?")
+        params.append(int(to_epoch([pd.Timestamp(end)])[0]))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with _lock:
+        rows = _connect().execute(
+            f"SELECT symbol, interval, ts, distance, threshold FROM anomalies {where} ORDER BY ts DESC", params
+        ).fetchall()
+    frame = pd.DataFrame(rows, columns=['symbol', 'interval', 'ts', 'distance', 'threshold'])
+    frame['time'] = pd.to_datetime(frame['ts'], unit='s', utc=True)
+    return frame
+
+
+def anomaly_dates(symbol, interval, index):
+    """The timestamps of `index` that are stored as anomalies for (symbol, interval)"""
+    epochs = to_epoch(index)
+    if len(epochs) == 0:
+        return index[:0]
+    stored = query([symbol], interval, pd.to_datetime(epochs[0], unit='s', utc=True),
+                   pd.to_datetime(epochs[-1], unit='s', utc=True))['ts'].to_numpy()
+    return index[np.isin(epochs, stored)]
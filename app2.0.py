@@ -11,13 +11,21 @@ import crypto
 import forex
 import stock_news_page
 import paper_trading  # Import the paper trading module
+import compare
+import correlation
+import options
+import screener
+from universes import start_warm_up
+
+# Pre-fetch bars, news and fundamentals for the configured universes once per server process
+start_warm_up()
 
 
 # Sidebar for navigation
 st.sidebar.title("Navigation")
 
 # Radio button for selecting the chart type (placed in the sidebar)
-page = st.sidebar.radio("Choose a chart", ["Stock Chart", "Crypto Chart", "Forex Exchange", "Stock News", "Paper Trading"])
+page = st.sidebar.radio("Choose a chart", ["Stock Chart", "Crypto Chart", "Forex Exchange", "Stock News", "Paper Trading", "Compare", "Correlation", "Options", "Screener"])
 
 # Navigation logic based on the selected option in the sidebar
 if page == "Stock Chart":
@@ -29,4 +37,12 @@ elif page == "Forex Exchange":
 elif page == "Stock News":
     stock_news_page.app()
 elif page == "Paper Trading":
-    paper_trading.app()  # Call the paper trading page function
\ No newline at end of file
+    paper_trading.app()  # Call the paper trading page function
+elif page == "Compare":
+    compare.app()
+elif page == "Correlation":
+    correlation.app()
+elif page == "Options":
+    options.app()
+elif page == "Screener":
+    screener.app()
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""Memory-mapped bar archive for full-history analysis.
+
+Each (symbol, base) is stored as one raw little-endian file per column
+(int64 epoch seconds plus float64 Open/High/Low/Close/Volume) under
+data/archive. Readers map the files with np.memmap, so every Streamlit
+worker process shares the operating system's page-cached copy, and taking
+the last N rows only touches the pages that hold them. Updates append the
+new rows' bytes and overwrite the last row in place when a partial bar is
+revised; the stored history is never rewritten.
+
+Writers in any process take an exclusive fcntl lock on the archive
+directory and re-read the last stored epoch while holding it, so two
+processes that both find the archive stale download and append once. The
+time column is written last and bounds the row count; bytes a crashed
+writer left past it in the value columns are truncated before the next
+append, so a partial append is never read and never misaligns the rows.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from bars import MAX_PERIOD, REFRESH_SECONDS, _catch_up_period, _download
+from config import data_path
+from events import to_epoch
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+TIME = 'time'
+DTYPES = {TIME: np.dtype('<i8'), **{field: np.dtype('<f8') for field in FIELDS}}
+
+_maps = {}
+_locks = {}
+_lock = threading.Lock()
+
+
+def _key_lock(key):
+    with _lock:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _column_path(symbol, base, column):
+    safe_symbol = symbol.replace('^', '_').replace('=', '_').replace('/', '_')
+    return data_path('archive', f"{safe_symbol}_{base}", f"{column.lower()}.bin")
+
+
+def _meta_path(symbol, base):
+    return _column_path(symbol, base, 'meta').replace('.bin', '.json')
+
+
+@contextmanager
+def _writer(symbol, base):
+    """Exclusive write access to one archive, across threads and processes"""
+    with _key_lock((symbol, base)):
+        with open(_column_path(symbol, base, 'lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def stored_rows(symbol, base):
+    """Number of committed rows in the archive (the time column, written last, bounds it)"""
+    sizes = []
+    for column, dtype in DTYPES.items():
+        path = _column_path(symbol, base, column)
+        sizes.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+    return min(sizes)
+
+
+def _columns(symbol, base):
+    """Read-only memmaps of every column, re-mapped when the archive has grown"""
+    rows = stored_rows(symbol, base)
+    key = (symbol, base)
+    cached = _maps.get(key)
+    if cached is None or cached[0] != rows:
+        if rows == 0:
+            columns = {column: np.empty(0, dtype=dtype) for column, dtype in DTYPES.items()}
+        else:
+            columns = {column: np.memmap(_column_path(symbol, base, column), dtype=dtype, mode='r', shape=(rows,))
+                       for column, dtype in DTYPES.items()}
+        cached = (rows, columns)
+        _maps[key] = cached
+    return cached[1]
+
+
+def append(symbol, base, data):
+    """Write bars newer than the archive's last row, revising that row if it reappears"""
+    with _writer(symbol, base):
+        return _append(symbol, base, data)
+
+
+def _append(symbol, base, data):
+    """append() for a caller already holding the archive's writer lock"""
+    if data.empty:
+        return 0
+    epochs = to_epoch(data.index)
+    values = {field: data[field].to_numpy(dtype=float).ravel() if field in data else np.full(len(data), np.nan)
+              for field in FIELDS}
+
+    rows = stored_rows(symbol, base)
+    last = int(_columns(symbol, base)[TIME][-1]) if rows else None
+
+    if last is not None:
+        revised = np.flatnonzero(epochs == last)
+        if len(revised):
+            i = revised[-1]
+            for field in FIELDS:
+                column = np.memmap(_column_path(symbol, base, field), dtype=DTYPES[field], mode='r+', shape=(rows,))
+                column[-1] = values[field][i]
+                column.flush()
+        new = epochs > last
+    else:
+        new = np.ones(len(epochs), dtype=bool)
+
+    if new.any():
+        # Value columns first, each cut back to the committed rows; the time column commits the append
+        for field in FIELDS:
+            with open(_column_path(symbol, base, field), 'ab') as f:
+                f.truncate(rows * DTYPES[field].itemsize)
+                f.write(values[field][new].astype(DTYPES[field]).tobytes())
+        with open(_column_path(symbol, base, TIME), 'ab') as f:
+            f.truncate(rows * DTYPES[TIME].itemsize)
+            f.write(epochs[new].astype(DTYPES[TIME]).tobytes())
+
+    if rows == 0:
+        with open(_meta_path(symbol, base), 'w') as f:
+            json.dump({'tz': None if data.index.tz is None else str(data.index.tz)}, f)
+    return int(new.sum())
+
+
+def _is_fresh(time_file, base):
+    return os.path.exists(time_file) and time.time() - os.path.getmtime(time_file) < REFRESH_SECONDS.get(base, 60)
+
+
+def sync(symbol, base):
+    """Top the archive up from Yahoo when it is older than the base resolution's refresh interval"""
+    time_file = _column_path(symbol, base, TIME)
+    if _is_fresh(time_file, base):
+        return
+    with _writer(symbol, base):
+        # Another process may have synced while this one waited for the lock
+        if _is_fresh(time_file, base):
+            return
+        rows = stored_rows(symbol, base)
+        if rows == 0:
+            period = MAX_PERIOD.get(base, '1mo')
+        else:
+            last = pd.to_datetime(int(_columns(symbol, base)[TIME][-1]), unit='s', utc=True)
+            period = _catch_up_period(base, last)
+        try:
+            new = _download(symbol, base, period=period)
+        except Exception:
+            return
+        _append(symbol, base, new)
+        if os.path.exists(time_file):
+            # Mark the archive fresh for every process, even when no new bar arrived
+            os.utime(time_file)
+
+
+def load(symbol, base="1d", rows=None):
+    """The last `rows` bars (all if None) as a DataFrame, reading only the pages that hold them"""
+    sync(symbol, base)
+    columns = _columns(symbol, base)
+    count = len(columns[TIME])
+    start = 0 if rows is None else max(count - rows, 0)
+
+    try:
+        with open(_meta_path(symbol, base)) as f:
+            tz = json.load(f)['tz']
+    except (FileNotFoundError, ValueError, KeyError):
+        tz = None
+    index = pd.to_datetime(np.asarray(columns[TIME][start:]), unit='s', utc=True)
+    index = index.tz_convert(tz) if tz else index.tz_localize(None)
+    return pd.DataFrame({field: np.asarray(columns[field][start:]) for field in FIELDS}, index=index)
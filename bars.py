@@ -0,0 +1,162 @@
+"""Local OHLCV bar store with multi-resolution aggregation.
+
+Only the base resolution of a symbol (1m for intraday pages, 1h for crypto,
+1d for daily charts) is downloaded. Coarser intervals are resampled locally
+from the stored base bars and cached per base-data version, so switching the
+interval selector is an in-memory aggregation instead of a new download.
+"""
+import threading
+import time
+
+import pandas as pd
+
+import scheduler
+from config import data_path
+
+# Pandas resample rule for every interval the pages offer
+RESAMPLE_RULES = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1h',
+    '4h': '4h',
+    '1d': '1D',
+    '1wk': 'W-MON',  # Monday-labelled weeks holding Monday-Friday sessions, as Yahoo labels them
+}
+
+# Seconds before stored base bars are considered stale and topped up
+REFRESH_SECONDS = {'1m': 60, '1h': 15 * 60, '1d': 6 * 60 * 60}
+
+# Furthest back Yahoo serves each base resolution
+MAX_PERIOD = {'1m': '7d', '1h': '730d', '1d': 'max'}
+
+# Catch-up periods (and the days they span) for topping up stored bars; fixed
+# periods rather than per-symbol start dates let the scheduler batch symbols
+CATCH_UP_PERIODS = [('1d', 1), ('5d', 5), ('1mo', 30), ('3mo', 90), ('1y', 365), ('5y', 5 * 365)]
+MAX_DAYS = {'1m': 7, '1h': 730}
+
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last', 'Volume': 'sum'}
+
+_base = {}
+_fetched_at = {}
+_aggregates = {}
+_locks = {}
+_lock = threading.Lock()
+
+
+def _bars_file(symbol, base):
+    safe_symbol = symbol.replace('^', '_').replace('=', '_').replace('/', '_')
+    return data_path('bars', f"{safe_symbol}_{base}.parquet")
+
+
+def _key_lock(key):
+    """Per-(symbol, base) lock so different symbols load (and batch) concurrently"""
+    with _lock:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _download(symbol, interval, **kwargs):
+    return scheduler.download(symbol, interval=interval, **kwargs)
+
+
+def _catch_up_period(base, last_bar):
+    """Shortest fixed period that reaches back to the last stored bar's session"""
+    # Yahoo periods count sessions ('1d' is today's session only), so compare session dates, not the bar's age
+    today = pd.Timestamp.now(tz=last_bar.tz).normalize()
+    sessions = (today - last_bar.normalize()).days + 1
+    for period, days in CATCH_UP_PERIODS:
+        if days > MAX_DAYS.get(base, days):
+            break
+        if sessions <= days:
+            return period
+    return MAX_PERIOD.get(base, 'max')
+
+
+# Function to resample OHLCV bars to a coarser interval
+def resample_bars(data, interval):
+    """Aggregate OHLCV bars to `interval` (a key of RESAMPLE_RULES)"""
+    if data.empty:
+        return data
+    agg = {column: how for column, how in OHLCV_AGG.items() if column in data.columns}
+    resampled = data.resample(RESAMPLE_RULES[interval], label='left', closed='left').agg(agg)
+    return resampled.dropna(subset=['Open'])
+
+
+def _load_base(symbol, base, since=None):
+    """Return the stored base bars for a symbol, topping them up from Yahoo when stale or fetched before `since`"""
+    key = (symbol, base)
+    now = time.time()
+    fetched_at = _fetched_at.get(key, 0)
+    fresh = now - fetched_at < REFRESH_SECONDS.get(base, 60) and (since is None or fetched_at >= since.timestamp())
+    if key in _base and fresh:
+        return _base[key]
+
+    stored = _base.get(key)
+    if stored is None:
+        try:
+            stored = pd.read_parquet(_bars_file(symbol, base))
+        except (FileNotFoundError, OSError):
+            stored = pd.DataFrame()
+
+    try:
+        if stored.empty:
+            new = _download(symbol, base, period=MAX_PERIOD.get(base, '1mo'))
+        else:
+            # Re-request a window covering the last stored bar, which may have been partial
+            new = _download(symbol, base, period=_catch_up_period(base, stored.index[-1]))
+    except Exception:
+        new = pd.DataFrame()
+
+    if not new.empty:
+        if not stored.empty and stored.index.tz is not None and new.index.tz is not None:
+            new.index = new.index.tz_convert(stored.index.tz)
+        stored = pd.concat([stored, new]) if not stored.empty else new
+        stored = stored[~stored.index.duplicated(keep='last')].sort_index()
+        stored.to_parquet(_bars_file(symbol, base))
+
+    _base[key] = stored
+    _fetched_at[key] = now
+    return stored
+
+
+def _trim(data, period):
+    """Keep only the trailing `period` (e.g. '1d', '5d', '1mo', '1y') of a bar frame"""
+    if data.empty or period in (None, 'max'):
+        return data
+    if period.endswith('mo'):
+        offset = pd.DateOffset(months=int(period[:-2]))
+    elif period.endswith('y'):
+        offset = pd.DateOffset(years=int(period[:-1]))
+    elif period == '1d':
+        # A one-day period means the latest session, not the last 24 hours
+        last_session = data.index[-1].normalize()
+        return data[data.index >= last_session]
+    else:
+        offset = pd.Timedelta(period)
+    return data[data.index > data.index[-1] - offset]
+
+
+def get_bars(symbol, interval, period=None, base=None, since=None):
+    """Return OHLCV bars for `symbol` at `interval`, aggregated locally from the base resolution.
+
+    `since` (a Timestamp) forces a top-up when the stored bars were fetched before it, e.g. before a
+    bar close whose final values the caller needs.
+    """
+    if base is None:
+        base = '1m' if interval in ('1m', '5m', '15m', '30m') else '1d' if interval in ('1d', '1wk') else '1h'
+
+    with _key_lock((symbol, base)):
+        base_data = _load_base(symbol, base, since)
+        if interval == base:
+            return _trim(base_data, period)
+
+        # Aggregates are keyed by the base version so new or revised base bars invalidate them
+        version = ((len(base_data), base_data.index[-1], base_data.iloc[-1].to_numpy().tobytes())
+                   if not base_data.empty else None)
+        key = (symbol, base, interval)
+        cached = _aggregates.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, resample_bars(base_data, interval))
+            _aggregates[key] = cached
+        return _trim(cached[1], period)
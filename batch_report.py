@@ -0,0 +1,150 @@
+"""Headless batch report generator for the dashboard analytics.
+
+Runs the indicator, fundamentals, anomaly, support/resistance, engulfing and
+news analytics for a list of tickers in parallel worker processes and writes
+one bar file per ticker plus a combined summary.json.
+
+    python batch_report.py AAPL MSFT NVDA --out reports --format parquet --workers 8
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import scheduler
+from analytics import (STOCK_SYMBOLS, add_ema, add_macd, add_rsi, calculate_sharpe_ratio,
+                       calculate_support_resistance, compute_fundamental_metrics,
+                       detect_lorentzian_anomalies, fetch_market_return, fetch_risk_free_rate,
+                       fetch_stock_news, identify_engulfing_patterns)
+from config import load_fred
+
+EMA_PERIODS = [200, 50, 20]
+
+
+# Function to run every analytic for one ticker (executed inside a worker process)
+def analyze_ticker(ticker, data, risk_free_rate, market_return):
+    """Return (ticker, bars DataFrame, summary dict) for a single ticker's downloaded bars"""
+    summary = {'ticker': ticker}
+
+    if data.empty:
+        summary['error'] = f"No data returned for ticker {ticker}"
+        return ticker, data, summary
+
+    # Technical indicators
+    data = add_ema(data, EMA_PERIODS)
+    data = add_rsi(data)
+    data = add_macd(data)
+    if risk_free_rate is not None:
+        data['Sharpe Ratio'] = calculate_sharpe_ratio(data, risk_free_rate)
+
+    # Support/resistance and engulfing patterns
+    latest_support, latest_resistance = calculate_support_resistance(data)
+    data = identify_engulfing_patterns(data)
+
+    # Lorentzian anomalies on daily returns
+    data_returns = data['Close'].pct_change().dropna()
+    _, threshold, anomaly_dates = detect_lorentzian_anomalies(data_returns)
+    data['Anomaly'] = data.index.isin(anomaly_dates)
+
+    summary.update({
+        'last_close': float(data['Close'].iloc[-1]),
+        'support': None if latest_support is None else float(latest_support),
+        'resistance': None if latest_resistance is None else float(latest_resistance),
+        'bullish_engulfing': int(data['Bullish Engulfing'].sum()),
+        'bearish_engulfing': int(data['Bearish Engulfing'].sum()),
+        'anomaly_threshold': None if threshold is None else float(threshold),
+        'anomaly_dates': [d.isoformat() for d in anomaly_dates],
+    })
+
+    # Fundamentals and news fail independently of the price analytics
+    try:
+        summary['fundamentals'] = compute_fundamental_metrics(ticker, risk_free_rate, market_return)
+    except Exception as e:
+        summary['fundamentals'] = {'error': str(e)}
+    try:
+        summary['news'] = fetch_stock_news(ticker)
+    except Exception as e:
+        summary['news'] = []
+        summary['news_error'] = str(e)
+
+    return ticker, data, summary
+
+
+# Function to write one ticker's bars in the requested format
+def write_bars(data, out_dir, ticker, fmt):
+    if fmt == 'parquet':
+        path = os.path.join(out_dir, f"{ticker}.parquet")
+        data.to_parquet(path)
+    else:
+        path = os.path.join(out_dir, f"{ticker}.json")
+        data.to_json(path, orient='split', date_format='iso')
+    return path
+
+
+def run_batch(tickers, out_dir='reports', fmt='parquet', period='2y', workers=None):
+    """Analyze tickers in parallel and write the results to out_dir; returns the summaries"""
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Reference rates are shared by every ticker, so fetch them once in the parent
+    try:
+        risk_free_rate = fetch_risk_free_rate(load_fred())
+    except Exception:
+        risk_free_rate = None
+    market_return = fetch_market_return()
+
+    # Bars are downloaded in the parent so the scheduler can batch and rate-limit them
+    downloads = {ticker: scheduler.get_scheduler().submit(ticker, period=period) for ticker in tickers}
+
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for ticker, download in downloads.items():
+            try:
+                data = download.result()
+            except Exception as e:
+                summaries[ticker] = {'ticker': ticker, 'error': str(e)}
+                continue
+            futures[executor.submit(analyze_ticker, ticker, data, risk_free_rate, market_return)] = ticker
+
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                ticker, data, summary = future.result()
+            except Exception as e:
+                summaries[ticker] = {'ticker': ticker, 'error': str(e)}
+                continue
+            if not data.empty:
+                summary['bars_file'] = write_bars(data, out_dir, ticker, fmt)
+            summaries[ticker] = summary
+
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as f:
+        json.dump(summaries, f, indent=2, default=str)
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute dashboard analytics for a list of tickers")
+    parser.add_argument('tickers', nargs='*', help="Tickers to analyze (default: the dashboard watchlist)")
+    parser.add_argument('--tickers-file', help="File with one ticker per line")
+    parser.add_argument('--out', default='reports', help="Output directory")
+    parser.add_argument('--format', choices=['parquet', 'json'], default='parquet', help="Bar file format")
+    parser.add_argument('--period', default='2y', help="History period passed to yfinance")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip().upper() for line in f if line.strip()]
+    if not tickers:
+        tickers = STOCK_SYMBOLS
+
+    summaries = run_batch(tickers, args.out, args.format, args.period, args.workers)
+    failed = [t for t, s in summaries.items() if 'error' in s]
+    print(f"Wrote {len(summaries) - len(failed)} reports to {args.out}")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
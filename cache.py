@@ -0,0 +1,264 @@
+"""Process-wide memoization for data-access functions, with a shared tier.
+
+Unlike st.cache_data this cache is shared by the Streamlit pages, the
+warm-up thread and headless scripts running in the same process. Entries
+are also written to a shared backend chosen by config.CACHE_BACKEND so
+that several Streamlit replicas reuse each other's downloads:
+
+    memory  nothing shared beyond the process (the default)
+    sqlite  a local SQLite file, for replicas on one host
+    redis   any Redis-protocol server, for replicas on several hosts
+
+Shared entries are never unpickled, since anyone who can write to the
+backend could otherwise run code in every replica. DataFrames and Series
+are stored as Parquet bytes and everything else as tagged JSON, then
+zlib-compressed; values of any other type are only cached in-process. A
+failing backend is skipped rather than failing the page.
+
+The per-process store is bounded: expired entries are swept on insert (at
+most every PRUNE_INTERVAL seconds) and beyond MAX_ENTRIES the least
+recently used entries are dropped.
+"""
+import base64
+import functools
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# Per-process entries, least recently used first: key -> ((created, value), expires)
+MAX_ENTRIES = 2048
+PRUNE_INTERVAL = 60
+
+_store = OrderedDict()
+_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def _parquet(frame):
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _encode(value):
+    """JSON-safe form of a cached value; raises TypeError for anything else"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.DataFrame):
+        return {"__frame__": _parquet(value)}
+    if isinstance(value, pd.Series):
+        return {"__series__": _parquet(value.to_frame("value")), "name": _encode(value.name)}
+    if isinstance(value, (datetime, date)):
+        return {"__timestamp__": pd.Timestamp(value).isoformat()}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(v) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {"__dict__": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    raise TypeError(f"Cannot share a cached {type(value).__name__}")
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "__frame__" in value:
+        return pd.read_parquet(io.BytesIO(base64.b64decode(value["__frame__"])))
+    if "__series__" in value:
+        frame = pd.read_parquet(io.BytesIO(base64.b64decode(value["__series__"])))
+        return frame["value"].rename(_decode(value["name"]))
+    if "__timestamp__" in value:
+        return pd.Timestamp(value["__timestamp__"])
+    if "__tuple__" in value:
+        return tuple(_decode(v) for v in value["__tuple__"])
+    if "__dict__" in value:
+        return {_decode(k): _decode(v) for k, v in value["__dict__"]}
+    raise ValueError("Unknown shared cache entry")
+
+
+def _dumps(entry):
+    created, value = entry
+    return zlib.compress(json.dumps([created, _encode(value)]).encode("utf-8"), 6)
+
+
+def _loads(blob):
+    created, value = json.loads(zlib.decompress(blob).decode("utf-8"))
+    return float(created), _decode(value)
+
+
+class MemoryBackend:
+    """No shared tier; the per-process store is the only cache"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, entry, ttl):
+        pass
+
+    def clear(self, prefix):
+        pass
+
+
+class SQLiteBackend:
+    """Entries in a SQLite file shared by every process on the host"""
+
+    def __init__(self, path=None):
+        self.path = path or config.data_path("cache.sqlite")
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, expires REAL, value BLOB)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT expires, value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[0] is not None and row[0] < time.time()):
+            return None
+        return _loads(row[1])
+
+    def set(self, key, entry, ttl):
+        expires = None if ttl is None else entry[0] + ttl
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, expires, _dumps(entry)))
+            self._db.commit()
+
+    def clear(self, prefix):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key LIKE ?", (prefix + "%",))
+            self._db.commit()
+
+
+class RedisBackend:
+    """Entries in a Redis-protocol server; `client` may be any redis.Redis-compatible object"""
+
+    def __init__(self, url=None, client=None, namespace="rss:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("The redis cache backend needs the 'redis' package (pip install redis)")
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.namespace = namespace
+
+    def get(self, key):
+        blob = self.client.get(self.namespace + key)
+        return None if blob is None else _loads(blob)
+
+    def set(self, key, entry, ttl):
+        self.client.set(self.namespace + key, _dumps(entry), ex=None if ttl is None else max(int(ttl), 1))
+
+    def clear(self, prefix):
+        for key in self.client.scan_iter(match=self.namespace + prefix + "*"):
+            self.client.delete(key)
+
+
+BACKENDS = {"memory": MemoryBackend, "sqlite": SQLiteBackend, "redis": RedisBackend}
+
+_backend = None
+
+
+def get_backend():
+    """The configured shared backend, created on first use"""
+    global _backend
+    with _lock:
+        if _backend is None:
+            backend_class = BACKENDS[config.CACHE_BACKEND]
+            _backend = backend_class() if backend_class is MemoryBackend else backend_class(config.CACHE_URL)
+        return _backend
+
+
+def set_backend(backend):
+    """Swap the shared backend (e.g. for a RedisBackend around a local stand-in client)"""
+    global _backend
+    with _lock:
+        _backend = backend
+
+
+def _insert(key, entry, ttl):
+    """Store `entry` in the per-process cache, evicting expired and least recently used entries"""
+    global _last_prune
+    now = time.time()
+    with _lock:
+        _store[key] = (entry, None if ttl is None else entry[0] + ttl)
+        _store.move_to_end(key)
+        if now - _last_prune >= PRUNE_INTERVAL:
+            _last_prune = now
+            for stale in [k for k, (_, expires) in _store.items() if expires is not None and expires <= now]:
+                del _store[stale]
+        while len(_store) > MAX_ENTRIES:
+            _store.popitem(last=False)
+
+
+def _shared_key(name, args, kwargs):
+    digest = hashlib.blake2b(repr((args, kwargs)).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{name}:{digest}"
+
+
+def cached(ttl=None):
+    """Memoize a function on its arguments; entries expire after `ttl` seconds (never if None)"""
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            now = time.time()
+            with _lock:
+                stored = _store.get(key)
+                if stored is not None:
+                    _store.move_to_end(key)
+            if stored is not None and (ttl is None or now - stored[0][0] < ttl):
+                return stored[0][1]
+
+            # Another replica may already have fetched it
+            shared_key = _shared_key(name, args, key[2])
+            backend = get_backend()
+            try:
+                entry = backend.get(shared_key)
+            except Exception:
+                entry = None
+            if entry is None or (ttl is not None and now - entry[0] >= ttl):
+                entry = (now, func(*args, **kwargs))
+                try:
+                    backend.set(shared_key, entry, ttl)
+                except Exception:
+                    pass
+
+            _insert(key, entry, ttl)
+            return entry[1]
+
+        wrapper.cache_clear = lambda: clear(name)
+        return wrapper
+
+    return decorator
+
+
+def clear(name=None):
+    """Drop every cached entry, or only those of the function named `name`"""
+    with _lock:
+        if name is None:
+            _store.clear()
+        else:
+            for key in [key for key in _store if key[0] == name]:
+                del _store[key]
+    try:
+        get_backend().clear("" if name is None else name + ":")
+    except Exception:
+        pass
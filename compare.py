@@ -0,0 +1,143 @@
+"""Multi-symbol comparison page.
+
+Overlays any number of stocks, crypto pairs and FX rates on one rebased
+axis. All symbols are requested together so the scheduler fetches them in
+one batched download; their closes are aligned once onto a union or
+intersection time index as a float32 matrix and forward-filled in place.
+Traces are WebGL scatters that share a single x-array in the page, so the
+chart stays responsive with 50+ series.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+import scheduler
+from cache import cached
+from events import to_epoch
+from figures import FIGURES, render
+from universes import load_universes
+
+PERIODS = ["1mo", "3mo", "6mo", "1y", "2y", "5y", "max"]
+
+
+@cached(ttl=15 * 60)
+def download_closes(symbols, period):
+    """Close series per symbol (a tuple), requested together so they share one batched download"""
+    futures = {symbol: scheduler.get_scheduler().submit(symbol, period=period, interval="1d")
+               for symbol in symbols}
+    closes = {}
+    for symbol, future in futures.items():
+        try:
+            data = future.result()
+        except Exception:
+            continue
+        if not data.empty:
+            closes[symbol] = data['Close'].squeeze().dropna()
+    return closes
+
+
+def align_closes(closes, how="union"):
+    """(epochs, symbols, float32 matrix) of closes on a shared time index.
+
+    `how` is "union" (every timestamp any symbol traded, gaps forward-filled)
+    or "intersection" (only timestamps every symbol traded).
+    """
+    symbols = list(closes)
+    epochs = {symbol: to_epoch(series.index) for symbol, series in closes.items()}
+    if not symbols:
+        return np.empty(0, dtype=np.int64), symbols, np.empty((0, 0), dtype=np.float32)
+
+    index = epochs[symbols[0]]
+    for symbol in symbols[1:]:
+        index = np.union1d(index, epochs[symbol]) if how == "union" else np.intersect1d(index, epochs[symbol])
+
+    matrix = np.full((len(index), len(symbols)), np.nan, dtype=np.float32)
+    for j, symbol in enumerate(symbols):
+        positions = np.searchsorted(index, epochs[symbol])
+        inside = (positions < len(index))
+        inside[inside] = index[positions[inside]] == epochs[symbol][inside]
+        matrix[positions[inside], j] = closes[symbol].to_numpy(dtype=np.float32)[inside]
+
+    if how == "union":
+        forward_fill(matrix)
+    return index, symbols, matrix
+
+
+def forward_fill(matrix):
+    """Forward-fill NaNs down each column in place"""
+    rows = np.arange(len(matrix))
+    for j in range(matrix.shape[1]):
+        column = matrix[:, j]
+        last_valid = np.maximum.accumulate(np.where(np.isnan(column), 0, rows))
+        column[:] = column[last_valid]
+    return matrix
+
+
+def rebase(matrix, base=100.0):
+    """Scale each column so its first valid value equals `base`"""
+    first = np.argmax(~np.isnan(matrix), axis=0)
+    start = matrix[first, np.arange(matrix.shape[1])]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return matrix / start * np.float32(base)
+
+
+def build_figure(symbols, rebased):
+    """Figure JSON with one Scattergl trace per symbol; the x-array is supplied once at render time"""
+    fig = go.Figure(
+        data=[go.Scattergl(y=np.round(rebased[:, j], 3), mode='lines', name=symbol)
+              for j, symbol in enumerate(symbols)],
+        layout=dict(
+            title="Rebased Performance (start = 100)",
+            xaxis=dict(title="Date", type="date"),
+            yaxis=dict(title="Rebased Close"),
+            hovermode="x unified",
+        ),
+    )
+    return fig.to_json()
+
+
+def app():
+    st.title("Compare Symbols")
+
+    # Pick whole universes and/or individual symbols across asset classes
+    universes = load_universes()
+    chosen = st.multiselect("Universes", list(universes), format_func=lambda u: universes[u]['name'])
+    extra = st.text_input("Additional symbols (comma separated)", "AAPL, BTC-USD, EURUSD=X")
+    symbols = list(dict.fromkeys(
+        [s for u in chosen for s in universes[u]['symbols']] +
+        [s.strip().upper() for s in extra.split(",") if s.strip()]
+    ))
+
+    period = st.selectbox("Period", PERIODS, index=3)
+    how = st.radio("Time alignment", ["union", "intersection"], horizontal=True,
+                   help="Union keeps every timestamp and forward-fills gaps (e.g. weekends for stocks); "
+                        "intersection keeps only timestamps every symbol traded.")
+
+    if not symbols:
+        st.info("Select at least one symbol.")
+        return
+
+    closes = download_closes(tuple(symbols), period)
+    missing = [s for s in symbols if s not in closes]
+    if missing:
+        st.warning(f"No data for: {', '.join(missing)}")
+
+    epochs, symbols, matrix = align_closes(closes, how)
+    if len(epochs) == 0:
+        st.error("No overlapping data for the selected symbols.")
+        return
+
+    rebased = rebase(matrix)
+    figure_key = ('compare', tuple(symbols), how, period, len(epochs), int(epochs[-1]))
+    render(FIGURES.figure(figure_key, lambda: build_figure(symbols, rebased)), height=600,
+           shared_x=pd.to_datetime(epochs, unit='s').strftime('%Y-%m-%d %H:%M').tolist())
+
+    # Summary of the rebased series
+    st.subheader("Performance Summary")
+    summary = pd.DataFrame({
+        'Start': matrix[np.argmax(~np.isnan(matrix), axis=0), np.arange(len(symbols))],
+        'Last': matrix[-1],
+        'Return (%)': rebased[-1] - 100,
+    }, index=symbols).sort_values('Return (%)', ascending=False)
+    st.dataframe(summary.style.format("{:.2f}"))
@@ -0,0 +1,39 @@
+import os
+
+# Root directory for locally stored data (reports, caches, archives)
+DATA_DIR = os.environ.get("RSS_DATA_DIR", "data")
+
+# Shared cache tier behind cache.cached(): "memory" (per process), "sqlite" or "redis"
+CACHE_BACKEND = os.environ.get("RSS_CACHE_BACKEND", "memory")
+
+# SQLite file path or redis:// URL for the shared cache (defaults: data/cache.sqlite, redis://localhost:6379/0)
+CACHE_URL = os.environ.get("RSS_CACHE_URL")
+
+# plotly.js loaded by figures.render (default: the CDN build matching the installed plotly package);
+# point it at a self-hosted copy for offline or firewalled deployments
+PLOTLY_JS_URL = os.environ.get("RSS_PLOTLY_JS_URL")
+
+# File holding the FRED API key
+FRED_KEY_FILE = os.environ.get("RSS_FRED_KEY_FILE", "fred.txt")
+
+
+# Function to build a FRED client from the key file
+def load_fred(key_file=FRED_KEY_FILE):
+    """Return a Fred client, or None when no API key is available"""
+    from fredapi import Fred
+
+    try:
+        with open(key_file) as f:
+            api_key = f.read().strip()
+    except FileNotFoundError:
+        return None
+    if not api_key:
+        return None
+    return Fred(api_key=api_key)
+
+
+# Function to build a path under the data directory, creating parents as needed
+def data_path(*parts):
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
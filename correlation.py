@@ -0,0 +1,156 @@
+"""Rolling correlation heatmap and hierarchical clustering for a universe.
+
+The rolling window is summarised by the column sums S and the cross-product
+matrix Q = X'X of its returns. When new bars arrive only the rows entering
+and leaving the window are folded in (Q += new'new - old'old), an O(k·N²)
+update instead of recomputing O(T·N²) over the whole history. Missing
+returns count as zero. Engines are kept per (symbols, window) for the life
+of the process and rebuilt from scratch every `window` updates to bound
+floating-point drift.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+from bars import get_bars
+from events import to_epoch
+from figures import FIGURES, render
+from predict import returns_matrix
+from universes import get_symbols, load_universes
+
+WINDOWS = [20, 60, 120, 250]
+LINKAGE_METHODS = ["average", "complete", "single", "ward"]
+
+
+class RollingCorrelation:
+    """Correlation over the last `window` rows, updated incrementally"""
+
+    def __init__(self, symbols, window):
+        self.symbols = list(symbols)
+        self.window = window
+        n = len(self.symbols)
+        self.rows = np.zeros((0, n))
+        self.last_epoch = None
+        self.sums = np.zeros(n)
+        self.products = np.zeros((n, n))
+        self.updates = 0
+
+    def _rebuild(self):
+        self.sums = self.rows.sum(axis=0)
+        self.products = self.rows.T @ self.rows
+        self.updates = 0
+
+    def update(self, epochs, returns):
+        """Fold in rows of `returns` (time x symbol, aligned to `epochs`) newer than the last update"""
+        returns = np.nan_to_num(np.asarray(returns, dtype=float))
+        new = epochs > self.last_epoch if self.last_epoch is not None else np.ones(len(epochs), dtype=bool)
+        if not new.any():
+            return self
+        incoming = returns[new][-self.window:]
+        rows = np.vstack([self.rows, incoming])
+        outgoing = rows[:max(len(rows) - self.window, 0)]
+        self.rows = rows[len(outgoing):]
+        self.last_epoch = epochs[new][-1]
+
+        self.updates += 1
+        if self.updates >= self.window or len(incoming) + len(outgoing) >= self.window:
+            self._rebuild()
+        else:
+            self.sums += incoming.sum(axis=0) - outgoing.sum(axis=0)
+            self.products += incoming.T @ incoming - outgoing.T @ outgoing
+        return self
+
+    def matrix(self):
+        """Correlation matrix of the current window as a DataFrame"""
+        n = len(self.rows)
+        if n < 2:
+            return pd.DataFrame(np.nan, index=self.symbols, columns=self.symbols)
+        mean = self.sums / n
+        covariance = (self.products - n * np.outer(mean, mean)) / (n - 1)
+        std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = covariance / np.outer(std, std)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.symbols, columns=self.symbols)
+
+
+_engines = {}
+_lock = threading.Lock()
+
+
+def rolling_correlation(returns, window):
+    """Correlation of the last `window` rows of `returns`, reusing this process's engine for the symbols"""
+    key = (tuple(returns.columns), window)
+    with _lock:
+        engine = _engines.setdefault(key, RollingCorrelation(returns.columns, window))
+        return engine.update(to_epoch(returns.index), returns.to_numpy()).matrix()
+
+
+def cluster_order(corr, method="average"):
+    """Symbols reordered by hierarchical clustering on the distance sqrt((1 - corr) / 2)"""
+    valid = corr.notna().all(axis=1) & corr.notna().all(axis=0)
+    names = corr.index[valid]
+    if len(names) < 3:
+        return list(names)
+    distance = np.sqrt(np.clip((1 - corr.loc[names, names].to_numpy()) / 2, 0, None))
+    np.fill_diagonal(distance, 0.0)
+    tree = linkage(squareform(distance, checks=False), method=method)
+    return list(names[leaves_list(tree)])
+
+
+def load_returns(symbols, workers=8):
+    """Daily returns matrix for `symbols` from the shared bar store"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        bars = dict(zip(symbols, executor.map(lambda s: get_bars(s, "1d", period="2y", base="1d"), symbols)))
+    return returns_matrix(bars).iloc[1:]
+
+
+def build_heatmap(corr, order, title):
+    ordered = corr.loc[order, order]
+    fig = go.Figure(go.Heatmap(
+        z=np.round(ordered.to_numpy(), 3),
+        x=order,
+        y=order,
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        reversescale=True,
+    ))
+    fig.update_layout(title=title, yaxis_autorange="reversed")
+    return fig.to_json()
+
+
+def app():
+    st.title("Correlation Clusters")
+
+    universes = load_universes()
+    universe = st.selectbox("Universe", list(universes), format_func=lambda u: universes[u]['name'])
+    window = st.selectbox("Rolling window (bars)", WINDOWS, index=1)
+    method = st.selectbox("Linkage method", LINKAGE_METHODS)
+
+    symbols = get_symbols(universe)
+    returns = load_returns(symbols)
+    if returns.empty or returns.shape[1] < 2:
+        st.error("Not enough data to compute correlations.")
+        return
+
+    corr = rolling_correlation(returns, window)
+    order = cluster_order(corr, method)
+
+    title = f"{universes[universe]['name']} {window}-bar Correlation ({returns.index[-1]:%Y-%m-%d})"
+    figure_key = ('correlation', universe, window, method, tuple(returns.columns), str(returns.index[-1]))
+    render(FIGURES.figure(figure_key, lambda: build_heatmap(corr, order, title)),
+           height=max(500, min(1200, 18 * len(order))))
+
+    # Most and least correlated pairs
+    upper = corr.where(np.triu(np.ones(corr.shape, dtype=bool), k=1)).stack()
+    st.subheader("Most Correlated Pairs")
+    st.dataframe(upper.sort_values(ascending=False).head(10).rename("Correlation"))
+    st.subheader("Least Correlated Pairs")
+    st.dataframe(upper.sort_values().head(10).rename("Correlation"))
@@ -1,6 +1,8 @@
 import streamlit as st
-import yfinance as yf
 import plotly.graph_objects as go
+import time
+from bars import get_bars
+import live
 
 def app():
     st.title("Crypto Chart")
@@ -8,8 +10,16 @@ def app():
     # User input for crypto ticker
     ticker = st.text_input("Enter Crypto Ticker", "BTC-USD")  # Default: Bitcoin
 
+    # Live mode streams newly completed minute bars into a rolling chart
+    if st.checkbox("Live mode"):
+        live_chart(ticker)
+        return
+
+    # Interval selection; coarser bars are aggregated locally from the stored hourly bars
+    interval = st.selectbox("Select Interval", ["1h", "4h", "1d"])
+
     # Fetch crypto data
-    crypto_data = yf.download(ticker, period="1mo", interval="1h")  # 1 month data with 1-hour intervals
+    crypto_data = get_bars(ticker, interval, period="1mo", base="1h")  # 1 month data built from 1-hour bars
 
     # Create crypto chart
     fig = go.Figure(data=[go.Candlestick(x=crypto_data.index,
@@ -21,3 +31,29 @@ def app():
     fig.update_layout(title=f"{ticker} Crypto Price Chart", xaxis_title="Date", yaxis_title="Price (USD)")
 
     st.plotly_chart(fig)
+
+
+def live_chart(ticker):
+    interval = st.selectbox("Live interval", ["1m", "5m", "15m"])
+    refresh = st.slider("Refresh every (seconds)", 5, 120, 30)
+
+    ring, latest = live.poll(ticker, interval)
+    history = ring.since()
+    if history.empty:
+        st.error(f"No recent bars for {ticker}.")
+        return
+
+    price = st.empty()
+    chart = st.line_chart(history[['Close']])
+    last_drawn = ring.last_time
+
+    # Keep polling; only bars completed since the last draw are sent to the browser
+    while True:
+        if latest is not None:
+            price.metric(f"{ticker} (forming {interval} bar)", f"{float(latest['Close']):,.2f}")
+        new_bars = ring.since(last_drawn)
+        if not new_bars.empty:
+            chart.add_rows(new_bars[['Close']])
+            last_drawn = ring.last_time
+        time.sleep(refresh)
+        ring, latest = live.poll(ticker, interval)
@@ -1,11 +1,17 @@
 import streamlit as st
-import yfinance as yf
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
-import feedparser
 from fredapi import Fred
 import base64
+import analytics
+import archive
+from cache import cached
+from analytics import add_ema, add_rsi, add_macd, calculate_sharpe_ratio, fetch_market_return, fetch_risk_free_rate
+from figures import FIGURES, axis_ids, compose, data_version, render
+from indicators import add_indicators
+from sentiment import sentiment_series
+from universes import start_warm_up
 
 # Function to load the image and convert it to base64
 def get_base64_of_bin_file(bin_file):
@@ -37,6 +43,9 @@ st.markdown(
 )
 
 
+# Pre-fetch the configured universes once per server process
+start_warm_up()
+
 # Add FRED API configuration
 try:
     with open('fred.txt') as f:
@@ -55,8 +64,7 @@ def get_risk_free_rate():
     if not fred:
         return None
     try:
-        ten_year_yield = fred.get_series('DGS10')
-        return ten_year_yield.tail(1).values[0] / 100  # Convert percentage to decimal
+        return fetch_risk_free_rate(fred)
     except Exception as e:
         st.warning(f"Unable to fetch risk-free rate: {str(e)}")
         return None
@@ -64,248 +72,23 @@ def get_risk_free_rate():
 @st.cache_data
 def get_market_return():
     """Calculate average annual market return for S&P 500 over the last 10 years"""
-    sp500 = yf.Ticker("^GSPC")
-    history = sp500.history(period="10y")
-    
-    # Resample the data to get annual 'Close' values at year-end
-    annual_data = history['Close'].resample('Y').last()
-    
-    # Calculate annual returns
-    annual_returns = annual_data.pct_change().dropna() * 100  # Convert to percentage
-    
-    # Calculate the average annual market return
-    market_return = annual_returns.mean() / 100  # Convert to decimal
-    return market_return
+    return fetch_market_return()
 
-@st.cache_data
-def load_data(ticker):
-    data = yf.download(ticker)
-    return data
+# Longest period the slider offers, plus enough earlier bars for the 200-day EMA and the 252-day Sharpe ratio
+MAX_PERIODS = 365
+WARMUP_BARS = 750
 
-def calculate_sharpe_ratio(data, risk_free_rate, window=252):
-    """Calculate rolling Sharpe ratio"""
-    if risk_free_rate is None:
-        return None
-        
-    # Calculate daily returns
-    daily_returns = data['Close'].pct_change()
-    
-    # Calculate excess returns over risk-free rate
-    excess_returns = daily_returns - (risk_free_rate / 252)  # Daily risk-free rate
-    
-    # Calculate rolling metrics
-    rolling_return = excess_returns.rolling(window=window).mean() * 252  # Annualized return
-    rolling_std = daily_returns.rolling(window=window).std() * (252 ** 0.5)  # Annualized volatility
-    
-    # Calculate Sharpe ratio
-    sharpe_ratio = rolling_return / rolling_std
-    return sharpe_ratio
-
-def add_ema(data, periods):
-    for period in periods:
-        data[f'EMA_{period}'] = data['Close'].ewm(span=period, adjust=False).mean()
-    return data
-
-def add_rsi(data, window=14):
-    delta = data['Close'].diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=window).mean()
-    avg_loss = loss.rolling(window=window).mean()
-    rs = avg_gain / avg_loss
-    data['RSI'] = 100 - (100 / (1 + rs))
-    return data
-
-def add_macd(data):
-    short_ema = data['Close'].ewm(span=12, adjust=False).mean()
-    long_ema = data['Close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = short_ema - long_ema
-    data['Signal Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-    return data
+@cached(ttl=15 * 60)
+def load_data(ticker):
+    # Tail of the memory-mapped daily archive; only the pages holding these rows are read
+    return archive.load(ticker, "1d", rows=MAX_PERIODS + WARMUP_BARS)
 
-@st.cache_data
+# Fundamentals and news are memoized (and shared across replicas) by the analytics layer
 def get_fundamental_metrics(ticker):
-    stock = yf.Ticker(ticker)
-    info = stock.info
-
-    # Get risk-free rate
-    risk_free_rate = get_risk_free_rate()
-    
-    # Get market return
-    market_return = get_market_return()
-
-    # Fetch balance sheet and financials data
-    balance_sheet = stock.balance_sheet
-    financials = stock.financials
-
-    # Get interest expense (from income statement) and total debt (from balance sheet)
-    interest_expense = financials.loc['Interest Expense'].iloc[0] if 'Interest Expense' in financials.index else 0
-    long_term_debt = balance_sheet.loc['Long Term Debt'].iloc[0] if 'Long Term Debt' in balance_sheet.index else 0
-    short_term_debt = balance_sheet.loc['Short Term Debt'].iloc[0] if 'Short Term Debt' in balance_sheet.index else 0
-    total_debt = long_term_debt + short_term_debt
-
-    # Get income statement to calculate tax rate using Tax Provision and Pretax Income
-    tax_provision = financials.loc['Tax Provision'].iloc[0] if 'Tax Provision' in financials.index else 0
-    pretax_income = financials.loc['Pretax Income'].iloc[0] if 'Pretax Income' in financials.index else 1  # Avoid division by zero
-
-    # Calculate the effective tax rate
-    tax_rate = tax_provision / pretax_income if pretax_income != 0 else 0
-
-    # Calculate cost of debt (adjusted for taxes)
-    cost_of_debt = (interest_expense / total_debt) * (1 - tax_rate) if total_debt != 0 else 0
-
-    # Get market capitalization (market value of equity)
-    market_cap = info.get('marketCap', None)
-
-    # Calculate cost of equity using CAPM
-    beta = info.get('beta', None)  # Beta from Yahoo Finance
-    if beta is None:
-        raise ValueError("Beta value not found. Please check the ticker information.")
-    
-    cost_of_equity = risk_free_rate + beta * (market_return - risk_free_rate)
-
-    # Calculate WACC
-    V = market_cap + total_debt  # Total value (equity + debt)
-    WACC = (market_cap / V) * cost_of_equity + (total_debt / V) * cost_of_debt * (1 - tax_rate)
-
-    metrics = {
-        'Risk-Free Rate': f"{risk_free_rate:.2%}" if risk_free_rate is not None else 'N/A',
-        'Market Return': f"{market_return:.2%}" if market_return is not None else 'N/A',
-        'P/E Ratio': info.get('trailingPE', 'N/A'),
-        'ROE': info.get('returnOnEquity', 'N/A'),
-        'ROA': info.get('returnOnAssets', 'N/A'),
-        'Gross Margin': info.get('grossMargins', 'N/A'),
-        'Profit Margin': info.get('profitMargins', 'N/A'),
-        'Debt to Equity': info.get('debtToEquity', 'N/A'),
-        'Current Ratio': info.get('currentRatio', 'N/A'),
-        'Price to Book': info.get('priceToBook', 'N/A'),
-        'Earnings Per Share': info.get('trailingEps', 'N/A'),
-        'Dividend Yield': info.get('dividendYield', 'N/A'),
-        'Tax Rate': f"{tax_rate:.2%}",  # New metric for tax rate
-        'Cost of Debt': f"{cost_of_debt:.2%}",  # New metric for cost of debt
-        'WACC': f"{WACC:.2%}",  # New metric for WACC
-    }
-    
-    # Clean up metrics for display
-    for key, value in metrics.items():
-        if key in ['Risk-Free Rate', 'Market Return', 'Tax Rate', 'Cost of Debt', 'WACC']:
-            continue  # Skip processing for these as they're already formatted
-        if isinstance(value, (int, float)):
-            metrics[key] = round(value, 2)
-        elif value == 'N/A':
-            metrics[key] = 'N/A'
-        else:
-            try:
-                metrics[key] = round(float(value), 2)
-            except ValueError:
-                metrics[key] = 'N/A'
-    
-    return metrics
+    return analytics.get_fundamental_metrics(ticker)
 
-    stock = yf.Ticker(ticker)
-    info = stock.info
-    
-    # Get risk-free rate
-    risk_free_rate = get_risk_free_rate()
-    
-    # Get market return
-    market_return = get_market_return()
-
-    # Fetch balance sheet and financials data
-    balance_sheet = stock.balance_sheet
-    financials = stock.financials
-
-    # Get interest expense (from income statement) and total debt (from balance sheet)
-    interest_expense = financials.loc['Interest Expense'].iloc[0] if 'Interest Expense' in financials.index else 0
-    total_debt = balance_sheet.loc['Total Debt'].iloc[0] if 'Total Debt' in balance_sheet.index else 0
-
-    # Get income statement to calculate tax rate using Tax Provision and Pretax Income
-    tax_provision = financials.loc['Tax Provision'].iloc[0] if 'Tax Provision' in financials.index else 0
-    pretax_income = financials.loc['Pretax Income'].iloc[0] if 'Pretax Income' in financials.index else 1  # Avoid division by zero
-
-    # Calculate the effective tax rate
-    tax_rate = tax_provision / pretax_income if pretax_income != 0 else 0
-
-    # Calculate cost of debt (adjusted for taxes)
-    cost_of_debt = (interest_expense / total_debt) * (1 - tax_rate) if total_debt != 0 else 0
-
-    metrics = {
-        'Risk-Free Rate': f"{risk_free_rate:.2%}" if risk_free_rate is not None else 'N/A',
-        'Market Return': f"{market_return:.2%}" if market_return is not None else 'N/A',
-        'P/E Ratio': info.get('trailingPE', 'N/A'),
-        'ROE': info.get('returnOnEquity', 'N/A'),
-        'ROA': info.get('returnOnAssets', 'N/A'),
-        'Gross Margin': info.get('grossMargins', 'N/A'),
-        'Profit Margin': info.get('profitMargins', 'N/A'),
-        'Debt to Equity': info.get('debtToEquity', 'N/A'),
-        'Current Ratio': info.get('currentRatio', 'N/A'),
-        'Price to Book': info.get('priceToBook', 'N/A'),
-        'Earnings Per Share': info.get('trailingEps', 'N/A'),
-        'Dividend Yield': info.get('dividendYield', 'N/A'),
-        'Tax Rate': f"{tax_rate:.2%}",  # New metric for tax rate
-        'Cost of Debt': f"{cost_of_debt:.2%}",  # New metric for cost of debt
-    }
-    
-    # Clean up metrics for display
-    for key, value in metrics.items():
-        if key in ['Risk-Free Rate', 'Market Return', 'Tax Rate', 'Cost of Debt']:
-            continue  # Skip processing for these as they're already formatted
-        if isinstance(value, (int, float)):
-            metrics[key] = round(value, 2)
-        elif value == 'N/A':
-            metrics[key] = 'N/A'
-        else:
-            try:
-                metrics[key] = round(float(value), 2)
-            except ValueError:
-                metrics[key] = 'N/A'
-    
-    return metrics
-
-    stock = yf.Ticker(ticker)
-    info = stock.info
-    
-    # Get risk-free rate
-    risk_free_rate = get_risk_free_rate()
-    
-    # Get market return
-    market_return = get_market_return()
-    
-    metrics = {
-        'Risk-Free Rate': f"{risk_free_rate:.2%}" if risk_free_rate is not None else 'N/A',
-        'Market Return': f"{market_return:.2%}" if market_return is not None else 'N/A',
-        'P/E Ratio': info.get('trailingPE', 'N/A'),
-        'ROE': info.get('returnOnEquity', 'N/A'),
-        'ROA': info.get('returnOnAssets', 'N/A'),
-        'Gross Margin': info.get('grossMargins', 'N/A'),
-        'Profit Margin': info.get('profitMargins', 'N/A'),
-        'Debt to Equity': info.get('debtToEquity', 'N/A'),
-        'Current Ratio': info.get('currentRatio', 'N/A'),
-        'Price to Book': info.get('priceToBook', 'N/A'),
-        'Earnings Per Share': info.get('trailingEps', 'N/A'),
-        'Dividend Yield': info.get('dividendYield', 'N/A'),
-    }
-    
-    for key, value in metrics.items():
-        if key in ['Risk-Free Rate', 'Market Return']:
-            continue  # Skip processing for these as they're already formatted
-        if isinstance(value, (int, float)):
-            metrics[key] = round(value, 2)
-        elif value == 'N/A':
-            metrics[key] = 'N/A'
-        else:
-            try:
-                metrics[key] = round(float(value), 2)
-            except ValueError:
-                metrics[key] = 'N/A'
-    
-    return metrics
-
-@st.cache_data
 def fetch_rss_feed(ticker):
-    feed_url = f"https://finance.yahoo.com/rss/headline?s={ticker}"
-    feed = feedparser.parse(feed_url)
-    return feed
+    return analytics.fetch_stock_news(ticker)
 
 # Main app
 st.title('Interactive Stock Chart with Technical Indicators and Fundamental Metrics')
@@ -314,14 +97,14 @@ st.title('Interactive Stock Chart with Technical Indicators and Fundamental Metr
 st.sidebar.title('Stock Ticker and News')
 ticker = st.sidebar.text_input('Enter Stock Ticker', 'GOOGL').upper()
 
-# Load stock data
-data = load_data(ticker)
+# Load stock data (a private copy: the cached frame is shared by every session)
+data = load_data(ticker).copy()
 
 # Get risk-free rate for Sharpe ratio calculation
 risk_free_rate = get_risk_free_rate()
 
 # Time period selection
-periods = st.slider('Select Time Period (in days)', 30, 365, 180)
+periods = st.slider('Select Time Period (in days)', 30, MAX_PERIODS, 180)
 
 # EMA selection
 selected_emas = st.multiselect('Select EMA periods', [200, 50, 20], default=[200, 50, 20])
@@ -329,6 +112,9 @@ selected_emas = st.multiselect('Select EMA periods', [200, 50, 20], default=[200
 # Indicator plots selection
 add_rsi_plot = st.checkbox('Add RSI Subplot')
 add_macd_plot = st.checkbox('Add MACD Subplot')
+add_sentiment_overlay = st.checkbox('Overlay News Sentiment')
+extra_indicators = st.multiselect('Additional indicators', ['Bollinger Bands', 'ATR', 'Stochastic', 'ADX', 'OBV'])
+extra_subplots = [name for name in ['ATR', 'Stochastic', 'ADX', 'OBV'] if name in extra_indicators]
 
 # Calculate Sharpe ratio if risk-free rate is available
 if risk_free_rate is not None:
@@ -352,15 +138,19 @@ if selected_metrics:
 # Add selected EMAs to data
 data = add_ema(data, selected_emas)
 
-# Slice data for the selected period
-data_period = data[-periods:]
-
-# Add indicators if selected
+# Indicators are computed on the full history so the visible window starts warmed up
 if add_rsi_plot:
-    data_period = add_rsi(data_period)
+    data = add_rsi(data)
 
 if add_macd_plot:
-    data_period = add_macd(data_period)
+    data = add_macd(data)
+
+# The extended indicators are computed together from shared intermediates
+if extra_indicators:
+    data = add_indicators(data)
+
+# Slice data for the selected period
+data_period = data[-periods:]
 
 # Previous imports and functions remain the same...
 
@@ -420,91 +210,153 @@ else:
 
 # Rest of the plotting code remains the same...
 
-# Create subplots
-subplot_titles = ['Price']
-if add_rsi_plot:
-    subplot_titles.append('RSI')
-if add_macd_plot:
-    subplot_titles.append('MACD')
-if risk_free_rate is not None and add_sharpe:
-    subplot_titles.append('Sharpe Ratio')
-
-rows = 1 + add_rsi_plot + add_macd_plot + (add_sharpe if risk_free_rate is not None else 0)
-
-fig = make_subplots(rows=rows, cols=1, shared_xaxes=True,
-                    vertical_spacing=0.15,
-                    row_heights=[0.5] + [0.25] * (rows - 1),
-                    subplot_titles=subplot_titles)
-
-# Add candlestick chart
-if not data_period.empty:
-    fig.add_trace(go.Candlestick(x=data_period.index,
-                                open=data_period['Open'],
-                                high=data_period['High'],
-                                low=data_period['Low'],
-                                close=data_period['Close'],
-                                name='Candlesticks'), row=1, col=1)
-
-    # Add selected EMA traces
-    for period in selected_emas:
-        if f'EMA_{period}' in data_period.columns:
-            fig.add_trace(go.Scatter(x=data_period.index, 
-                                   y=data_period[f'EMA_{period}'],
-                                   mode='lines', 
-                                   name=f'EMA {period}'), row=1, col=1)
-
-# Update price axis with safety check
-if not pd.isna(price_range[0]) and not pd.isna(price_range[1]):
-    fig.update_yaxes(title_text='Price', row=1, col=1, range=price_range)
-else:
-    fig.update_yaxes(title_text='Price', row=1, col=1)
-
-# Initialize current_row
-current_row = 2
-
-# Add RSI trace
-if add_rsi_plot and not data_period.empty and 'RSI' in data_period.columns:
-    fig.add_trace(go.Scatter(x=data_period.index, 
-                            y=data_period['RSI'],
-                            mode='lines', 
-                            name='RSI'), row=current_row, col=1)
-    fig.add_hline(y=70, line=dict(color='red', dash='dash'), row=current_row, col=1)
-    fig.add_hline(y=30, line=dict(color='green', dash='dash'), row=current_row, col=1)
-    fig.update_yaxes(title_text='RSI', range=rsi_range, row=current_row, col=1)
-    current_row += 1
-
-# Add MACD traces
-if add_macd_plot and not data_period.empty and 'MACD' in data_period.columns:
-    fig.add_trace(go.Scatter(x=data_period.index, 
-                            y=data_period['MACD'],
-                            mode='lines', 
-                            name='MACD'), row=current_row, col=1)
-    fig.add_trace(go.Scatter(x=data_period.index, 
-                            y=data_period['Signal Line'],
-                            mode='lines', 
-                            name='Signal Line'), row=current_row, col=1)
-    fig.update_yaxes(title_text='MACD', row=current_row, col=1, range=macd_range)
-    current_row += 1
-
-# Add Sharpe ratio trace
-if risk_free_rate is not None and add_sharpe and 'Sharpe Ratio' in data_period.columns:
-    sharpe_range = calculate_custom_range(data_period, 'Sharpe Ratio')
-    fig.add_trace(go.Scatter(x=data_period.index, 
-                            y=data_period['Sharpe Ratio'],
-                            mode='lines', 
-                            name='Sharpe Ratio'), row=current_row, col=1)
-    fig.update_yaxes(title_text='Sharpe Ratio', row=current_row, col=1, range=sharpe_range)
-
-# Final layout adjustments
-fig.update_layout(height=800, 
-                 title=f"{ticker} Stock Price with Indicators",
-                 xaxis_rangeslider_visible=False)
-
-# Display the plot
-st.plotly_chart(fig)
+show_sharpe = risk_free_rate is not None and add_sharpe
+# Headlines for the sentiment overlay and the sidebar; a feed error is reported there instead
+try:
+    news_items, news_error = fetch_rss_feed(ticker), None
+except Exception as e:
+    news_items, news_error = [], f"Error fetching news for {ticker}: {str(e)}"
+sentiment = sentiment_series(news_items) if add_sentiment_overlay else None
+sentiment_version = (len(sentiment), str(sentiment.index[-1])) if sentiment is not None and not sentiment.empty else None
+# Identify the data behind the figure; cached traces are reused while it is unchanged
+trace_key = (ticker, data_version(data), periods)
+
+# Each subplot beyond the original four adds to the figure height
+figure_height = 800 + 150 * max(0, 1 + add_rsi_plot + add_macd_plot + len(extra_subplots) + show_sharpe - 4)
+
+def build_figure():
+    # Create subplots
+    subplot_titles = ['Price']
+    if add_rsi_plot:
+        subplot_titles.append('RSI')
+    if add_macd_plot:
+        subplot_titles.append('MACD')
+    subplot_titles.extend(extra_subplots)
+    if show_sharpe:
+        subplot_titles.append('Sharpe Ratio')
+
+    rows = len(subplot_titles)
+
+    fig = make_subplots(rows=rows, cols=1, shared_xaxes=True,
+                        vertical_spacing=min(0.15, 0.6 / max(rows - 1, 1)),
+                        row_heights=[0.5] + [0.25] * (rows - 1),
+                        subplot_titles=subplot_titles,
+                        specs=[[{'secondary_y': True}]] + [[{}]] * (rows - 1))
+    traces = []
+
+    # Add candlestick chart
+    if not data_period.empty:
+        x, y = axis_ids(fig, 1)
+        traces.append(FIGURES.trace(trace_key + ('Candlesticks',), lambda: go.Candlestick(x=data_period.index,
+                                    open=data_period['Open'],
+                                    high=data_period['High'],
+                                    low=data_period['Low'],
+                                    close=data_period['Close'],
+                                    name='Candlesticks'), x, y))
+
+        # Add selected EMA traces
+        for period in selected_emas:
+            if f'EMA_{period}' in data_period.columns:
+                traces.append(FIGURES.trace(trace_key + (f'EMA {period}',), lambda period=period: go.Scatter(x=data_period.index,
+                                       y=data_period[f'EMA_{period}'],
+                                       mode='lines',
+                                       name=f'EMA {period}'), x, y))
+
+        # Add Bollinger Bands to the price row
+        if 'Bollinger Bands' in extra_indicators:
+            for column in ['BB Upper', 'BB Middle', 'BB Lower']:
+                traces.append(FIGURES.trace(trace_key + (column,), lambda column=column: go.Scatter(x=data_period.index,
+                                           y=data_period[column],
+                                           mode='lines',
+                                           name=column,
+                                           line=dict(width=1, dash='dot' if column == 'BB Middle' else 'solid')), x, y))
+
+        # Overlay rolling headline sentiment on a secondary axis of the price row
+        if sentiment is not None and not sentiment.empty:
+            sentiment_period = sentiment.tz_convert(None)
+            sentiment_period = sentiment_period[sentiment_period.index >= data_period.index[0]]
+            x2, y2 = axis_ids(fig, 1, secondary_y=True)
+            traces.append(FIGURES.trace(trace_key + ('News Sentiment', sentiment_version), lambda: go.Scatter(x=sentiment_period.index,
+                                       y=sentiment_period,
+                                       mode='lines+markers',
+                                       name='News Sentiment',
+                                       line=dict(dash='dot')), x2, y2))
+            fig.update_yaxes(title_text='Sentiment', range=[-1, 1], row=1, col=1, secondary_y=True)
+
+    # Update price axis with safety check
+    if not pd.isna(price_range[0]) and not pd.isna(price_range[1]):
+        fig.update_yaxes(title_text='Price', row=1, col=1, range=price_range)
+    else:
+        fig.update_yaxes(title_text='Price', row=1, col=1)
+
+    # Initialize current_row
+    current_row = 2
+
+    # Add RSI trace
+    if add_rsi_plot and not data_period.empty and 'RSI' in data_period.columns:
+        x, y = axis_ids(fig, current_row)
+        traces.append(FIGURES.trace(trace_key + ('RSI',), lambda: go.Scatter(x=data_period.index,
+                                y=data_period['RSI'],
+                                mode='lines',
+                                name='RSI'), x, y))
+        fig.add_hline(y=70, line=dict(color='red', dash='dash'), row=current_row, col=1,
+                      exclude_empty_subplots=False)
+        fig.add_hline(y=30, line=dict(color='green', dash='dash'), row=current_row, col=1,
+                      exclude_empty_subplots=False)
+        fig.update_yaxes(title_text='RSI', range=rsi_range, row=current_row, col=1)
+        current_row += 1
+
+    # Add MACD traces
+    if add_macd_plot and not data_period.empty and 'MACD' in data_period.columns:
+        x, y = axis_ids(fig, current_row)
+        for column in ['MACD', 'Signal Line']:
+            traces.append(FIGURES.trace(trace_key + (column,), lambda column=column: go.Scatter(x=data_period.index,
+                                    y=data_period[column],
+                                    mode='lines',
+                                    name=column), x, y))
+        fig.update_yaxes(title_text='MACD', row=current_row, col=1, range=macd_range)
+        current_row += 1
+
+    # Add the extended indicator subplots
+    extra_columns = {'ATR': ['ATR'], 'Stochastic': ['%K', '%D'], 'ADX': ['ADX', '+DI', '-DI'], 'OBV': ['OBV']}
+    for name in extra_subplots:
+        x, y = axis_ids(fig, current_row)
+        for column in extra_columns[name]:
+            traces.append(FIGURES.trace(trace_key + (column,), lambda column=column: go.Scatter(x=data_period.index,
+                                    y=data_period[column],
+                                    mode='lines',
+                                    name=column), x, y))
+        if name == 'Stochastic':
+            fig.add_hline(y=80, line=dict(color='red', dash='dash'), row=current_row, col=1,
+                          exclude_empty_subplots=False)
+            fig.add_hline(y=20, line=dict(color='green', dash='dash'), row=current_row, col=1,
+                          exclude_empty_subplots=False)
+        fig.update_yaxes(title_text=name, row=current_row, col=1)
+        current_row += 1
+
+    # Add Sharpe ratio trace
+    if show_sharpe and 'Sharpe Ratio' in data_period.columns:
+        x, y = axis_ids(fig, current_row)
+        traces.append(FIGURES.trace(trace_key + ('Sharpe Ratio',), lambda: go.Scatter(x=data_period.index,
+                                y=data_period['Sharpe Ratio'],
+                                mode='lines',
+                                name='Sharpe Ratio'), x, y))
+        fig.update_yaxes(title_text='Sharpe Ratio', row=current_row, col=1, range=sharpe_range)
+
+    # Final layout adjustments
+    fig.update_layout(height=figure_height,
+                     title=f"{ticker} Stock Price with Indicators",
+                     xaxis_rangeslider_visible=False)
+    return compose(traces, fig.layout)
+
+# Display the plot (served from the figure cache when nothing it depends on changed)
+figure_key = trace_key + (tuple(selected_emas), add_rsi_plot, add_macd_plot, tuple(extra_indicators), show_sharpe,
+                          sentiment_version)
+render(FIGURES.figure(figure_key, build_figure), height=figure_height)
 
 # Sidebar for news feed
 st.sidebar.title(f"{ticker} News Feed")
-feed = fetch_rss_feed(ticker)
-for entry in feed.entries[:10]:
-    st.sidebar.write(f"[{entry.title}]({entry.link})")
+if news_error:
+    st.sidebar.error(news_error)
+for item in news_items[:10]:
+    st.sidebar.write(f"[{item['title']}]({item['url']})")
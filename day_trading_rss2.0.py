@@ -2,11 +2,20 @@ import streamlit as st
 import base64
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import numpy as np
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
-import feedparser
+import analytics
+import anomaly_store
+import volume
+from analytics import STOCK_SYMBOLS, identify_engulfing_patterns, lorentzian_distance
+from bars import get_bars
+from cache import cached
+from events import EventIndex
+from figures import FIGURES, data_version, render
+from predict import forecast_table, returns_matrix
+from universes import start_warm_up, universes_for
 
 # Function to load the image and convert it to base64
 def get_base64_of_bin_file(bin_file):
@@ -39,10 +48,19 @@ st.markdown(
 
 
 
+# Pre-fetch the configured universes once per server process
+start_warm_up()
+
+# Function to load bars through the shared cache tier
+@cached(ttl=60)
+def load_bars(stock_symbol, interval, yf_period):
+    # 1m bars are downloaded once; 5m/15m are aggregated locally from them
+    return get_bars(stock_symbol, interval, period=yf_period, base="1m")
+
 # Function to fetch data based on the selected period and stock symbol
 def fetch_data(stock_symbol, interval, yf_period):
     try:
-        data = yf.download(stock_symbol, period=yf_period, interval=interval)
+        data = load_bars(stock_symbol, interval, yf_period).copy()
         if data.empty:
             st.error(f"No data returned for ticker {stock_symbol}. Please check the ticker symbol or interval.")
         return data
@@ -77,38 +95,66 @@ def calculate_support_resistance(data, window=20):
 
 # Function to fetch stock news using RSS feed
 def fetch_stock_news(stock_symbol):
-    url = "https://finance.yahoo.com/rss/headline?s=" + stock_symbol
     try:
-        feed = feedparser.parse(url)
-        articles = []
-        for entry in feed.entries:
-            articles.append({
-                'title': entry.title,
-                'publishedAt': entry.published,
-                'url': entry.link
-            })
-        return articles
+        # Served from the shared process cache filled by the warm-up stage
+        return analytics.fetch_stock_news(stock_symbol)
     except Exception as e:
         st.error(f"Error fetching news from RSS feed: {e}")
         return []
 
-# Function to identify engulfing candlesticks
-def identify_engulfing_patterns(data):
-    data['Bullish Engulfing'] = (
-        (data['Open'] < data['Close'].shift(1)) &
-        (data['Close'] > data['Open'].shift(1)) &
-        (data['Close'] > data['Open']) &
-        (data['Open'].shift(1) > data['Close'].shift(1))
-    )
-    
-    data['Bearish Engulfing'] = (
-        (data['Open'] > data['Close'].shift(1)) &
-        (data['Close'] < data['Open'].shift(1)) &
-        (data['Close'] < data['Open']) &
-        (data['Open'].shift(1) < data['Close'].shift(1))
-    )
-    
-    return data
+# Function to show session VWAP bands and the volume profile from 1m bars
+def show_volume_analytics(stock_symbol, yf_period):
+    st.header("Volume Analytics")
+    minute_bars = fetch_data(stock_symbol, "1m", yf_period)
+    if minute_bars.empty:
+        return
+    vwap = volume.session_vwap(minute_bars)
+    profile = volume.session_profile(stock_symbol, minute_bars)
+    poc = profile.point_of_control()
+    value_low, value_high = profile.value_area()
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("VWAP", f"{vwap['VWAP'].iloc[-1]:.2f}")
+    col2.metric("Point of Control", f"{poc:.2f}" if poc is not None else "N/A")
+    col3.metric("Value Area", f"{value_low:.2f} - {value_high:.2f}" if value_low is not None else "N/A")
+
+    def build_chart():
+        fig = make_subplots(rows=1, cols=2, shared_yaxes=True, column_widths=[0.8, 0.2], horizontal_spacing=0.01)
+        fig.add_trace(go.Candlestick(
+            x=minute_bars.index,
+            open=minute_bars['Open'],
+            high=minute_bars['High'],
+            low=minute_bars['Low'],
+            close=minute_bars['Close'],
+            name='Candlesticks'
+        ), row=1, col=1)
+        styles = {'VWAP': dict(color='orange', width=2)}
+        for column in vwap.columns:
+            fig.add_trace(go.Scatter(
+                x=vwap.index, y=vwap[column], mode='lines', name=column,
+                line=styles.get(column, dict(color='gray', width=1, dash='dot'))
+            ), row=1, col=1)
+
+        levels = profile.to_frame()
+        inside = (levels['Price'] >= value_low) & (levels['Price'] <= value_high)
+        fig.add_trace(go.Bar(
+            x=levels['Volume'], y=levels['Price'], orientation='h', name='Volume Profile',
+            marker_color=np.where(inside, 'steelblue', 'lightgray'), width=profile.bucket_size
+        ), row=1, col=2)
+        if poc is not None:
+            fig.add_hline(y=poc, line_dash='dash', line_color='red', annotation_text='POC')
+
+        fig.update_layout(
+            title=f'{stock_symbol} Session VWAP and Volume Profile (1m)',
+            yaxis_title='Stock Price',
+            xaxis_rangeslider_visible=False,
+            xaxis_tickformat='%H:%M',
+            bargap=0,
+        )
+        return fig.to_json()
+
+    render(FIGURES.figure((stock_symbol, "volume", data_version(minute_bars), float(profile.volume.sum())),
+                          build_chart), height=500)
 
 # Streamlit app
 def main():
@@ -116,18 +162,12 @@ def main():
 
     # Sidebar for user input
     st.sidebar.header("Settings")
-    stock_symbols = [
-        "AAPL",  # Apple
-        "GOOGL",  # Alphabet (Google)
-        "MSFT",  # Microsoft
-        "AMZN",  # Amazon
-        "TSLA",  # Tesla
-        "META",  # Meta Platforms (Facebook)
-        "NFLX",  # Netflix
-        "NVDA",  # NVIDIA
-        "INTC",  # Intel
-        "AMD"    # AMD
-    ]
+    stock_universes = universes_for("stock")
+    universe_id = st.sidebar.selectbox(
+        "Select Universe", list(stock_universes) or ["watchlist"],
+        format_func=lambda uid: stock_universes[uid]["name"] if uid in stock_universes else uid
+    )
+    stock_symbols = stock_universes.get(universe_id, {}).get("symbols") or STOCK_SYMBOLS
     stock_symbol = st.sidebar.selectbox("Select Stock Symbol", stock_symbols)
     
     # Adding a new dropdown for interval selection
@@ -160,27 +200,15 @@ def main():
     close_data = data['Close']
     data_returns = close_data.pct_change().dropna()
 
-    # Define Lorentzian distance function
-    def lorentzian_distance(x, y):
-        return np.log(1 + (x - y)**2)
-
-    # Compute Lorentzian distances between consecutive returns
+    # Compute Lorentzian distances between consecutive returns and flag anomalies
     if len(data_returns) < 2:
         st.warning("Not enough data to compute Lorentzian distances.")
-        lorentzian_distances = np.array([])
-    else:
-        lorentzian_distances = [lorentzian_distance(data_returns[i], data_returns[i + 1]) for i in range(len(data_returns) - 1)]
-        lorentzian_distances = np.array(lorentzian_distances)
-
-    # Define a threshold to identify anomalies
-    if len(lorentzian_distances) > 0:
-        threshold = lorentzian_distances.mean() + 2 * lorentzian_distances.std()
-        anomalies = lorentzian_distances > threshold
-        anomaly_indices = np.where(anomalies)[0]
-        anomaly_dates = data_returns.index[anomaly_indices]
-    else:
-        threshold = None
-        anomaly_dates = []
+    lorentzian_distances = np.log1p(np.diff(np.asarray(data_returns, dtype=float).ravel()) ** 2)
+
+    # Fold new returns from the stored history into the persistent threshold state
+    history_returns = get_bars(stock_symbol, interval, base="1m")['Close'].pct_change().dropna()
+    threshold = anomaly_store.update(stock_symbol, interval, history_returns)
+    anomaly_dates = anomaly_store.anomaly_dates(stock_symbol, interval, data_returns.index)
 
     # Prepare the data for candlestick chart
     data['Anomalies'] = np.where(data.index.isin(anomaly_dates), data['Close'], np.nan)
@@ -192,78 +220,86 @@ def main():
         st.error("Failed to calculate support and resistance levels.")
         return
 
-    # Create candlestick chart
-    fig = go.Figure()
-
-    # Add candlestick trace
-    fig.add_trace(go.Candlestick(
-        x=data.index,
-        open=data['Open'],
-        high=data['High'],
-        low=data['Low'],
-        close=data['Close'],
-        name='Candlestick'
-    ))
-
-    # Add support and resistance lines
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=[latest_support] * len(data),
-        mode='lines',
-        name='Support',
-        line=dict(color='green', width=2, dash='dash')
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=[latest_resistance] * len(data),
-        mode='lines',
-        name='Resistance',
-        line=dict(color='blue', width=2, dash='dash')
-    ))
-
-    # Add anomalies as scatter points
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=data['Anomalies'],
-        mode='markers',
-        name='Anomalies',
-        marker=dict(color='yellow', size=10, symbol='x')
-    ))
-
-    # Add bullish engulfing patterns
-    fig.add_trace(go.Scatter(
-        x=data[data['Bullish Engulfing']].index,
-        y=data[data['Bullish Engulfing']]['Low'] - (data['High'] - data['Low']).mean() * 0.1,
-        mode='markers',
-        name='Bullish Engulfing',
-        marker=dict(color='green', size=10, symbol='triangle-up')
-    ))
-
-    # Add bearish engulfing patterns
-    fig.add_trace(go.Scatter(
-        x=data[data['Bearish Engulfing']].index,
-        y=data[data['Bearish Engulfing']]['High'] + (data['High'] - data['Low']).mean() * 0.1,
-        mode='markers',
-        name='Bearish Engulfing',
-        marker=dict(color='red', size=10, symbol='triangle-down')
-    ))
-
-    # Format date range
-    start_date = data.index.min().strftime('%Y-%m-%d')
-    end_date = data.index.max().strftime('%Y-%m-%d')
-
-    # Update layout
-    fig.update_layout(
-        title=f'{stock_symbol} Stock Price from {start_date} to {end_date} with Anomalies, Support, and Resistance ({interval})',
-        xaxis_title='Date',
-        yaxis_title='Stock Price',
-        xaxis_rangeslider_visible=False,  # Hide range slider
-        xaxis_tickformat='%H:%M',  # Format x-axis to show hours and minutes
-    )
+    # Chart JSON is cached per symbol, data version and settings
+    version = data_version(data) + (len(anomaly_dates),)
+
+    def build_chart():
+        # Create candlestick chart
+        fig = go.Figure()
+
+        # Add candlestick trace
+        fig.add_trace(go.Candlestick(
+            x=data.index,
+            open=data['Open'],
+            high=data['High'],
+            low=data['Low'],
+            close=data['Close'],
+            name='Candlestick'
+        ))
+
+        # Add support and resistance lines
+        fig.add_trace(go.Scatter(
+            x=data.index,
+            y=[latest_support] * len(data),
+            mode='lines',
+            name='Support',
+            line=dict(color='green', width=2, dash='dash')
+        ))
+
+        fig.add_trace(go.Scatter(
+            x=data.index,
+            y=[latest_resistance] * len(data),
+            mode='lines',
+            name='Resistance',
+            line=dict(color='blue', width=2, dash='dash')
+        ))
+
+        # Add anomalies as scatter points
+        fig.add_trace(go.Scatter(
+            x=data.index,
+            y=data['Anomalies'],
+            mode='markers',
+            name='Anomalies',
+            marker=dict(color='yellow', size=10, symbol='x')
+        ))
+
+        # Add bullish engulfing patterns
+        fig.add_trace(go.Scatter(
+            x=data[data['Bullish Engulfing']].index,
+            y=data[data['Bullish Engulfing']]['Low'] - (data['High'] - data['Low']).mean() * 0.1,
+            mode='markers',
+            name='Bullish Engulfing',
+            marker=dict(color='green', size=10, symbol='triangle-up')
+        ))
+
+        # Add bearish engulfing patterns
+        fig.add_trace(go.Scatter(
+            x=data[data['Bearish Engulfing']].index,
+            y=data[data['Bearish Engulfing']]['High'] + (data['High'] - data['Low']).mean() * 0.1,
+            mode='markers',
+            name='Bearish Engulfing',
+            marker=dict(color='red', size=10, symbol='triangle-down')
+        ))
+
+        # Format date range
+        start_date = data.index.min().strftime('%Y-%m-%d')
+        end_date = data.index.max().strftime('%Y-%m-%d')
+
+        # Update layout
+        fig.update_layout(
+            title=f'{stock_symbol} Stock Price from {start_date} to {end_date} with Anomalies, Support, and Resistance ({interval})',
+            xaxis_title='Date',
+            yaxis_title='Stock Price',
+            xaxis_rangeslider_visible=False,  # Hide range slider
+            xaxis_tickformat='%H:%M',  # Format x-axis to show hours and minutes
+        )
+        return fig.to_json()
 
     # Display the chart
-    st.plotly_chart(fig)
+    render(FIGURES.figure((stock_symbol, interval, version), build_chart), height=500)
+
+    # Volume analytics section
+    show_volume_analytics(stock_symbol, yf_period)
 
     # News section
     st.header(f"Recent {stock_symbol} News")
@@ -277,9 +313,26 @@ def main():
         for item in news_items:
             st.subheader(item['title'])
             st.write(f"Published: {item['publishedAt']}")
+            st.write(f"Sentiment: {item['sentiment']:+.2f}")
             st.write(f"[Read more]({item['url']})")
             st.write("---")
 
+    # Headlines published around each detected anomaly
+    if len(anomaly_dates) > 0 and news_items:
+        st.header("Headlines Near Anomalies")
+        event_index = EventIndex(news_items, data)
+        nearby = event_index.headlines_near(anomaly_dates, before=30 * 60, after=30 * 60)
+        found = False
+        for anomaly_date, headlines in zip(anomaly_dates, nearby):
+            if not headlines:
+                continue
+            found = True
+            st.subheader(anomaly_date.strftime('%Y-%m-%d %H:%M'))
+            for item in headlines:
+                st.write(f"[{item['title']}]({item['url']}) (return after headline: {item['post_return']:.2%})")
+        if not found:
+            st.write("No headlines were published near the detected anomalies.")
+
     # Add engulfing patterns analysis
     st.header("Engulfing Patterns Analysis")
     bullish_engulfing_count = data['Bullish Engulfing'].sum()
@@ -305,13 +358,23 @@ def main():
         
         recent_distance = lorentzian_distance(data_returns[-2], data_returns[-1])
         if threshold and recent_distance > threshold:
-            st.warning("Anomaly detected. Predicted return may be highly volatile.")
+            st.warning("Anomaly detected. Predicted return is based on the average return after past anomalies and may be highly volatile.")
         else:
             st.info("No anomaly detected. Predicted return is based on historical average.")
-        return data_returns.mean()
+
+        # Every model and horizon for this symbol, from one vectorized pass
+        forecasts = forecast_table(data_returns.to_frame(stock_symbol))
+        st.dataframe(forecasts.loc[stock_symbol].unstack('horizon'))
+        return forecasts.loc[stock_symbol, ('regime', 1)]
 
     predicted_return = predict_next_return(data_returns, lorentzian_distances)
     st.write(f"Predicted next interval's return: {predicted_return:.4f}")
 
+    # Forecasts for the whole universe at the selected interval
+    if st.checkbox("Show universe forecast"):
+        universe_bars = {symbol: get_bars(symbol, interval, period=yf_period, base="1m") for symbol in stock_symbols}
+        universe_forecast = forecast_table(returns_matrix(universe_bars))
+        st.dataframe(universe_forecast.xs(1, level='horizon', axis=1))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,92 @@
+"""News-to-price event alignment.
+
+Publish timestamps are parsed once into epoch seconds and each headline is
+aligned to the last bar at or before it with a sorted-array search. Pre- and
+post-event returns are precomputed, and headlines near any timestamp (e.g. a
+detected anomaly) are found with two binary searches instead of rescanning
+the feed.
+"""
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+import pandas as pd
+
+_parsed = {}
+
+
+def parse_published(value):
+    """Epoch seconds (UTC) of an RSS/Atom date string; parsed once per distinct string"""
+    epoch = _parsed.get(value)
+    if epoch is None:
+        try:
+            timestamp = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            # Atom feeds use ISO 8601 rather than RFC 822 dates
+            timestamp = pd.to_datetime(value, utc=True, errors='coerce') if value else None
+        if timestamp is None or pd.isna(timestamp):
+            epoch = -1
+        else:
+            timestamp = pd.Timestamp(timestamp)
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.tz_localize('UTC')
+            epoch = int(timestamp.timestamp())
+        _parsed[value] = epoch
+    return epoch
+
+
+def to_epoch(index):
+    """Epoch seconds of a DatetimeIndex; naive timestamps are taken as UTC"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    return index.as_unit('ns').asi8 // 10**9
+
+
+class EventIndex:
+    """Headlines aligned to an OHLCV series"""
+
+    def __init__(self, items, bars, horizon=1):
+        epochs = np.fromiter((parse_published(item['publishedAt']) for item in items),
+                             dtype=np.int64, count=len(items))
+        valid = np.flatnonzero(epochs >= 0)
+        order = valid[np.argsort(epochs[valid], kind='stable')]
+        self.items = [items[i] for i in order]
+        self.event_times = epochs[order]
+
+        self.bar_times = to_epoch(bars.index)
+        close = bars['Close'].to_numpy(dtype=float).ravel()
+
+        # Last bar at or before each headline (-1 when the headline predates the series)
+        self.bar_positions = np.searchsorted(self.bar_times, self.event_times, side='right') - 1
+
+        # Returns over `horizon` bars before and after the event bar
+        n = len(close)
+        pos = self.bar_positions
+        pre_pos, post_pos = pos - horizon, pos + horizon
+        self.pre_returns = np.full(len(pos), np.nan)
+        self.post_returns = np.full(len(pos), np.nan)
+        has_pre = (pos >= 0) & (pre_pos >= 0)
+        has_post = (pos >= 0) & (post_pos < n)
+        self.pre_returns[has_pre] = close[pos[has_pre]] / close[pre_pos[has_pre]] - 1
+        self.post_returns[has_post] = close[post_pos[has_post]] / close[pos[has_post]] - 1
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'title': [item['title'] for item in self.items],
+            'published': pd.to_datetime(self.event_times, unit='s', utc=True),
+            'bar': [pd.to_datetime(self.bar_times[p], unit='s', utc=True) if p >= 0 else pd.NaT
+                    for p in self.bar_positions],
+            'pre_return': self.pre_returns,
+            'post_return': self.post_returns,
+        })
+
+    def headlines_near(self, timestamps, before, after):
+        """For each timestamp, the aligned headlines published within [t - before, t + after] seconds"""
+        times = to_epoch(timestamps)
+        lo = np.searchsorted(self.event_times, times - before, side='left')
+        hi = np.searchsorted(self.event_times, times + after, side='right')
+        return [
+            [dict(self.items[i], pre_return=self.pre_returns[i], post_return=self.post_returns[i])
+             for i in range(start, stop)]
+            for start, stop in zip(lo, hi)
+        ]
@@ -0,0 +1,149 @@
+"""Shared on-disk store for reference series (benchmarks and yields).
+
+Each series is kept as a Parquet file under DATA_DIR/factors and topped up
+incrementally by date. Lookups are served from process memory and only go
+upstream once the in-memory copy is older than REFRESH_INTERVAL. Each
+series has its own lock, so a slow download of one series never blocks
+readers of another.
+"""
+import threading
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+import scheduler
+from config import data_path, load_fred
+
+# Known reference series and where they come from
+BENCHMARKS = {
+    '^GSPC': 'yahoo',   # S&P 500
+    '^NDX': 'yahoo',    # Nasdaq 100
+    '^DJI': 'yahoo',    # Dow Jones Industrial Average
+    '^RUT': 'yahoo',    # Russell 2000
+    'DGS3MO': 'fred',   # 3-month Treasury yield
+    'DGS2': 'fred',     # 2-year Treasury yield
+    'DGS10': 'fred',    # 10-year Treasury yield
+}
+
+# How long an in-memory series is trusted before checking for new dates
+REFRESH_INTERVAL = 60 * 60
+
+_series = {}
+_checked_at = {}
+_derived = {}
+_locks = {}
+_lock = threading.Lock()
+
+
+def _factor_file(name):
+    safe_name = name.replace('^', '_').replace('=', '_').replace('/', '_')
+    return data_path('factors', f"{safe_name}.parquet")
+
+
+def _read_disk(name):
+    try:
+        return pd.read_parquet(_factor_file(name))['value']
+    except (FileNotFoundError, OSError):
+        return pd.Series(dtype=float, name='value')
+
+
+def _series_lock(name):
+    """Per-series lock so unrelated series are fetched concurrently"""
+    with _lock:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _fetch(name, start, fred):
+    """Download observations of a series from `start` (None for full history)"""
+    source = BENCHMARKS.get(name, 'yahoo')
+    if source == 'fred':
+        fred = fred or load_fred()
+        if fred is None:
+            return pd.Series(dtype=float)
+        series = fred.get_series(name, observation_start=start)
+    else:
+        if start is None:
+            history = scheduler.download(name, period='max')
+        else:
+            # Overlap the last stored day so weekends and holidays do not end in an empty reply (NoDataError)
+            history = scheduler.download(name, start=(start - timedelta(days=1)).strftime('%Y-%m-%d'))
+        series = history['Close'] if not history.empty else pd.Series(dtype=float)
+        if isinstance(series, pd.DataFrame):
+            series = series.iloc[:, 0]
+    series = series.dropna().astype(float)
+    series.index = pd.DatetimeIndex(series.index).tz_localize(None).normalize()
+    return series
+
+
+def get_series(name, fred=None):
+    """Return the full stored series for `name`, fetching only dates newer than what is on disk"""
+    with _series_lock(name):
+        now = time.time()
+        if name in _series and now - _checked_at.get(name, 0) < REFRESH_INTERVAL:
+            return _series[name]
+
+        stored = _series.get(name)
+        if stored is None:
+            stored = _read_disk(name)
+
+        start = None if stored.empty else stored.index[-1] + timedelta(days=1)
+        try:
+            new = _fetch(name, start, fred)
+        except Exception:
+            # Serve the stored copy if the upstream source is unavailable
+            new = pd.Series(dtype=float)
+
+        new = new[new.index > stored.index[-1]] if not stored.empty else new
+        if not new.empty:
+            stored = pd.concat([stored, new]).rename('value')
+            stored = stored[~stored.index.duplicated(keep='last')]
+            stored.to_frame().to_parquet(_factor_file(name))
+
+        _series[name] = stored
+        _checked_at[name] = now
+        return stored
+
+
+# Function to memoize values derived from a series until the series gains new dates
+def _derive(key, series, compute):
+    last = series.index[-1] if not series.empty else None
+    cached = _derived.get(key)
+    if cached is not None and cached[0] == last:
+        return cached[1]
+    value = compute(series)
+    _derived[key] = (last, value)
+    return value
+
+
+def latest_yield(name='DGS10', fred=None):
+    """Latest value of a FRED yield series as a decimal, or None if unavailable"""
+    series = get_series(name, fred)
+    if series.empty:
+        return None
+    return series.iloc[-1] / 100  # Convert percentage to decimal
+
+
+def risk_free_rate(fred=None):
+    """Current risk-free rate (10-year Treasury yield)"""
+    return latest_yield('DGS10', fred)
+
+
+def market_return(symbol='^GSPC', years=10):
+    """Average annual return of a benchmark over the last `years` years"""
+    series = get_series(symbol)
+    if series.empty:
+        return None
+
+    def compute(s):
+        window = s[s.index > s.index[-1] - pd.DateOffset(years=years)]
+        annual_data = window.resample('YE').last()
+        return annual_data.pct_change().dropna().mean()
+
+    return _derive(('market_return', symbol, years), series, compute)
+
+
+def refresh_all(fred=None):
+    """Bring every known benchmark up to date"""
+    for name in BENCHMARKS:
+        get_series(name, fred)
@@ -0,0 +1,113 @@
+"""Server-side cache of serialized Plotly figures.
+
+Figures are cached as JSON strings keyed by (symbol, data version, widget
+state). Individual traces are cached as JSON too, keyed by the data they
+plot and the axes they sit on, so toggling one indicator only serializes
+that indicator's traces; the rest of the figure is stitched together from
+cached strings. Cached JSON is rendered with plotly.js directly, skipping
+the Figure rebuild and re-validation a st.plotly_chart call would do.
+plotly.js itself is loaded with a <script src> (config.PLOTLY_JS_URL, by
+default the CDN build of the version the plotly package ships), so the
+browser fetches it once and caches it for every chart and rerun.
+"""
+import html
+import threading
+from collections import OrderedDict
+
+from plotly.io.json import to_json_plotly
+from plotly.offline import get_plotlyjs_version
+
+import config
+
+
+class FigureCache:
+    def __init__(self, max_figures=256, max_traces=4096):
+        self.max_figures = max_figures
+        self.max_traces = max_traces
+        self._figures = OrderedDict()
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, store, key, limit, make):
+        with self._lock:
+            if key in store:
+                store.move_to_end(key)
+                return store[key]
+        value = make()
+        with self._lock:
+            store[key] = value
+            while len(store) > limit:
+                store.popitem(last=False)
+        return value
+
+    def trace(self, key, make, xaxis='x', yaxis='y'):
+        """JSON of one trace placed on (xaxis, yaxis); `make` returns a plotly trace object"""
+        return self._get(self._traces, (key, xaxis, yaxis), self.max_traces,
+                         lambda: to_json_plotly(make().update(xaxis=xaxis, yaxis=yaxis).to_plotly_json()))
+
+    def figure(self, key, build):
+        """Figure JSON for `key`; `build` returns the JSON string on a miss"""
+        return self._get(self._figures, key, self.max_figures, build)
+
+
+# Shared by every session in the process
+FIGURES = FigureCache()
+
+
+def data_version(data):
+    """Cache-key identity of a bar frame: row count, last timestamp and the last bar's OHLCV values.
+
+    Yahoo revises the forming bar in place, so the length and last timestamp alone would keep
+    serving a stale last candle.
+    """
+    if data.empty:
+        return (0, None, None)
+    columns = [column for column in ('Open', 'High', 'Low', 'Close', 'Volume') if column in data]
+    return len(data), str(data.index[-1]), data[columns].iloc[-1].to_numpy(dtype=float).tobytes()
+
+
+def axis_ids(fig, row, col=1, secondary_y=False):
+    """Plotly trace axis ids ('x2', 'y3', ...) of a make_subplots cell"""
+    subplot = fig.get_subplot(row, col, secondary_y=secondary_y)
+    return subplot.xaxis.plotly_name.replace('axis', ''), subplot.yaxis.plotly_name.replace('axis', '')
+
+
+def compose(trace_jsons, layout):
+    """Stitch cached trace JSON strings and a layout into one figure JSON string"""
+    layout_json = to_json_plotly(layout.to_plotly_json() if hasattr(layout, 'to_plotly_json') else layout)
+    return '{"data":[' + ','.join(trace_jsons) + '],"layout":' + layout_json + '}'
+
+
+def plotly_js_url():
+    """URL of plotly.js: the configured copy, or the CDN build matching the installed plotly"""
+    return config.PLOTLY_JS_URL or f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+
+def _script_safe(text):
+    """JSON text that cannot close the surrounding <script> tag"""
+    return text.replace("</", "<\\/")
+
+
+def render(figure_json, height=600, shared_x=None):
+    """Draw figure JSON in the page with plotly.js.
+
+    `shared_x` is sent once and used as the x-array of every trace that has none.
+    """
+    import streamlit.components.v1 as components
+
+    share = ""
+    if shared_x is not None:
+        share = (f"const x = {_script_safe(to_json_plotly(shared_x))}; "
+                 "figure.data.forEach(t => { if (t.x === undefined) t.x = x; });")
+    components.html(
+        f"""
+        <div id="chart" style="width:100%;height:{height}px;"></div>
+        <script src="{html.escape(plotly_js_url())}"></script>
+        <script>
+        const figure = {_script_safe(figure_json)};
+        {share}
+        Plotly.newPlot('chart', figure.data, figure.layout, {{responsive: true}});
+        </script>
+        """,
+        height=height + 20,
+    )
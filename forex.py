@@ -1,22 +1,37 @@
 import streamlit as st
-import yfinance as yf
 import plotly.graph_objects as go
+from fx import CURRENCIES, cross_matrix, cross_rate, usd_rates
 
 def app():
     st.title("Forex Exchange Chart")
 
-    # Input for selecting forex pair (e.g., EUR/USD)
-    pair = st.text_input("Enter forex pair", "EURUSD=X")
+    # Select the pair; every cross is derived from USD-based rates
+    col1, col2 = st.columns(2)
+    base = col1.selectbox("Base currency", CURRENCIES, index=CURRENCIES.index("EUR"))
+    quote = col2.selectbox("Quote currency", CURRENCIES, index=CURRENCIES.index("USD"))
+    period = st.selectbox("Period", ["6mo", "1y", "2y", "5y"], index=2)
 
-    # Download forex data
-    data = yf.download(pair, start="2022-01-01", end="2024-01-01")
+    if base == quote:
+        st.warning("Choose two different currencies.")
+        return
 
-    # Plot the forex chart
-    fig = go.Figure(data=[go.Candlestick(x=data.index,
-                                         open=data['Open'],
-                                         high=data['High'],
-                                         low=data['Low'],
-                                         close=data['Close'])])
+    # Derive the cross from the USD rates (no per-pair download)
+    try:
+        rates = cross_rate(base, quote, period=period)
+    except ValueError as e:
+        st.error(str(e))
+        return
 
-    fig.update_layout(title=f"{pair} Exchange Rate", xaxis_title="Date", yaxis_title="Price")
+    # Plot the forex chart
+    fig = go.Figure(data=[go.Scatter(x=rates.index, y=rates, mode='lines', name=f"{base}/{quote}")])
+    fig.update_layout(title=f"{base}/{quote} Exchange Rate", xaxis_title="Date", yaxis_title="Price")
     st.plotly_chart(fig)
+
+    # Full cross-rate grid at a chosen date
+    st.subheader("Cross Rates")
+    all_rates = usd_rates(tuple(CURRENCIES), period)
+    as_of = st.date_input("As of", all_rates.index[-1].date(),
+                          min_value=all_rates.index[0].date(), max_value=all_rates.index[-1].date())
+    grid = cross_matrix(all_rates, at=all_rates.index[all_rates.index.date <= as_of][-1])
+    st.caption("Rows are the base currency, columns the quote currency.")
+    st.dataframe(grid.style.format("{:.4f}"))
@@ -0,0 +1,74 @@
+"""FX cross rates derived from one USD-based rate per currency.
+
+Only the USD{CCY}=X series (units of CCY per US dollar) are downloaded, one
+per currency, through the shared bar store. Any cross is the ratio of two
+of them: BASE/QUOTE = (QUOTE per USD) / (BASE per USD), so a full N x N
+cross grid needs N - 1 downloads instead of N·(N - 1). Cross matrices are
+computed as one vectorized outer ratio and cached per timestamp.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bars import get_bars
+from cache import cached
+
+CURRENCIES = ["USD", "EUR", "JPY", "GBP", "CHF", "AUD", "CAD", "NZD", "CNY", "HKD",
+              "SGD", "SEK", "NOK", "DKK", "MXN", "ZAR", "INR", "KRW", "BRL", "TRY"]
+
+# Seconds before the USD rates are re-read from the bar store
+REFRESH_SECONDS = 15 * 60
+
+_matrices = OrderedDict()
+_matrices_lock = threading.Lock()
+MAX_CACHED_MATRICES = 1024
+
+
+def usd_symbol(currency):
+    """Yahoo symbol quoting `currency` per US dollar"""
+    return f"USD{currency}=X"
+
+
+@cached(ttl=REFRESH_SECONDS)
+def usd_rates(currencies=tuple(CURRENCIES), period="2y", field="Close"):
+    """Units of each currency per US dollar (time x currency), aligned and forward-filled"""
+    others = [c for c in currencies if c != "USD"]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        bars = list(executor.map(lambda c: get_bars(usd_symbol(c), "1d", period=period, base="1d"), others))
+
+    series = {c: data[field].squeeze() for c, data in zip(others, bars) if not data.empty}
+    rates = pd.DataFrame(series).sort_index().ffill()
+    if "USD" in currencies:
+        rates["USD"] = 1.0
+    return rates[[c for c in currencies if c in rates.columns]]
+
+
+def cross_rate(base, quote, period="2y", field="Close"):
+    """Time series of BASE/QUOTE (units of quote per unit of base)"""
+    rates = usd_rates((base, quote), period, field)
+    if base not in rates or quote not in rates:
+        raise ValueError(f"No USD rate available for {base if base not in rates else quote}")
+    return (rates[quote] / rates[base]).rename(f"{base}{quote}")
+
+
+def cross_matrix(rates, at=None):
+    """N x N grid of BASE (rows) / QUOTE (columns) rates at timestamp `at` (default: the latest)"""
+    at = rates.index[-1] if at is None else rates.index[rates.index.get_indexer([at], method='pad')[0]]
+    key = (tuple(rates.columns), at)
+    with _matrices_lock:
+        if key in _matrices:
+            _matrices.move_to_end(key)
+            return _matrices[key]
+
+    vector = rates.loc[at].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        grid = pd.DataFrame(vector[np.newaxis, :] / vector[:, np.newaxis],
+                            index=rates.columns, columns=rates.columns)
+    with _matrices_lock:
+        _matrices[key] = grid
+        while len(_matrices) > MAX_CACHED_MATRICES:
+            _matrices.popitem(last=False)
+    return grid
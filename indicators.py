@@ -0,0 +1,165 @@
+"""Technical indicator library computed in one pass over shared intermediates.
+
+compute_indicators() derives the previous close, close-to-close change,
+true range, directional moves and typical price once, and writes RSI
+(Wilder), ATR, Bollinger Bands, Stochastic %K/%D, ADX/+DI/-DI, OBV and
+session VWAP into one preallocated output matrix. Wilder smoothing is the
+recursive filter y[t] = y[t-1] + (x[t] - y[t-1]) / n, seeded with the
+simple mean of the first n values, and runs in C through
+scipy.signal.lfilter. Indicators are meant to be computed on the full
+history and sliced afterwards, so visible bars are already warmed up.
+
+The single-indicator functions accept a Series or a (time x symbol)
+DataFrame and return the same shape.
+"""
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+COLUMNS = ['RSI', 'ATR', 'BB Upper', 'BB Middle', 'BB Lower', '%K', '%D', 'ADX', '+DI', '-DI', 'OBV', 'VWAP']
+
+
+def _wilder_1d(values, window):
+    out = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) < window:
+        return out
+    first = valid[0]
+    seed_end = first + window
+    seed = np.nanmean(values[first:seed_end])
+    out[seed_end - 1] = seed
+    rest = np.nan_to_num(values[seed_end:])
+    if len(rest):
+        alpha = 1.0 / window
+        out[seed_end:], _ = lfilter([alpha], [1.0, alpha - 1.0], rest, zi=[(1.0 - alpha) * seed])
+    return out
+
+
+def wilder(values, window):
+    """Wilder's smoothing along axis 0 of a 1-D or (time x symbol) array"""
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        return _wilder_1d(values, window)
+    return np.column_stack([_wilder_1d(values[:, j], window) for j in range(values.shape[1])])
+
+
+def _rolling(values, window, how):
+    return getattr(pd.DataFrame(values).rolling(window), how)().to_numpy().reshape(values.shape)
+
+
+def _wrap(like, values):
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(values, index=like.index, columns=like.columns)
+    return pd.Series(values, index=like.index)
+
+
+def _previous(values):
+    previous = np.empty_like(values)
+    previous[0] = np.nan
+    previous[1:] = values[:-1]
+    return previous
+
+
+def rsi_values(close, window=14):
+    delta = close - _previous(close)
+    avg_gain = wilder(np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0)), window)
+    avg_loss = wilder(np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0)), window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+
+
+def rsi(close, window=14):
+    """Wilder's RSI of a close Series or DataFrame"""
+    return _wrap(close, rsi_values(np.asarray(close, dtype=float), window))
+
+
+def session_vwap_values(typical, volume, index):
+    """(VWAP, volume-weighted standard deviation) arrays, reset at the start of each calendar session"""
+    n = len(typical)
+    sessions = np.asarray(index.normalize() if isinstance(index, pd.DatetimeIndex) else np.zeros(n))
+    starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]])
+    session_of = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+
+    def session_cumsum(values):
+        total = np.cumsum(np.nan_to_num(values))
+        return total - np.r_[0.0, total][starts][session_of]
+
+    v = session_cumsum(volume)
+    pv = session_cumsum(typical * volume)
+    p2v = session_cumsum(typical ** 2 * volume)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = np.where(v > 0, pv / v, typical)
+        std = np.sqrt(np.maximum(np.where(v > 0, p2v / v - vwap ** 2, 0.0), 0.0))
+    return vwap, std
+
+
+def compute_indicators(data, rsi_window=14, atr_window=14, bb_window=20, bb_std=2.0,
+                       stoch_window=14, stoch_smooth=3, adx_window=14):
+    """DataFrame of every indicator in COLUMNS for one symbol's OHLCV bars"""
+    n = len(data)
+    out = np.full((n, len(COLUMNS)), np.nan)
+    col = {name: i for i, name in enumerate(COLUMNS)}
+    if n == 0:
+        return pd.DataFrame(out, index=data.index, columns=COLUMNS)
+
+    high = data['High'].to_numpy(dtype=float).ravel()
+    low = data['Low'].to_numpy(dtype=float).ravel()
+    close = data['Close'].to_numpy(dtype=float).ravel()
+    volume = data['Volume'].to_numpy(dtype=float).ravel() if 'Volume' in data else np.zeros(n)
+
+    # Shared intermediates
+    prev_close = _previous(close)
+    delta = close - prev_close
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    up_move = high - _previous(high)
+    down_move = _previous(low) - low
+    typical = (high + low + close) / 3.0
+
+    # RSI (Wilder)
+    out[:, col['RSI']] = rsi_values(close, rsi_window)
+
+    # ATR and the directional movement system share the smoothed true range
+    atr = wilder(true_range, atr_window)
+    out[:, col['ATR']] = atr
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    plus_dm[0] = minus_dm[0] = np.nan
+    adx_atr = atr if adx_window == atr_window else wilder(true_range, adx_window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        plus_di = 100.0 * wilder(plus_dm, adx_window) / adx_atr
+        minus_di = 100.0 * wilder(minus_dm, adx_window) / adx_atr
+        dx = 100.0 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    out[:, col['+DI']] = plus_di
+    out[:, col['-DI']] = minus_di
+    out[:, col['ADX']] = wilder(dx, adx_window)
+
+    # Bollinger Bands (population standard deviation, as is conventional)
+    middle = _rolling(close, bb_window, 'mean')
+    spread = bb_std * np.sqrt(np.maximum(_rolling(close ** 2, bb_window, 'mean') - middle ** 2, 0.0))
+    out[:, col['BB Middle']] = middle
+    out[:, col['BB Upper']] = middle + spread
+    out[:, col['BB Lower']] = middle - spread
+
+    # Stochastic oscillator
+    lowest = _rolling(low, stoch_window, 'min')
+    highest = _rolling(high, stoch_window, 'max')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        k = 100.0 * (close - lowest) / (highest - lowest)
+    out[:, col['%K']] = k
+    out[:, col['%D']] = _rolling(k, stoch_smooth, 'mean')
+
+    # On-balance volume
+    out[:, col['OBV']] = np.cumsum(np.nan_to_num(np.sign(delta)) * np.nan_to_num(volume))
+
+    # VWAP, reset at the start of each calendar session
+    out[:, col['VWAP']], _ = session_vwap_values(typical, volume, data.index)
+
+    return pd.DataFrame(out, index=data.index, columns=COLUMNS)
+
+
+def add_indicators(data, **params):
+    """Join every indicator column onto `data`"""
+    indicators = compute_indicators(data, **params)
+    for column in COLUMNS:
+        data[column] = indicators[column]
+    return data
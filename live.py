@@ -0,0 +1,101 @@
+"""Fixed-size rolling windows of recent bars for live charts.
+
+Each (symbol, interval) has one ring buffer per process holding the last
+`capacity` completed bars as NumPy arrays. The first poll seeds the ring
+from the bar store; later polls download only the 1m bars from the ring's
+last completed bar onwards (start=), aggregate them to the ring's interval
+and write the bars newer than its last timestamp. Readers ask for the rows
+after the last timestamp they have drawn, so every session receives only
+the delta.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from bars import _download, get_bars, resample_bars
+from events import to_epoch
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Default number of bars kept per ring (one day of minute bars)
+CAPACITY = 1440
+
+
+class BarRing:
+    """Ring buffer of the last `capacity` bars, oldest overwritten first"""
+
+    def __init__(self, capacity=CAPACITY, columns=COLUMNS):
+        self.capacity = capacity
+        self.columns = list(columns)
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((capacity, len(self.columns)), np.nan)
+        self.start = 0
+        self.size = 0
+        self.lock = threading.Lock()
+
+    @property
+    def last_time(self):
+        return int(self.times[(self.start + self.size - 1) % self.capacity]) if self.size else None
+
+    def extend(self, epochs, values):
+        """Append the rows newer than the last stored bar; returns how many were added"""
+        with self.lock:
+            if self.size:
+                keep = epochs > self.last_time
+                epochs, values = epochs[keep], values[keep]
+            epochs, values = epochs[-self.capacity:], values[-self.capacity:]
+            n = len(epochs)
+            if n == 0:
+                return 0
+            slots = (self.start + self.size + np.arange(n)) % self.capacity
+            self.times[slots] = epochs
+            self.values[slots] = values
+            overflow = max(self.size + n - self.capacity, 0)
+            self.start = (self.start + overflow) % self.capacity
+            self.size = min(self.size + n, self.capacity)
+            return n
+
+    def since(self, epoch=None):
+        """Bars after `epoch` (all stored bars if None), oldest first, as a DataFrame"""
+        with self.lock:
+            order = (self.start + np.arange(self.size)) % self.capacity
+            times, values = self.times[order], self.values[order]
+        if epoch is not None:
+            first = np.searchsorted(times, epoch, side='right')
+            times, values = times[first:], values[first:]
+        return pd.DataFrame(values, index=pd.to_datetime(times, unit='s', utc=True), columns=self.columns)
+
+
+_rings = {}
+_rings_lock = threading.Lock()
+
+
+def get_ring(symbol, interval, capacity=CAPACITY):
+    with _rings_lock:
+        ring = _rings.get((symbol, interval))
+        if ring is None or ring.capacity != capacity:
+            ring = _rings[(symbol, interval)] = BarRing(capacity)
+        return ring
+
+
+def poll(symbol, interval="1m", capacity=CAPACITY):
+    """Fold newly completed bars into the ring; returns (ring, latest in-progress bar or None)"""
+    ring = get_ring(symbol, interval, capacity)
+    if ring.last_time is None:
+        data = get_bars(symbol, interval, period="1d" if interval == "1m" else "5d", base="1m")
+    else:
+        # Re-request from the last completed bar (skipped by extend) so the reply is never empty
+        try:
+            data = _download(symbol, "1m", start=ring.last_time)
+        except Exception:
+            return ring, None
+        if interval != "1m":
+            data = resample_bars(data, interval)
+    if data.empty:
+        return ring, None
+    # The last bar is still forming; only completed bars enter the ring
+    completed = data.iloc[:-1]
+    values = np.column_stack([completed[c].to_numpy(dtype=float).ravel() for c in COLUMNS])
+    ring.extend(to_epoch(completed.index), values)
+    return ring, data.iloc[-1]
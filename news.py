@@ -0,0 +1,119 @@
+"""Fast-path RSS/Atom headline parser.
+
+The pages only use each entry's title, link and publish date, so instead of
+building a full feedparser object graph this stream-parses the feed with
+ElementTree.iterparse, keeps just those fields and stops at the first entry
+whose GUID was already seen on the previous refresh (feeds list newest
+first). feedparser is only used as a fallback for feeds that are not
+well-formed XML.
+"""
+import threading
+import urllib.error
+import urllib.request
+from io import BytesIO
+from xml.etree import ElementTree as ET
+
+import feedparser
+
+# Most recent entries kept per feed
+MAX_ITEMS = 100
+
+_feeds = {}
+_lock = threading.Lock()
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _entry_from_element(element):
+    """Pull title/link/published/guid out of an RSS <item> or Atom <entry>"""
+    fields = {}
+    for child in element:
+        name = _local_name(child.tag)
+        if name == 'link':
+            # Atom puts the URL in href, RSS in the element text
+            fields.setdefault('link', child.get('href') or (child.text or '').strip())
+        elif name in ('title', 'pubDate', 'published', 'updated', 'guid', 'id'):
+            fields.setdefault(name, (child.text or '').strip())
+    link = fields.get('link', '')
+    return {
+        'title': fields.get('title', ''),
+        'url': link,
+        'publishedAt': fields.get('pubDate') or fields.get('published') or fields.get('updated', ''),
+        'guid': fields.get('guid') or fields.get('id') or link,
+    }
+
+
+def parse_feed(data, seen_guids=()):
+    """Parse feed bytes newest-first, stopping at the first already-seen GUID.
+
+    Returns (new entries, stopped_early).
+    """
+    entries = []
+    for _, element in ET.iterparse(BytesIO(data), events=('end',)):
+        if _local_name(element.tag) not in ('item', 'entry'):
+            continue
+        entry = _entry_from_element(element)
+        element.clear()
+        if entry['guid'] in seen_guids:
+            return entries, True
+        entries.append(entry)
+    return entries, False
+
+
+def parse_feed_fallback(data):
+    """Lenient parse of malformed feeds through feedparser"""
+    feed = feedparser.parse(data)
+    return [{
+        'title': entry.get('title', ''),
+        'url': entry.get('link', ''),
+        'publishedAt': entry.get('published', entry.get('updated', '')),
+        'guid': entry.get('id', entry.get('link', '')),
+    } for entry in feed.entries]
+
+
+def _download(url, etag=None, modified=None, timeout=10):
+    """Fetch feed bytes; returns (data, etag, modified), data is None when not modified"""
+    request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    if etag:
+        request.add_header('If-None-Match', etag)
+    if modified:
+        request.add_header('If-Modified-Since', modified)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read(), response.headers.get('ETag'), response.headers.get('Last-Modified')
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, etag, modified
+        raise
+
+
+def fetch_news(url):
+    """Return the feed's entries (newest first), parsing only entries added since the last call"""
+    with _lock:
+        state = _feeds.get(url, {'entries': [], 'guids': set(), 'etag': None, 'modified': None})
+
+    data, etag, modified = _download(url, state['etag'], state['modified'])
+    if data is None:
+        return list(state['entries'])
+
+    try:
+        new_entries, stopped = parse_feed(data, state['guids'])
+        entries = new_entries + state['entries'] if stopped else new_entries
+    except ET.ParseError:
+        entries = parse_feed_fallback(data)
+
+    entries = entries[:MAX_ITEMS]
+    with _lock:
+        _feeds[url] = {
+            'entries': entries,
+            'guids': {entry['guid'] for entry in entries},
+            'etag': etag,
+            'modified': modified,
+        }
+    return list(entries)
+
+
+def yahoo_headlines_url(ticker):
+    return f"https://finance.yahoo.com/rss/headline?s={ticker}"
@@ -0,0 +1,270 @@
+"""Option-chain snapshot with implied volatility and Greeks.
+
+The full chain of a ticker (every expiry, calls and puts) is downloaded once
+and cached for CHAIN_TTL seconds. Pricing is Black-Scholes with a
+continuous dividend yield, evaluated on whole arrays: implied volatility is
+solved for every contract at once by Newton's method on vega, with a
+per-contract [low, high] bracket that falls back to bisection whenever a
+Newton step would leave it, so deep in- or out-of-the-money contracts with
+tiny vega still converge. The implied vols of a snapshot are kept, so when
+spot moves the chain is repriced and its Greeks recomputed at fixed vol
+(sticky strike) in one vectorized pass without solving again.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+import yfinance as yf
+from scipy.special import ndtr
+
+from analytics import fetch_risk_free_rate
+from cache import cached
+from figures import FIGURES, render
+
+# Seconds a chain snapshot is reused before it is downloaded again
+CHAIN_TTL = 5 * 60
+
+# Implied volatility search range, tolerance on price and iteration cap
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+PRICE_TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+
+# Expiries are taken to settle at 16:00 New York time
+EXPIRY_TIME = pd.Timedelta(hours=16)
+DAYS_PER_YEAR = 365.0
+MIN_YEARS = 1.0 / (DAYS_PER_YEAR * 24)
+
+GREEKS = ['price', 'delta', 'gamma', 'vega', 'theta', 'rho']
+
+_implied = OrderedDict()
+_implied_lock = threading.Lock()
+MAX_CACHED_CHAINS = 64
+
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+
+def _d1_d2(spot, strike, years, rate, vol, dividend):
+    sqrt_t = np.sqrt(years)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * vol * vol) * years) / (vol * sqrt_t)
+    return d1, d1 - vol * sqrt_t
+
+
+def black_scholes(spot, strike, years, rate, vol, is_call, dividend=0.0):
+    """Black-Scholes price of calls (is_call True) and puts; arguments broadcast"""
+    d1, d2 = _d1_d2(spot, strike, years, rate, vol, dividend)
+    sign = np.where(is_call, 1.0, -1.0)
+    return sign * (spot * np.exp(-dividend * years) * ndtr(sign * d1)
+                   - strike * np.exp(-rate * years) * ndtr(sign * d2))
+
+
+def greeks(spot, strike, years, rate, vol, is_call, dividend=0.0):
+    """Dict of price, delta, gamma, vega (per vol point), theta (per day) and rho (per rate point)"""
+    d1, d2 = _d1_d2(spot, strike, years, rate, vol, dividend)
+    sqrt_t = np.sqrt(years)
+    q_df = np.exp(-dividend * years)
+    r_df = np.exp(-rate * years)
+    pdf_d1 = _norm_pdf(d1)
+    sign = np.where(is_call, 1.0, -1.0)
+    n_d1 = ndtr(sign * d1)
+    n_d2 = ndtr(sign * d2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        price = sign * (spot * q_df * n_d1 - strike * r_df * n_d2)
+        gamma = q_df * pdf_d1 / (spot * vol * sqrt_t)
+        vega = spot * q_df * pdf_d1 * sqrt_t
+        theta = (-spot * q_df * pdf_d1 * vol / (2.0 * sqrt_t)
+                 + sign * (dividend * spot * q_df * n_d1 - rate * strike * r_df * n_d2))
+    return {
+        'price': price,
+        'delta': sign * q_df * n_d1,
+        'gamma': gamma,
+        'vega': vega / 100.0,
+        'theta': theta / DAYS_PER_YEAR,
+        'rho': sign * strike * years * r_df * n_d2 / 100.0,
+    }
+
+
+def implied_vol(price, spot, strike, years, rate, is_call, dividend=0.0, initial=None):
+    """Implied volatility of every contract at once; NaN where the price has no solution"""
+    price, strike, years, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(strike, dtype=float),
+        np.asarray(years, dtype=float), np.asarray(is_call, dtype=bool))
+    n = price.shape
+
+    # No-arbitrage bounds: above the discounted intrinsic value, below spot (calls) or strike (puts)
+    spot_df = spot * np.exp(-dividend * years)
+    strike_df = strike * np.exp(-rate * years)
+    intrinsic = np.where(is_call, np.maximum(spot_df - strike_df, 0.0), np.maximum(strike_df - spot_df, 0.0))
+    upper = np.where(is_call, spot_df, strike_df)
+    solvable = (price > intrinsic) & (price < upper) & (years > 0) & (strike > 0)
+
+    low = np.full(n, MIN_VOL)
+    high = np.full(n, MAX_VOL)
+    if initial is None:
+        # Brenner-Subrahmanyam approximation, good near the money
+        vol = np.sqrt(2.0 * np.pi / np.maximum(years, MIN_YEARS)) * price / spot
+    else:
+        vol = np.asarray(initial, dtype=float) * np.ones(n)
+    vol = np.clip(np.nan_to_num(vol, nan=0.3), MIN_VOL, MAX_VOL)
+
+    active = solvable.copy()
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        k, t, call, v, target = strike[idx], years[idx], is_call[idx], vol[idx], price[idx]
+        d1, _ = _d1_d2(spot, k, t, rate, v, dividend)
+        error = black_scholes(spot, k, t, rate, v, call, dividend) - target
+        vega = spot * np.exp(-dividend * t) * _norm_pdf(d1) * np.sqrt(t)
+
+        # Price increases with vol, so the sign of the error tightens the bracket
+        too_high = error > 0
+        high[idx] = np.where(too_high, v, high[idx])
+        low[idx] = np.where(too_high, low[idx], v)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            step = v - error / vega
+        inside = (step > low[idx]) & (step < high[idx]) & np.isfinite(step)
+        vol[idx] = np.where(inside, step, 0.5 * (low[idx] + high[idx]))
+
+        done = (np.abs(error) < PRICE_TOLERANCE) | (high[idx] - low[idx] < 1e-10)
+        vol[idx[done]] = v[done]
+        active[idx[done]] = False
+
+    return np.where(solvable, vol, np.nan)
+
+
+def time_to_expiry(expiries, now=None):
+    """Years from `now` to each expiry date's 16:00 New York settlement"""
+    now = pd.Timestamp.now(tz='America/New_York') if now is None else pd.Timestamp(now)
+    settle = (pd.DatetimeIndex(pd.to_datetime(expiries)).tz_localize('America/New_York') + EXPIRY_TIME)
+    seconds = (settle - now).total_seconds().to_numpy()
+    return np.maximum(seconds / (DAYS_PER_YEAR * 86400), MIN_YEARS)
+
+
+@cached(ttl=CHAIN_TTL)
+def load_chain(symbol):
+    """(spot, DataFrame of every listed contract) for `symbol`"""
+    ticker = yf.Ticker(symbol)
+    expiries = list(ticker.options)
+    history = ticker.history(period="5d")
+    spot = float(history['Close'].iloc[-1]) if not history.empty else np.nan
+
+    def fetch(expiry):
+        chain = ticker.option_chain(expiry)
+        calls = chain.calls.assign(type='call')
+        puts = chain.puts.assign(type='put')
+        return pd.concat([calls, puts], ignore_index=True).assign(expiry=expiry)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        frames = list(executor.map(fetch, expiries))
+    if not frames:
+        return spot, pd.DataFrame()
+
+    chain = pd.concat(frames, ignore_index=True)
+    bid = chain['bid'].fillna(0.0)
+    ask = chain['ask'].fillna(0.0)
+    # Mid price when the market is two-sided, otherwise the last trade
+    chain['mid'] = np.where((bid > 0) & (ask > 0), (bid + ask) / 2, chain['lastPrice'])
+    columns = ['contractSymbol', 'expiry', 'type', 'strike', 'bid', 'ask', 'lastPrice', 'mid',
+               'volume', 'openInterest']
+    return spot, chain[columns].sort_values(['expiry', 'type', 'strike'], ignore_index=True)
+
+
+def chain_implied_vols(key, chain, spot, rate, dividend=0.0, now=None):
+    """Implied vols of a chain snapshot, solved once per (key, spot, rate, dividend)"""
+    cache_key = (key, spot, rate, dividend)
+    with _implied_lock:
+        if cache_key in _implied:
+            _implied.move_to_end(cache_key)
+            return _implied[cache_key]
+
+    years = time_to_expiry(chain['expiry'], now)
+    vols = implied_vol(chain['mid'].to_numpy(dtype=float), spot, chain['strike'].to_numpy(dtype=float),
+                       years, rate, (chain['type'] == 'call').to_numpy(), dividend)
+    with _implied_lock:
+        _implied[cache_key] = vols
+        while len(_implied) > MAX_CACHED_CHAINS:
+            _implied.popitem(last=False)
+    return vols
+
+
+def reprice(chain, vols, spot, rate, dividend=0.0, now=None):
+    """Chain with its Greeks at `spot`, keeping each contract's implied vol fixed"""
+    years = time_to_expiry(chain['expiry'], now)
+    values = greeks(spot, chain['strike'].to_numpy(dtype=float), years, rate, vols,
+                    (chain['type'] == 'call').to_numpy(), dividend)
+    priced = chain.assign(iv=vols, years=years)
+    for name in GREEKS:
+        priced[name] = values[name]
+    return priced
+
+
+def build_smile(priced, expiries, option_type):
+    """Implied volatility by strike, one line per expiry"""
+    fig = go.Figure()
+    for expiry in expiries:
+        rows = priced[(priced['expiry'] == expiry) & (priced['type'] == option_type)]
+        fig.add_trace(go.Scatter(x=rows['strike'], y=rows['iv'] * 100, mode='lines+markers', name=expiry))
+    fig.update_layout(title=f"Implied Volatility Smile ({option_type}s)", xaxis_title="Strike",
+                      yaxis_title="Implied Volatility (%)")
+    return fig.to_json()
+
+
+def app():
+    st.title("Options Chain")
+
+    symbol = st.text_input("Ticker", "AAPL").upper()
+    try:
+        spot, chain = load_chain(symbol)
+    except Exception as e:
+        st.error(f"Error fetching the option chain for {symbol}: {e}")
+        return
+    if chain.empty or np.isnan(spot):
+        st.error(f"No listed options found for {symbol}.")
+        return
+
+    try:
+        default_rate = fetch_risk_free_rate()
+    except Exception:
+        default_rate = None
+    rate = st.number_input("Risk-free rate (%)", value=round((default_rate or 0.0) * 100, 3), step=0.05) / 100
+    dividend = st.number_input("Dividend yield (%)", value=0.0, step=0.1) / 100
+
+    # Implied vols are solved at the snapshot spot; moving spot only reprices
+    snapshot = (symbol, len(chain), float(chain['mid'].sum()))
+    vols = chain_implied_vols(snapshot, chain, spot, rate, dividend)
+    shift = st.slider("Spot move (%)", -20.0, 20.0, 0.0, 0.5)
+    moved_spot = spot * (1 + shift / 100)
+    priced = reprice(chain, vols, moved_spot, rate, dividend)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Spot", f"{spot:.2f}")
+    col2.metric("Repriced at", f"{moved_spot:.2f}", f"{shift:+.1f}%")
+    col3.metric("Contracts", f"{len(priced)}")
+
+    expiries = sorted(priced['expiry'].unique())
+    chosen = st.multiselect("Expiries", expiries, default=expiries[:3])
+    option_type = st.radio("Type", ["call", "put"], horizontal=True)
+    if not chosen:
+        st.info("Select at least one expiry.")
+        return
+
+    figure_key = ('options', snapshot, rate, dividend, tuple(chosen), option_type)
+    render(FIGURES.figure(figure_key, lambda: build_smile(priced, chosen, option_type)), height=500)
+
+    # Chain table for the selected expiries
+    rows = priced[priced['expiry'].isin(chosen) & (priced['type'] == option_type)]
+    table = rows[['contractSymbol', 'expiry', 'strike', 'bid', 'ask', 'mid', 'volume', 'openInterest', 'iv']
+                 + GREEKS].rename(columns={'price': 'model price'})
+    st.dataframe(table.style.format({'iv': '{:.2%}', 'strike': '{:.2f}', 'mid': '{:.2f}',
+                                     'model price': '{:.2f}', 'delta': '{:.3f}', 'gamma': '{:.4f}',
+                                     'vega': '{:.3f}', 'theta': '{:.3f}', 'rho': '{:.3f}'}))
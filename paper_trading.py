@@ -1,65 +1,64 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
-import os
+import numpy as np
 import datetime
+import uuid
+from cache import cached
+from scheduler import download
+import trade_log
+import accounts
+
+# Function to fetch a quote through the shared cache tier
+@cached(ttl=60)
+def fetch_quote(symbol):
+    """Latest price and basic info for a symbol, or None if Yahoo has no data"""
+    ticker = yf.Ticker(symbol)
+    df = download(symbol, period='1d')  # Batched and rate-limited with other sessions
+    if df.empty:
+        return None
+    current_price = df['Close'].iloc[-1]
+    info = {
+        'symbol': symbol,
+        'current_price': current_price,
+        'volume': df['Volume'].iloc[-1],
+        'open': df['Open'].iloc[-1],
+        'high': df['High'].iloc[-1],
+        'low': df['Low'].iloc[-1]
+    }
+    try:
+        info['name'] = ticker.info.get('longName', symbol)
+    except:
+        info['name'] = symbol
+    return info
 
 def app():
     # Title and Header
     st.title("📊 Real-Time Stock Lookup & Paper Trading")
 
-    # Portfolio CSV File
+    # Legacy single-account portfolio file, imported once into the default account
     PORTFOLIO_FILE = "portfolio.csv"
 
-    # Initialize Session State
-    if 'portfolio' not in st.session_state:
-        st.session_state.portfolio = pd.DataFrame(columns=["Symbol", "Shares", "Purchase Price"])
-    if 'balance' not in st.session_state:
-        st.session_state.balance = 100000  # Default balance if no file exists
-
-    # Load Portfolio and Balance from CSV
-    def load_portfolio_and_balance():
-        if os.path.exists(PORTFOLIO_FILE):
-            data = pd.read_csv(PORTFOLIO_FILE)
-            if "Balance" in data.columns:
-                balance = data["Balance"].iloc[0]
-                portfolio = data.drop(columns=["Balance"])
-                return portfolio, balance
-        return pd.DataFrame(columns=["Symbol", "Shares", "Purchase Price"]), 100000
-
-    # Save Portfolio and Balance to CSV
-    def save_portfolio_and_balance(portfolio, balance):
-        portfolio["Balance"] = [balance] + [None] * (len(portfolio) - 1)
-        portfolio.to_csv(PORTFOLIO_FILE, index=False)
+    # Each session trades on its own account (a fresh id unless one is entered); state lives in the
+    # account store, not the session. Enter "default" to reach the legacy shared portfolio.
+    if "account" not in st.session_state:
+        st.session_state.account = f"session-{uuid.uuid4().hex[:12]}"
+    account = st.sidebar.text_input("Account", st.session_state.account).strip() or st.session_state.account
+    st.session_state.account = account
+    if account == trade_log.DEFAULT_ACCOUNT:
+        accounts.import_portfolio_csv(PORTFOLIO_FILE, account)
 
     # Function to Fetch Stock Data
     def get_stock_data(symbol):
         """Get latest stock data including price and basic info."""
         try:
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(period='1d')
-            if df.empty:
-                return None
-            current_price = df['Close'].iloc[-1]
-            info = {
-                'symbol': symbol,
-                'current_price': current_price,
-                'volume': df['Volume'].iloc[-1],
-                'open': df['Open'].iloc[-1],
-                'high': df['High'].iloc[-1],
-                'low': df['Low'].iloc[-1]
-            }
-            try:
-                info['name'] = ticker.info.get('longName', symbol)
-            except:
-                info['name'] = symbol
-            return info
+            return fetch_quote(symbol)
         except Exception as e:
             st.error(f"Error fetching data for {symbol}: {str(e)}")
             return None
 
-    # Load portfolio and balance at start
-    st.session_state.portfolio, st.session_state.balance = load_portfolio_and_balance()
+    # Load this account's balance and positions
+    balance, _, portfolio = accounts.get_account(account)
 
     st.markdown("""
     Monitor real-time market prices and engage in paper trading.
@@ -112,69 +111,35 @@ def app():
         if stock_data:  # Only proceed if stock data is available
             # Buy Button Logic
             if buy_button:
-                cost = buy_quantity * stock_data["current_price"]
-                transaction_fee = cost * 0.002  # 0.2% transaction fee
-                total_cost = cost + transaction_fee  # Total cost with fee
-                transaction_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current date and time
-
-                if total_cost <= st.session_state.balance:
-                    st.session_state.balance -= total_cost  # Deduct total cost with fee
-                    existing = st.session_state.portfolio[
-                        st.session_state.portfolio["Symbol"] == symbol
-                    ]
-                    if not existing.empty:
-                        st.session_state.portfolio.loc[existing.index, "Shares"] += buy_quantity
-                        st.session_state.portfolio.loc[existing.index, "Transaction Fee"] += transaction_fee  # Add fee
-                        st.session_state.portfolio.loc[existing.index, "Transaction Date"] = transaction_date  # Add date
-                    else:
-                        st.session_state.portfolio = pd.concat(
-                            [
-                                st.session_state.portfolio,
-                                pd.DataFrame(
-                                    {
-                                        "Symbol": [symbol],
-                                        "Shares": [buy_quantity],
-                                        "Purchase Price": [stock_data["current_price"]],
-                                        "Transaction Fee": [transaction_fee],  # Add fee to new row
-                                        "Transaction Date": [transaction_date],  # Add date to new row
-                                    }
-                                ),
-                            ]
-                        )
-                    save_portfolio_and_balance(st.session_state.portfolio, st.session_state.balance)
+                try:
+                    balance, transaction_fee = accounts.trade(account, symbol, buy_quantity, stock_data["current_price"])
+                    transaction_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current date and time
+                    cost = buy_quantity * stock_data["current_price"]
                     st.success(f"Bought {buy_quantity} shares of {symbol} for ${cost:.2f} (Fee: ${transaction_fee:.2f}) on {transaction_date}")
-                else:
-                    st.error("Insufficient balance!")
+                except ValueError as e:
+                    st.error(str(e))
 
             # Sell Button Logic
             if sell_button:
-                existing = st.session_state.portfolio[
-                    st.session_state.portfolio["Symbol"] == symbol
-                ]
-                if not existing.empty and existing["Shares"].iloc[0] >= sell_quantity:
-                    st.session_state.portfolio.loc[existing.index, "Shares"] -= sell_quantity
-                    proceeds = sell_quantity * stock_data["current_price"]
-                    transaction_fee = proceeds * 0.002  # 0.2% transaction fee
-                    net_proceeds = proceeds - transaction_fee  # Net proceeds after fee
+                try:
+                    balance, transaction_fee = accounts.trade(account, symbol, -sell_quantity, stock_data["current_price"])
                     transaction_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current date and time
-                    st.session_state.balance += net_proceeds
-                    st.session_state.portfolio.loc[existing.index, "Transaction Fee"] += transaction_fee  # Add fee
-                    st.session_state.portfolio.loc[existing.index, "Transaction Date"] = transaction_date  # Add date
-                    st.session_state.portfolio = st.session_state.portfolio[
-                        st.session_state.portfolio["Shares"] > 0
-                    ]
-                    save_portfolio_and_balance(st.session_state.portfolio, st.session_state.balance)
+                    net_proceeds = sell_quantity * stock_data["current_price"] - transaction_fee
                     st.success(f"Sold {sell_quantity} shares of {symbol} for ${net_proceeds:.2f} (Fee: ${transaction_fee:.2f}) on {transaction_date}")
-                else:
-                    st.error("Not enough shares to sell!")
+                except ValueError as e:
+                    st.error(str(e))
+
+            # Re-read the positions after a trade
+            if buy_button or sell_button:
+                balance, _, portfolio = accounts.get_account(account)
 
             st.markdown("---")
 
     # Portfolio Display Section
     st.subheader("📂 Portfolio")
-    if not st.session_state.portfolio.empty:
+    if not portfolio.empty:
         # Remove rows with NaN or invalid symbols from the portfolio
-        valid_portfolio = st.session_state.portfolio.dropna(subset=["Symbol"])
+        valid_portfolio = portfolio.dropna(subset=["Symbol"])
 
         # Drop the "Balance" column before displaying the portfolio table
         valid_portfolio = valid_portfolio.drop(columns=["Balance"], errors="ignore")
@@ -218,4 +183,18 @@ def app():
     else:
         st.write("No shares in portfolio. Start trading to build your portfolio!")
 
-    st.write(f"💰 **Updated Balance**: **${st.session_state.balance:,.2f}**")
+    st.write(f"💰 **Updated Balance**: **${balance:,.2f}**")
+
+    # Account History Section (rebuilt from the fill log)
+    st.subheader("📈 Account History")
+    equity = trade_log.equity_curve(account)
+    if equity.empty:
+        st.write("No trades yet.")
+    else:
+        st.line_chart(equity[["Equity", "Cash", "Market Value"]])
+        history = trade_log.fills(account)
+        history = history.assign(Side=np.where(history["quantity"] > 0, "Buy", "Sell"),
+                                 Shares=history["quantity"].abs())
+        st.dataframe(history[["time", "symbol", "Side", "Shares", "price", "fee"]]
+                     .rename(columns={"time": "Time", "symbol": "Symbol", "price": "Price", "fee": "Fee"})
+                     .sort_values("Time", ascending=False), hide_index=True)
@@ -0,0 +1,130 @@
+"""Vectorized next-period return forecasts across symbols and horizons.
+
+Every model is computed for a whole (time x symbol) return matrix at once
+from causal running sums, so the value at row t only uses returns up to t.
+That gives both the latest forecast for every symbol and, for free, the
+full history of out-of-sample forecasts used by the walk-forward
+evaluation. There are no per-symbol Python loops.
+
+Models:
+    mean    expanding historical mean (the pages' original prediction)
+    ewma    exponentially weighted mean
+    ar1     AR(1) around the expanding mean, iterated h steps ahead
+    regime  mean return after past Lorentzian anomalies when the latest
+            return is anomalous, the expanding mean otherwise
+"""
+import numpy as np
+import pandas as pd
+
+MODELS = ['mean', 'ewma', 'ar1', 'regime']
+HORIZONS = (1, 5, 20)
+
+# Anomaly threshold in standard deviations, as on the Anomalies page
+NUM_STD = 2
+
+
+def _expanding_mean(values, valid):
+    counts = np.cumsum(valid, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.cumsum(np.where(valid, values, 0.0), axis=0) / counts, counts
+
+
+def _shift(values, periods, fill=np.nan):
+    """Shift rows down by `periods` (positive) or up (negative)"""
+    shifted = np.full_like(values, fill)
+    if periods > 0:
+        shifted[periods:] = values[:-periods]
+    elif periods < 0:
+        shifted[:periods] = values[-periods:]
+    else:
+        shifted[:] = values
+    return shifted
+
+
+def forecast_paths(returns, horizons=HORIZONS, halflife=20):
+    """Forecasts made at every row for every model and horizon.
+
+    `returns` is a (time x symbol) DataFrame. Returns {(model, horizon): ndarray}
+    where row t holds the forecast of the return h periods after t.
+    """
+    r = returns.to_numpy(dtype=float)
+    valid = ~np.isnan(r)
+    r0 = np.where(valid, r, 0.0)
+
+    mean, _ = _expanding_mean(r, valid)
+    ewma = returns.ewm(halflife=halflife, ignore_na=True).mean().to_numpy()
+
+    # AR(1) coefficient from running lag-1 covariance and variance
+    lagged = _shift(r, 1)
+    pair_valid = valid & ~np.isnan(lagged)
+    cross, _ = _expanding_mean(r0 * np.where(pair_valid, lagged, 0.0), pair_valid)
+    square, _ = _expanding_mean(r0 ** 2, valid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        phi = np.clip((cross - mean ** 2) / (square - mean ** 2), -0.99, 0.99)
+    phi = np.nan_to_num(phi)
+    last = np.where(valid, r, mean)
+
+    # Lorentzian distance between consecutive returns, flagged against a running threshold
+    distances = np.log1p((r - lagged) ** 2)
+    d_valid = ~np.isnan(distances)
+    d_mean, d_count = _expanding_mean(distances, d_valid)
+    d_square, _ = _expanding_mean(np.where(d_valid, distances, 0.0) ** 2, d_valid)
+    d_std = np.sqrt(np.maximum(d_square - d_mean ** 2, 0.0))
+    flagged = d_valid & (distances > d_mean + NUM_STD * d_std) & (d_count > 1)
+
+    # Mean return following past anomalies, using only returns already observed
+    followed = _shift(flagged.astype(float), 1, 0.0) * r0
+    follow_count = np.cumsum(_shift(flagged.astype(float), 1, 0.0) * valid, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        after_anomaly = np.cumsum(followed, axis=0) / follow_count
+    regime_one_step = np.where(flagged & (follow_count > 0), after_anomaly, mean)
+
+    paths = {}
+    for h in horizons:
+        paths[('mean', h)] = mean
+        paths[('ewma', h)] = ewma
+        paths[('ar1', h)] = mean + phi ** h * (last - mean)
+        # The anomaly regime is a one-step effect; longer horizons revert to the mean
+        paths[('regime', h)] = regime_one_step if h == 1 else mean
+    return paths
+
+
+def forecast_table(returns, horizons=HORIZONS, halflife=20):
+    """Latest forecast per symbol; columns are (model, horizon)"""
+    paths = forecast_paths(returns, horizons, halflife)
+    table = pd.DataFrame({key: path[-1] for key, path in paths.items()}, index=returns.columns)
+    table.columns = pd.MultiIndex.from_tuples(table.columns, names=['model', 'horizon'])
+    return table
+
+
+def walk_forward(returns, horizons=HORIZONS, halflife=20, min_train=60):
+    """Out-of-sample error of every model and horizon, pooled across symbols.
+
+    Each forecast made at row t (t >= min_train) is scored against the
+    realised return h rows later.
+    """
+    r = returns.to_numpy(dtype=float)
+    paths = forecast_paths(returns, horizons, halflife)
+    rows = []
+    for (model, h), path in paths.items():
+        actual = _shift(r, -h)
+        predicted = path[min_train:]
+        actual = actual[min_train:]
+        ok = ~np.isnan(predicted) & ~np.isnan(actual)
+        errors = (predicted - actual)[ok]
+        rows.append({
+            'model': model,
+            'horizon': h,
+            'rmse': np.sqrt(np.mean(errors ** 2)) if errors.size else np.nan,
+            'mae': np.mean(np.abs(errors)) if errors.size else np.nan,
+            'hit_rate': np.mean(np.sign(predicted[ok]) == np.sign(actual[ok])) if errors.size else np.nan,
+            'forecasts': int(ok.sum()),
+        })
+    return pd.DataFrame(rows).set_index(['model', 'horizon'])
+
+
+def returns_matrix(bars_by_symbol):
+    """Align per-symbol Close series into a (time x symbol) return matrix"""
+    closes = pd.DataFrame({symbol: data['Close'].squeeze() for symbol, data in bars_by_symbol.items()
+                           if not data.empty})
+    return closes.pct_change(fill_method=None)
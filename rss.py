@@ -1,12 +1,10 @@
 import streamlit as st
-import feedparser
+from analytics import fetch_stock_news
 
 # Function to fetch and parse RSS feed
 def fetch_rss_feed(ticker):
-    # URL format for Yahoo Finance RSS feed
-    feed_url = f"https://finance.yahoo.com/rss/headline?s={ticker}"
-    feed = feedparser.parse(feed_url)
-    return feed
+    # Yahoo Finance headline feed, served from the shared news cache
+    return fetch_stock_news(ticker)
 
 # Streamlit app
 def main():
@@ -17,14 +15,19 @@ def main():
 
     if ticker:
         with st.spinner("Fetching news..."):
-            feed = fetch_rss_feed(ticker)
-            
-            if feed.entries:
+            try:
+                news_items = fetch_rss_feed(ticker)
+            except Exception as e:
+                st.error(f"Error fetching news for {ticker}: {str(e)}")
+                return
+
+            if news_items:
                 st.subheader(f"Recent News for {ticker}:")
-                for entry in feed.entries:
-                    st.write(f"**Title:** {entry.title}")
-                    st.write(f"**Link:** [Read more]({entry.link})")
-                    st.write(f"**Published:** {entry.published}")
+                for item in news_items:
+                    st.write(f"**Title:** {item['title']}")
+                    st.write(f"**Link:** [Read more]({item['url']})")
+                    st.write(f"**Published:** {item['publishedAt']}")
+                    st.write(f"**Sentiment:** {item['sentiment']:+.2f}")
                     st.write("---")
             else:
                 st.write("No news found for the given ticker symbol.")
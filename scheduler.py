@@ -0,0 +1,174 @@
+"""Rate-limited, batching download scheduler for Yahoo Finance.
+
+Callers ask for one symbol at a time; the scheduler coalesces identical
+in-flight requests (two sessions opening AAPL at once share one Future),
+groups symbols that share the same download parameters into multi-ticker
+yf.download batches, throttles batches with a token bucket and retries
+failed batches with exponential backoff. Only transport errors are
+retried: yf.download reports per-ticker failures as empty columns rather
+than raising, so a throttled download (recognised from yfinance's error
+log) is raised as RateLimitedError, while a symbol that simply has no
+rows, such as an unknown or delisted ticker, fails at once with
+NoDataError instead of stalling its caller through the backoff.
+"""
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+import yfinance as yf
+from yfinance import shared as yf_shared
+
+
+class NoDataError(LookupError):
+    """Yahoo returned no rows for a symbol"""
+
+
+class RateLimitedError(IOError):
+    """Yahoo throttled a download; retried like any other transport error"""
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _yahoo_download(symbols, params):
+    tickers = symbols[0] if len(symbols) == 1 else symbols
+    data = yf.download(tickers, group_by='ticker', progress=False, threads=False, **params)
+    # yf.download logs per-ticker errors instead of raising them
+    errors = getattr(yf_shared, '_ERRORS', {})
+    throttled = [symbol for symbol in symbols
+                 if re.search(r'rate limit|too many requests', str(errors.get(symbol, '')), re.IGNORECASE)]
+    if throttled:
+        raise RateLimitedError(f"Yahoo rate limit hit for {', '.join(throttled)}")
+    return data
+
+
+def _split(data, symbol):
+    """Extract one symbol's frame from a (possibly multi-ticker) download"""
+    if data is None or data.empty:
+        return pd.DataFrame()
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        data = data[symbol]
+    return data.dropna(how='all').copy()
+
+
+class DownloadScheduler:
+    def __init__(self, rate=2.0, burst=5, batch_size=50, batch_window=0.05,
+                 max_retries=3, backoff=1.0, workers=4, downloader=_yahoo_download):
+        self.bucket = TokenBucket(rate, burst)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.downloader = downloader
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = {}    # params key -> {symbol: Future}
+        self._in_flight = {}  # (symbol, params key) -> Future
+        self._cond = threading.Condition()
+        self._dispatcher = None
+
+    def submit(self, symbol, **params):
+        """Queue a download of `symbol` and return a Future for its DataFrame"""
+        key = tuple(sorted(params.items()))
+        with self._cond:
+            future = self._in_flight.get((symbol, key))
+            if future is not None:
+                return future
+            future = Future()
+            self._in_flight[(symbol, key)] = future
+            self._pending.setdefault(key, {})[symbol] = future
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+                self._dispatcher.start()
+            self._cond.notify()
+        return future
+
+    def download(self, symbol, timeout=None, **params):
+        """Blocking form of submit(); returns a private copy since futures are shared"""
+        return self.submit(symbol, **params).result(timeout).copy()
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Give concurrent sessions a moment to join the batch
+            time.sleep(self.batch_window)
+            with self._cond:
+                for key in list(self._pending):
+                    futures = self._pending[key]
+                    while futures:
+                        symbols = list(futures)[:self.batch_size]
+                        batch = {symbol: futures.pop(symbol) for symbol in symbols}
+                        self._executor.submit(self._run_batch, key, batch)
+                    del self._pending[key]
+
+    def _run_batch(self, key, batch):
+        params = dict(key)
+        results = {}
+        error = None
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                data = self.downloader(list(batch), params)
+            except Exception as e:
+                error = e
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff * 2 ** attempt)
+                continue
+            # A symbol without rows in a completed download has no data; retrying will not change that
+            results = {symbol: _split(data, symbol) for symbol in batch}
+            error = None
+            break
+
+        with self._cond:
+            for symbol in batch:
+                self._in_flight.pop((symbol, key), None)
+        for symbol, future in batch.items():
+            if error is not None:
+                future.set_exception(error)
+            elif results[symbol].empty:
+                future.set_exception(NoDataError(f"No data returned for {symbol}"))
+            else:
+                future.set_result(results[symbol])
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler shared by every page and session"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DownloadScheduler()
+        return _scheduler
+
+
+def download(symbol, **params):
+    """Download one symbol's bars through the shared scheduler (same keywords as yf.download)"""
+    return get_scheduler().download(symbol, **params)
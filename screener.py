@@ -0,0 +1,70 @@
+"""Fundamental screener over the local statements warehouse.
+
+Filters and ranks every stored symbol on warehouse metrics. Screening reads
+only the in-process warehouse tables; statements are downloaded solely by
+the refresh button (or `python warehouse.py --universe ...`).
+"""
+import numpy as np
+import streamlit as st
+
+import warehouse
+from analytics import fetch_market_return, fetch_risk_free_rate
+from universes import load_universes
+
+# Metrics shown as percentages
+PERCENT_METRICS = ['ROE', 'ROA', 'Gross Margin', 'Profit Margin', 'Revenue Growth', 'Tax Rate', 'Cost of Debt',
+                   'Cost of Equity', 'WACC']
+
+
+def app():
+    st.title("Fundamental Screener")
+
+    universes = load_universes()
+    universe = st.selectbox("Universe", ["all"] + list(universes),
+                            format_func=lambda u: "All stored symbols" if u == "all" else universes[u]['name'])
+    symbols = None if universe == "all" else universes[universe]['symbols']
+
+    if st.button("Refresh statements") and symbols:
+        with st.spinner(f"Downloading statements for {len(symbols)} symbols..."):
+            errors = warehouse.refresh(symbols)
+        for error in errors:
+            st.warning(error)
+
+    try:
+        risk_free_rate = fetch_risk_free_rate()
+        market_return = fetch_market_return()
+    except Exception:
+        risk_free_rate = market_return = None
+    risk_free_rate = st.sidebar.number_input("Risk-free rate (%)", value=round((risk_free_rate or 0.04) * 100, 2)) / 100
+    market_return = st.sidebar.number_input("Market return (%)", value=round((market_return or 0.08) * 100, 2)) / 100
+
+    metrics = warehouse.get_metrics(risk_free_rate, market_return)
+    if metrics.empty:
+        st.info("The warehouse is empty. Pick a universe and refresh its statements.")
+        return
+
+    # One optional min/max pair per chosen metric
+    filters = []
+    for metric in st.multiselect("Filter on", warehouse.METRICS, default=['P/E Ratio', 'ROE']):
+        scale = 100 if metric in PERCENT_METRICS else 1
+        label = f"{metric} (%)" if scale == 100 else metric
+        col1, col2 = st.columns(2)
+        low = col1.number_input(f"Min {label}", value=None, key=f"min {metric}")
+        high = col2.number_input(f"Max {label}", value=None, key=f"max {metric}")
+        if low is not None:
+            filters.append((metric, '>=', low / scale))
+        if high is not None:
+            filters.append((metric, '<=', high / scale))
+
+    sort_by = st.selectbox("Rank by", warehouse.METRICS, index=warehouse.METRICS.index('ROE'))
+    ascending = st.radio("Order", ["Descending", "Ascending"], horizontal=True) == "Ascending"
+    limit = st.slider("Rows", 10, 500, 50)
+
+    result = warehouse.screen(metrics, filters, sort_by, ascending, symbols=symbols, limit=limit)
+    st.write(f"{len(result)} matching symbols")
+    display = result.copy()
+    display[PERCENT_METRICS] = display[PERCENT_METRICS] * 100
+    formats = {metric: "{:.2f}%" if metric in PERCENT_METRICS else "{:.2f}" for metric in warehouse.METRICS}
+    formats['Market Cap'] = "{:,.0f}"
+    st.dataframe(display.style.format(formats, na_rep="N/A"))
+    st.caption(f"{np.isfinite(metrics.to_numpy()).any(axis=1).sum()} symbols stored in the warehouse")
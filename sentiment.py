@@ -0,0 +1,136 @@
+"""Offline, CPU-only headline sentiment scoring.
+
+Headlines are scored against a small finance lexicon in vectorized batches
+(one tokenization pass, one NumPy bincount per batch). Scores are cached by
+headline hash in memory and in SQLite, so each title is scored once ever.
+Scores are in [-1, 1]; 0 means no sentiment-bearing words.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from config import data_path
+
+# Word -> polarity, loosely following the Loughran-McDonald finance word lists
+LEXICON = {
+    # Positive
+    'beat': 2.0, 'beats': 2.0, 'boost': 1.5, 'boosts': 1.5, 'bullish': 2.0, 'buy': 1.0,
+    'climb': 1.5, 'climbs': 1.5, 'gain': 1.5, 'gains': 1.5, 'growth': 1.5, 'grow': 1.0,
+    'grows': 1.0, 'higher': 1.0, 'high': 0.5, 'jump': 1.5, 'jumps': 1.5, 'outperform': 2.0,
+    'outperforms': 2.0, 'profit': 1.5, 'profitable': 1.5, 'profits': 1.5, 'rally': 2.0,
+    'rallies': 2.0, 'record': 1.0, 'rebound': 1.5, 'rebounds': 1.5, 'rise': 1.5,
+    'rises': 1.5, 'rising': 1.0, 'soar': 2.5, 'soars': 2.5, 'strong': 1.5, 'stronger': 1.5,
+    'surge': 2.5, 'surges': 2.5, 'top': 1.0, 'tops': 1.0, 'upgrade': 2.0, 'upgrades': 2.0,
+    'upgraded': 2.0, 'upside': 1.5, 'win': 1.5, 'wins': 1.5, 'optimistic': 1.5,
+    'optimism': 1.5, 'positive': 1.0, 'approval': 1.5, 'approved': 1.5, 'breakthrough': 2.0,
+    'dividend': 0.5, 'buyback': 1.0, 'expand': 1.0, 'expands': 1.0, 'exceed': 1.5,
+    'exceeds': 1.5, 'raise': 1.0, 'raises': 1.0, 'momentum': 1.0, 'recovery': 1.5,
+    # Negative
+    'bearish': -2.0, 'cut': -1.5, 'cuts': -1.5, 'decline': -1.5, 'declines': -1.5,
+    'default': -2.5, 'delay': -1.0, 'delays': -1.0, 'downgrade': -2.0, 'downgrades': -2.0,
+    'downgraded': -2.0, 'downside': -1.5, 'drop': -1.5, 'drops': -1.5, 'fall': -1.5,
+    'falls': -1.5, 'fell': -1.5, 'fear': -1.5, 'fears': -1.5, 'fraud': -3.0, 'investigation': -1.5,
+    'lawsuit': -2.0, 'layoff': -2.0, 'layoffs': -2.0, 'lose': -1.5, 'loses': -1.5,
+    'loss': -1.5, 'losses': -1.5, 'lower': -1.0, 'low': -0.5, 'miss': -2.0, 'misses': -2.0,
+    'negative': -1.0, 'plunge': -2.5, 'plunges': -2.5, 'probe': -1.5, 'recall': -1.5,
+    'recession': -2.0, 'risk': -0.5, 'risks': -0.5, 'sell': -1.0, 'selloff': -2.0,
+    'slump': -2.0, 'slumps': -2.0, 'slide': -1.5, 'slides': -1.5, 'sink': -2.0, 'sinks': -2.0,
+    'tumble': -2.0, 'tumbles': -2.0, 'underperform': -2.0, 'warning': -1.5, 'warns': -1.5,
+    'weak': -1.5, 'weaker': -1.5, 'worst': -2.0, 'crash': -3.0, 'crashes': -3.0,
+    'bankruptcy': -3.0, 'fine': -1.0, 'fined': -1.5, 'halt': -1.5, 'halts': -1.5,
+    'concern': -1.0, 'concerns': -1.0, 'volatile': -0.5, 'volatility': -0.5,
+}
+
+# Words that flip the polarity of the next word
+NEGATIONS = {'not', 'no', 'never', "isn't", "doesn't", "don't", "won't", "didn't", 'without', 'fails', 'fail'}
+
+# Normalization constant mapping summed polarity into [-1, 1]
+ALPHA = 15.0
+
+_TOKEN = re.compile(r"[a-z']+")
+
+_scores = {}
+_lock = threading.Lock()
+_db = None
+
+
+def _connect():
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(data_path('sentiment.sqlite'), check_same_thread=False)
+        _db.execute("CREATE TABLE IF NOT EXISTS scores (hash TEXT PRIMARY KEY, score REAL)")
+    return _db
+
+
+def headline_hash(title):
+    return hashlib.blake2b(title.strip().lower().encode('utf-8'), digest_size=8).hexdigest()
+
+
+def score_batch(titles):
+    """Score a batch of headlines without touching the cache"""
+    tokens = [_TOKEN.findall(title.lower()) for title in titles]
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    flat = list(chain.from_iterable(tokens))
+
+    values = np.fromiter((LEXICON.get(token, 0.0) for token in flat), dtype=float, count=len(flat))
+    negators = np.fromiter((token in NEGATIONS for token in flat), dtype=bool, count=len(flat))
+
+    # A negator flips the word right after it, but never across headlines
+    flip = np.zeros(len(flat), dtype=bool)
+    flip[1:] = negators[:-1]
+    starts = np.cumsum(lengths) - lengths
+    flip[starts[lengths > 0]] = False
+    values = np.where(flip, -values, values)
+
+    owners = np.repeat(np.arange(len(titles)), lengths)
+    totals = np.bincount(owners, weights=values, minlength=len(titles))
+    return totals / np.sqrt(totals ** 2 + ALPHA)
+
+
+def score_headlines(titles):
+    """Scores for a list of headlines, computing only the ones never seen before"""
+    hashes = [headline_hash(title) for title in titles]
+    with _lock:
+        missing = [h for h in set(hashes) if h not in _scores]
+        if missing:
+            # Look in the persistent cache before scoring
+            db = _connect()
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = db.execute(
+                    f"SELECT hash, score FROM scores WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                _scores.update(rows)
+
+        todo = {h: title for h, title in zip(hashes, titles) if h not in _scores}
+        if todo:
+            new_scores = score_batch(list(todo.values()))
+            rows = list(zip(todo.keys(), new_scores.tolist()))
+            _scores.update(rows)
+            db = _connect()
+            db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?)", rows)
+            db.commit()
+
+        return np.array([_scores[h] for h in hashes], dtype=float)
+
+
+def add_sentiment(items):
+    """Attach a 'sentiment' score to each news item dict"""
+    scores = score_headlines([item['title'] for item in items])
+    return [dict(item, sentiment=score) for item, score in zip(items, scores)]
+
+
+def sentiment_series(items, window='3D'):
+    """Rolling mean headline sentiment indexed by publish time (UTC)"""
+    if not items:
+        return pd.Series(dtype=float, name='Sentiment')
+    scores = score_headlines([item['title'] for item in items])
+    published = pd.to_datetime([item['publishedAt'] for item in items], utc=True, errors='coerce', format='mixed')
+    series = pd.Series(scores, index=published, name='Sentiment')
+    series = series[series.index.notna()].sort_index()
+    return series.rolling(window).mean()
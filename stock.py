@@ -1,6 +1,6 @@
 import streamlit as st
-import yfinance as yf
 import plotly.graph_objects as go
+from bars import get_bars
 
 def app():
     st.title("Stock Chart")
@@ -9,7 +9,7 @@ def app():
     ticker = st.text_input("Enter Stock Ticker", "AAPL")  # Default: Apple
 
     # Fetch stock data
-    stock_data = yf.download(ticker, period="1y", interval="1d")  # 1 month data with 1-hour intervals
+    stock_data = get_bars(ticker.upper(), "1d", period="1y", base="1d")  # 1 year of daily bars from the shared bar store
 
     # Create stock chart
     fig = go.Figure(data=[go.Candlestick(x=stock_data.index,
@@ -1,5 +1,5 @@
 import streamlit as st
-import feedparser
+from analytics import fetch_stock_news
 
 def app():
     st.title("Stock News RSS Feed")
@@ -8,16 +8,20 @@ def app():
     ticker = st.text_input("Enter a ticker symbol (e.g., GOOGL, AAPL, MSFT):", value="GOOGL").upper()
 
     if ticker:
-        # Fetch the stock news using RSS feed
-        feed_url = f"https://finance.yahoo.com/rss/headline?s={ticker}"
-        feed = feedparser.parse(feed_url)
+        # Fetch the stock news using RSS feed (shared cache, pre-filled by the warm-up stage)
+        try:
+            news_items = fetch_stock_news(ticker)
+        except Exception as e:
+            st.error(f"Error fetching news for {ticker}: {str(e)}")
+            return
 
-        if feed.entries:
+        if news_items:
             st.subheader(f"Recent News for {ticker}:")
-            for entry in feed.entries:
-                st.write(f"**Title:** {entry.title}")
-                st.write(f"**Link:** [Read more]({entry.link})")
-                st.write(f"**Published:** {entry.published}")
+            for item in news_items:
+                st.write(f"**Title:** {item['title']}")
+                st.write(f"**Link:** [Read more]({item['url']})")
+                st.write(f"**Published:** {item['publishedAt']}")
+                st.write(f"**Sentiment:** {item['sentiment']:+.2f}")
                 st.write("---")
         else:
             st.write("No news found for the given ticker symbol.")
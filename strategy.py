@@ -0,0 +1,322 @@
+"""Headless strategy runner that turns dashboard signals into paper orders.
+
+Strategies are loaded from strategies/*.json:
+
+    {
+      "name": "EMA crossover",
+      "account": "strategy-ema",
+      "universe": "watchlist",
+      "interval": "1d",
+      "quantity": 10,
+      "entry": [["EMA_20", "cross_above", "EMA_50"], ["RSI", "<", 70]],
+      "exit": [["EMA_20", "cross_below", "EMA_50"]]
+    }
+
+Each condition compares a signal with a number or another signal using
+<, <=, >, >=, cross_above or cross_below; all conditions of a block must
+hold. Signals are Open, High, Low, Close, EMA_<n>, RSI, MACD, Signal Line,
+Bullish Engulfing, Bearish Engulfing and Anomaly, computed with the dashboard's
+own indicator functions on (time x symbol) frames, once per universe and
+interval. Every condition of every strategy sharing that universe is then
+evaluated in one vectorized pass over the latest completed bar. A symbol
+is bought when its entry block holds and the account has no position, and
+sold in full when its exit block holds, so re-running on the same bar
+places no duplicate orders. A file that is not valid JSON or uses an
+unknown operator or signal is reported and skipped, so one typo does not
+stop the other strategies; a group that fails to evaluate (a network
+error, say) is reported and retried on the next poll.
+
+Bars are complete on the exchange calendar: intraday bars at the end of
+their interval, daily bars at the 16:00 New York session close and weekly
+bars at Friday's close. The runner re-evaluates after each such close and
+skips weekends, re-downloading bars fetched before the close it evaluates
+so a daily bar cached intraday is not mistaken for the session's close.
+
+    python strategy.py            # evaluate on every new bar close
+    python strategy.py --once     # evaluate the latest bar and exit
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import accounts
+from analytics import add_ema, add_macd, add_rsi, identify_engulfing_patterns
+from bars import RESAMPLE_RULES, get_bars
+from universes import get_symbols
+
+STRATEGY_DIR = os.environ.get("RSS_STRATEGY_DIR", "strategies")
+
+OPS = ['<', '<=', '>', '>=', 'cross_above', 'cross_below']
+FIELDS = ['Open', 'High', 'Low', 'Close']
+SIGNALS = FIELDS + ['RSI', 'MACD', 'Signal Line', 'Bullish Engulfing', 'Bearish Engulfing', 'Anomaly']
+
+# Calendar that daily and weekly bars follow
+EXCHANGE_TZ = 'America/New_York'
+SESSION_CLOSE = pd.Timedelta(hours=16)
+
+# Anomaly threshold in standard deviations, as on the Anomalies page
+NUM_STD = 2
+
+
+def _is_signal(name):
+    return name in SIGNALS or re.fullmatch(r'EMA_\d+', name) is not None
+
+
+def _problems(definition):
+    """Why a strategy definition cannot be evaluated (empty if it can)"""
+    problems = []
+    for key in ("universe", "entry"):
+        if key not in definition:
+            problems.append(f"missing {key!r}")
+    for condition in definition.get("entry", []) + definition["exit"]:
+        if len(condition) != 3:
+            problems.append(f"condition {condition!r} is not [signal, operator, value]")
+            continue
+        lhs, operator, rhs = condition
+        if operator not in OPS:
+            problems.append(f"unknown operator {operator!r}")
+        for name in (lhs, rhs):
+            if isinstance(name, str) and not _is_signal(name):
+                problems.append(f"unknown signal {name!r}")
+        if not isinstance(lhs, str):
+            problems.append(f"left side {lhs!r} must be a signal")
+    return problems
+
+
+def load_strategies(strategy_dir=STRATEGY_DIR):
+    """Return {strategy id: definition} for every valid JSON file in strategy_dir"""
+    strategies = {}
+    for path in sorted(glob.glob(os.path.join(strategy_dir, "*.json"))):
+        strategy_id = os.path.splitext(os.path.basename(path))[0]
+        try:
+            with open(path) as f:
+                definition = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"{strategy_id}: skipped ({e})")
+            continue
+        if not isinstance(definition, dict):
+            print(f"{strategy_id}: skipped (not a JSON object)")
+            continue
+        definition.setdefault("name", strategy_id)
+        definition.setdefault("account", f"strategy-{strategy_id}")
+        definition.setdefault("interval", "1d")
+        definition.setdefault("quantity", 1)
+        definition.setdefault("exit", [])
+        problems = _problems(definition)
+        if problems:
+            print(f"{strategy_id}: skipped ({'; '.join(problems)})")
+            continue
+        strategies[strategy_id] = definition
+    return strategies
+
+
+def _exchange_time(timestamp):
+    return timestamp.tz_convert(EXCHANGE_TZ) if timestamp.tz is not None else timestamp.tz_localize(EXCHANGE_TZ)
+
+
+def _bar_close(label, interval):
+    """When the bar labelled `label` is complete"""
+    label = _exchange_time(label)
+    if interval == '1d':
+        return label.normalize() + SESSION_CLOSE
+    if interval == '1wk':
+        # Monday-labelled week, complete at Friday's close
+        return label.normalize() + pd.Timedelta(days=4) + SESSION_CLOSE
+    return label + pd.Timedelta(RESAMPLE_RULES[interval])
+
+
+def _last_close(interval, now=None):
+    """The most recent bar close at or before `now` on the exchange calendar"""
+    now = _exchange_time(pd.Timestamp.now(tz=EXCHANGE_TZ) if now is None else now)
+    if interval not in ('1d', '1wk'):
+        return now.floor(RESAMPLE_RULES[interval])
+    close = now.normalize() + SESSION_CLOSE
+    if interval == '1wk':
+        close -= pd.Timedelta(days=(close.weekday() - 4) % 7)
+        return close if close <= now else close - pd.Timedelta(days=7)
+    if close > now:
+        close -= pd.Timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= pd.Timedelta(days=1)
+    return close
+
+
+def load_panel(symbols, interval, workers=8):
+    """{field: (time x symbol) DataFrame} of OHLC bars, up to the last completed bar"""
+    base = '1m' if interval in ('1m', '5m', '15m', '30m') else '1d' if interval in ('1d', '1wk') else '1h'
+    # Bars fetched before the latest close may hold an intraday price in place of the closing one
+    since = _last_close(interval)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        bars = dict(zip(symbols, executor.map(lambda s: get_bars(s, interval, base=base, since=since), symbols)))
+    bars = {symbol: data for symbol, data in bars.items() if not data.empty}
+    panel = {field: pd.DataFrame({symbol: data[field].squeeze() for symbol, data in bars.items()}).sort_index()
+             for field in FIELDS}
+
+    # Drop the last bar while it is still forming
+    close = panel['Close']
+    if not close.empty:
+        if _bar_close(close.index[-1], interval) > pd.Timestamp.now(tz=EXCHANGE_TZ):
+            panel = {field: frame.iloc[:-1] for field, frame in panel.items()}
+    return panel
+
+
+def compute_signals(panel, names):
+    """Add every signal referenced in `names` to the panel, vectorized across symbols"""
+    signals = dict(panel)
+    ema_periods = sorted({int(m.group(1)) for name in names for m in [re.fullmatch(r'EMA_(\d+)', name)] if m})
+    add_ema(signals, ema_periods)
+    if 'RSI' in names:
+        add_rsi(signals)
+    if 'MACD' in names or 'Signal Line' in names:
+        add_macd(signals)
+    if 'Bullish Engulfing' in names or 'Bearish Engulfing' in names:
+        identify_engulfing_patterns(signals)
+    if 'Anomaly' in names:
+        # Lorentzian distance between consecutive returns against the expanding threshold so far
+        returns = signals['Close'].pct_change(fill_method=None)
+        distances = np.log1p(returns.diff() ** 2)
+        threshold = distances.expanding().mean() + NUM_STD * distances.expanding().std(ddof=0)
+        signals['Anomaly'] = distances > threshold
+    return signals
+
+
+def _compile(strategies, signal_names):
+    """Flatten every condition into arrays: left signal, right signal (-1 for a constant), constant, op"""
+    left, right, constant, op, starts = [], [], [], [], []
+    for definition in strategies:
+        for block in ("entry", "exit"):
+            starts.append(len(left))
+            # An empty block never fires
+            conditions = definition[block] or [["Close", "<", -np.inf]]
+            for lhs, operator, rhs in conditions:
+                left.append(signal_names.index(lhs))
+                right.append(signal_names.index(rhs) if isinstance(rhs, str) else -1)
+                constant.append(np.nan if isinstance(rhs, str) else float(rhs))
+                op.append(OPS.index(operator))
+    return np.array(left), np.array(right), np.array(constant), np.array(op), np.array(starts)
+
+
+def evaluate(strategies, signals):
+    """(entry, exit) boolean arrays of shape (strategy x symbol) at the last bar"""
+    signal_names = list(signals)
+    latest = np.vstack([signals[name].iloc[-1].to_numpy(dtype=float) for name in signal_names])
+    previous = np.vstack([signals[name].iloc[-2].to_numpy(dtype=float) for name in signal_names])
+    left, right, constant, op, starts = _compile(strategies, signal_names)
+
+    lhs, lhs_prev = latest[left], previous[left]
+    has_signal = (right >= 0)[:, None]
+    rhs = np.where(has_signal, latest[np.maximum(right, 0)], constant[:, None])
+    rhs_prev = np.where(has_signal, previous[np.maximum(right, 0)], constant[:, None])
+
+    with np.errstate(invalid='ignore'):
+        op = op[:, None]
+        holds = np.select(
+            [op == 0, op == 1, op == 2, op == 3, op == 4, op == 5],
+            [lhs < rhs, lhs <= rhs, lhs > rhs, lhs >= rhs,
+             (lhs_prev <= rhs_prev) & (lhs > rhs), (lhs_prev >= rhs_prev) & (lhs < rhs)],
+            False,
+        )
+
+    # All conditions of a block must hold
+    blocks = np.logical_and.reduceat(holds, starts, axis=0)
+    return blocks[0::2], blocks[1::2]
+
+
+def run_group(strategies, universe, interval):
+    """Evaluate the strategies sharing (universe, interval) and submit their orders; returns the orders"""
+    symbols = get_symbols(universe)
+    names = {name for definition in strategies for condition in definition["entry"] + definition["exit"]
+             for name in (condition[0], condition[2]) if isinstance(name, str)}
+    panel = load_panel(symbols, interval)
+    if len(panel['Close']) < 2:
+        return []
+    signals = compute_signals(panel, names | {'Close'})
+    entries, exits = evaluate(strategies, signals)
+
+    symbols = list(panel['Close'].columns)
+    prices = panel['Close'].iloc[-1].to_numpy(dtype=float)
+    orders = []
+    for definition, entry, exit_ in zip(strategies, entries, exits):
+        _, _, positions = accounts.get_account(definition["account"])
+        held = dict(zip(positions['Symbol'], positions['Shares']))
+        for j in np.flatnonzero((entry | exit_) & ~np.isnan(prices)):
+            symbol = symbols[j]
+            if exit_[j] and held.get(symbol, 0) > 0:
+                quantity = -held[symbol]
+            elif entry[j] and held.get(symbol, 0) == 0:
+                quantity = definition["quantity"]
+            else:
+                continue
+            try:
+                accounts.trade(definition["account"], symbol, quantity, prices[j])
+            except ValueError as e:
+                print(f"{definition['name']}: {symbol} {quantity:+g} skipped ({e})")
+                continue
+            orders.append((definition["name"], symbol, quantity, prices[j]))
+    return orders
+
+
+def _groups(strategies):
+    """{(universe, interval): {strategy id: definition}} of the strategies evaluated together"""
+    groups = {}
+    for strategy_id, definition in strategies.items():
+        groups.setdefault((definition["universe"], definition["interval"]), {})[strategy_id] = definition
+    return groups
+
+
+def _try_group(members, universe, interval):
+    """run_group, reporting a failure instead of raising; returns the orders, or None if it failed"""
+    try:
+        return run_group(list(members.values()), universe, interval)
+    except Exception as e:
+        print(f"{universe} {interval}: failed ({type(e).__name__}: {e})")
+        return None
+
+
+def _print_orders(orders):
+    for name, symbol, quantity, price in orders:
+        print(f"{name}: {'BUY' if quantity > 0 else 'SELL'} {abs(quantity):g} {symbol} @ {price:.2f}")
+
+
+def run_once(strategies=None):
+    """Evaluate every strategy on the latest completed bar of its universe"""
+    strategies = load_strategies() if strategies is None else strategies
+    orders = []
+    for (universe, interval), members in _groups(strategies).items():
+        orders.extend(_try_group(members, universe, interval) or [])
+    return orders
+
+
+def run(poll_seconds=60):
+    """Re-evaluate whenever a new bar has closed for any strategy's interval"""
+    last_close = {}
+    while True:
+        due = {strategy_id: definition for strategy_id, definition in load_strategies().items()
+               if last_close.get(strategy_id) != _last_close(definition["interval"])}
+        for (universe, interval), members in _groups(due).items():
+            bar = _last_close(interval)
+            orders = _try_group(members, universe, interval)
+            if orders is None:
+                # Not marked done, so the bar is evaluated again on the next poll
+                continue
+            _print_orders(orders)
+            last_close.update(dict.fromkeys(members, bar))
+        time.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the paper-trading strategies in strategies/*.json")
+    parser.add_argument("--once", action="store_true", help="evaluate the latest bar once and exit")
+    parser.add_argument("--poll", type=int, default=60, help="seconds between bar-close checks")
+    args = parser.parse_args()
+    if args.once:
+        _print_orders(run_once())
+    else:
+        run(args.poll)
@@ -0,0 +1,245 @@
+"""Walk-forward parameter sweep for the dashboard indicators.
+
+Sweeps parameter grids for rules built on the dashboard's indicators (EMA
+crossover periods, RSI window and bands, support/resistance breakout
+window, rolling Sharpe window) over the stored daily history of a whole
+universe. The aligned (time x symbol) price and return arrays are placed in
+shared memory once; worker processes attach to them by name, so no price
+data is pickled per task. Each combination is scored on rolling
+train/test folds and the best in-sample combination of every fold is
+reported on the following out-of-sample window.
+
+    python sweep.py --universe dow30 --workers 8 --out reports/sweep.csv
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import archive
+from analytics import add_ema, add_rsi
+from universes import get_symbols
+
+TRADING_DAYS = 252
+
+# Parameter grids per rule family
+GRIDS = {
+    'ema_cross': {'fast': range(5, 61), 'slow': range(20, 251, 5)},
+    'rsi': {'window': range(5, 31), 'lower': range(15, 41, 5), 'upper': range(60, 86, 5)},
+    'breakout': {'window': range(5, 121)},
+    'sharpe': {'window': range(20, 253, 4)},
+}
+
+ARRAYS = ['close', 'high', 'low', 'returns', 'next_returns']
+
+# Worker-process views of the shared arrays and per-worker indicator memo
+_shared = {}
+_views = {}
+_memo = {}
+
+
+def combinations(grids=GRIDS):
+    """Every (family, params dict) in the grids, skipping inconsistent ones"""
+    for family, grid in grids.items():
+        names = list(grid)
+        for values in itertools.product(*grid.values()):
+            params = dict(zip(names, values))
+            if family == 'ema_cross' and params['fast'] >= params['slow']:
+                continue
+            yield family, params
+
+
+def folds(length, train=2 * TRADING_DAYS, test=TRADING_DAYS // 2):
+    """(train_start, test_start, test_end) row triples of rolling walk-forward folds"""
+    starts = np.arange(0, length - train - test + 1, test)
+    return np.column_stack([starts, starts + train, starts + train + test])
+
+
+def _attach(specs):
+    """Pool initializer: map the parent's shared-memory arrays without copying them"""
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _shared[name] = shm
+        _views[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _frame(name):
+    return pd.DataFrame(_views[name], copy=False)
+
+
+def _ema(span):
+    key = ('ema', span)
+    if key not in _memo:
+        _memo[key] = add_ema({'Close': _frame('close')}, [span])[f'EMA_{span}'].to_numpy()
+    return _memo[key]
+
+
+def _hold(enter, leave):
+    """Long from each `enter` bar until the next `leave` bar"""
+    state = pd.DataFrame(np.where(enter, 1.0, np.where(leave, 0.0, np.nan)))
+    return state.ffill().fillna(0.0).to_numpy()
+
+
+def positions(family, params):
+    """(time x symbol) long/flat positions decided at each bar's close"""
+    close = _views['close']
+    if family == 'ema_cross':
+        return (_ema(params['fast']) > _ema(params['slow'])).astype(float)
+    if family == 'rsi':
+        key = ('rsi', params['window'])
+        if key not in _memo:
+            _memo[key] = add_rsi({'Close': _frame('close')}, params['window'])['RSI'].to_numpy()
+        rsi = _memo[key]
+        with np.errstate(invalid='ignore'):
+            return _hold(rsi < params['lower'], rsi > params['upper'])
+    if family == 'breakout':
+        window = params['window']
+        # Support/resistance as in calculate_support_resistance, known at the previous close
+        resistance = _frame('high').rolling(window).max().shift(1).to_numpy()
+        support = _frame('low').rolling(window).min().shift(1).to_numpy()
+        with np.errstate(invalid='ignore'):
+            return _hold(close > resistance, close < support)
+    if family == 'sharpe':
+        returns = _frame('returns').rolling(params['window'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (returns.mean().to_numpy() / returns.std().to_numpy() > 0).astype(float)
+    raise ValueError(f"Unknown rule family {family}")
+
+
+def _fold_stats(daily, fold_rows):
+    """Annualized Sharpe of `daily` over each fold's train rows and (sum, sum of squares, count) over its test rows"""
+    valid = ~np.isnan(daily)
+    values = np.where(valid, daily, 0.0)
+    s = np.concatenate(([0.0], np.cumsum(values)))
+    q = np.concatenate(([0.0], np.cumsum(values ** 2)))
+    n = np.concatenate(([0], np.cumsum(valid)))
+    a, b, c = fold_rows.T
+
+    count = n[b] - n[a]
+    mean = (s[b] - s[a]) / np.maximum(count, 1)
+    var = (q[b] - q[a]) / np.maximum(count, 1) - mean ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        train_sharpe = np.where(var > 0, mean / np.sqrt(var) * np.sqrt(TRADING_DAYS), np.nan)
+    return train_sharpe, s[c] - s[b], q[c] - q[b], n[c] - n[b]
+
+
+def score(task):
+    """Fold statistics for a batch of (family, params) combinations, run inside a worker"""
+    combos, fold_rows = task
+    next_returns = _views['next_returns']
+    results = []
+    for family, params in combos:
+        held = positions(family, params)
+        # Equal-weight portfolio of the symbols' next-bar returns while held
+        pnl = held * next_returns
+        counted = ~np.isnan(pnl)
+        with np.errstate(invalid='ignore'):
+            daily = np.where(counted.any(axis=1), np.nansum(pnl, axis=1) / np.maximum(counted.sum(axis=1), 1), np.nan)
+        results.append((family, params) + _fold_stats(daily, fold_rows))
+    return results
+
+
+def load_prices(symbols):
+    """Aligned (time x symbol) close, high and low frames from the bar archive"""
+    bars = {symbol: archive.load(symbol, "1d") for symbol in symbols}
+    bars = {symbol: data for symbol, data in bars.items() if not data.empty}
+    return {field: pd.DataFrame({symbol: data[field] for symbol, data in bars.items()}).sort_index()
+            for field in ('Close', 'High', 'Low')}
+
+
+def sweep(prices, grids=GRIDS, workers=None, train=2 * TRADING_DAYS, test=TRADING_DAYS // 2, batch=64):
+    """(per-combination DataFrame, per-fold out-of-sample DataFrame) of a walk-forward sweep"""
+    close = prices['Close'].to_numpy(dtype=float)
+    returns = prices['Close'].pct_change(fill_method=None).to_numpy()
+    next_returns = np.vstack([returns[1:], np.full((1, returns.shape[1]), np.nan)])
+    arrays = {'close': close, 'high': prices['High'].to_numpy(dtype=float),
+              'low': prices['Low'].to_numpy(dtype=float), 'returns': returns, 'next_returns': next_returns}
+    fold_rows = folds(len(close), train, test)
+    if len(fold_rows) == 0:
+        raise ValueError(f"Need at least {train + test} bars for one walk-forward fold, have {len(close)}")
+
+    # One shared-memory block per array; workers attach by name
+    blocks, specs = [], {}
+    try:
+        for name, array in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(shm)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+            specs[name] = (shm.name, array.shape, array.dtype.str)
+
+        # Batches stay within one family so workers reuse their indicator memo
+        tasks = []
+        for _, members in itertools.groupby(combinations(grids), key=lambda combo: combo[0]):
+            members = list(members)
+            tasks += [(members[i:i + batch], fold_rows) for i in range(0, len(members), batch)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as executor:
+            results = [row for rows in executor.map(score, tasks) for row in rows]
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    families = np.array([family for family, *_ in results])
+    train_sharpe = np.vstack([r[2] for r in results])
+    test_sum, test_sq, test_n = (np.vstack([r[k] for r in results]) for k in (3, 4, 5))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        test_mean = test_sum / test_n
+        test_sharpe = test_mean / np.sqrt(test_sq / test_n - test_mean ** 2) * np.sqrt(TRADING_DAYS)
+
+    table = pd.DataFrame({
+        'family': families,
+        'params': [params for _, params, *_ in results],
+        'train_sharpe': np.nanmean(train_sharpe, axis=1),
+        'test_sharpe': np.nanmean(test_sharpe, axis=1),
+    })
+
+    # Walk forward: the best in-sample combination of each family and fold, scored on the next window
+    index = prices['Close'].index
+    rows = []
+    for family in dict.fromkeys(families):
+        members = np.flatnonzero(families == family)
+        ranked = np.where(np.isnan(train_sharpe[members]), -np.inf, train_sharpe[members])
+        best = members[np.argmax(ranked, axis=0)]
+        for k, (a, b, c) in enumerate(fold_rows):
+            chosen = best[k]
+            rows.append({
+                'family': family,
+                'train_start': index[a], 'test_start': index[b], 'test_end': index[c - 1],
+                'params': results[chosen][1],
+                'train_sharpe': train_sharpe[chosen, k],
+                'test_sharpe': test_sharpe[chosen, k],
+                'test_return': test_sum[chosen, k],
+            })
+    return table, pd.DataFrame(rows)
+
+
+def summarize(walk_forward):
+    """Pooled out-of-sample result per family"""
+    return walk_forward.groupby('family').agg(
+        folds=('test_sharpe', 'size'),
+        mean_oos_sharpe=('test_sharpe', 'mean'),
+        total_oos_return=('test_return', 'sum'),
+        mean_is_sharpe=('train_sharpe', 'mean'),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward sweep of indicator parameters over a universe")
+    parser.add_argument("--universe", default="watchlist", help="universe id from universes/*.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--train", type=int, default=2 * TRADING_DAYS, help="training bars per fold")
+    parser.add_argument("--test", type=int, default=TRADING_DAYS // 2, help="out-of-sample bars per fold")
+    parser.add_argument("--out", help="write the per-combination table to this CSV file")
+    args = parser.parse_args()
+
+    prices = load_prices(get_symbols(args.universe))
+    table, walk_forward = sweep(prices, workers=args.workers, train=args.train, test=args.test)
+    print(f"Scored {len(table)} combinations over {len(walk_forward['test_start'].unique())} folds")
+    print(summarize(walk_forward).to_string())
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        table.to_csv(args.out, index=False)
@@ -0,0 +1,133 @@
+"""Fill-level paper-trading history and equity curves.
+
+Every buy and sell is stored as one row in SQLite, indexed by (account,
+symbol, ts). The equity curve is rebuilt in one aligned pass: fills are
+bucketed onto a daily index with a sorted-array search, positions and cash
+are cumulative sums over that (day x symbol) grid, and positions are
+marked to market against daily closes read from the bar archive, so a
+year of history costs one archive read per traded symbol rather than one
+price fetch per day.
+"""
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import archive
+from config import data_path
+from events import to_epoch
+
+STARTING_BALANCE = 100000.0
+DEFAULT_ACCOUNT = "default"
+
+_lock = threading.Lock()
+_db = None
+
+
+def _connect():
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(data_path('trades.sqlite'), check_same_thread=False)
+        _db.executescript("""
+            CREATE TABLE IF NOT EXISTS fills (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account TEXT, symbol TEXT, ts INTEGER, quantity REAL, price REAL, fee REAL
+            );
+            CREATE INDEX IF NOT EXISTS fills_by_symbol ON fills (account, symbol, ts);
+            CREATE INDEX IF NOT EXISTS fills_by_time ON fills (account, ts);
+        """)
+        # Logs created before fills carried an id
+        if 'fill_id' not in [column[1] for column in _db.execute("PRAGMA table_info(fills)")]:
+            _db.execute("ALTER TABLE fills ADD COLUMN fill_id TEXT")
+        _db.execute("CREATE UNIQUE INDEX IF NOT EXISTS fills_by_id ON fills (fill_id)")
+        _db.commit()
+    return _db
+
+
+def record_fill(symbol, quantity, price, fee, account=DEFAULT_ACCOUNT, ts=None, fill_id=None):
+    """Store one fill; `quantity` is positive for buys and negative for sells.
+
+    A fill whose `fill_id` is already stored is ignored, so callers may retry.
+    """
+    ts = int(time.time()) if ts is None else int(ts)
+    with _lock:
+        db = _connect()
+        db.execute("INSERT OR IGNORE INTO fills (account, symbol, ts, quantity, price, fee, fill_id) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                   (account, symbol, ts, float(quantity), float(price), float(fee), fill_id))
+        db.commit()
+
+
+def fills(account=DEFAULT_ACCOUNT, symbol=None, start=None, end=None):
+    """Fills of an account as a DataFrame (time, symbol, quantity, price, fee), oldest first"""
+    clauses, params = ["account = ?"], [account]
+    if symbol:
+        clauses.append("symbol = ?")
+        params.append(symbol)
+    if start is not None:
+        clauses.append("ts >= ?")
+        params.append(int(to_epoch([pd.Timestamp(start)])[0]))
+    if end is not None:
+        clauses.append("ts <= ?")
+        params.append(int(to_epoch([pd.Timestamp(end)])[0]))
+    with _lock:
+        rows = _connect().execute(
+            f"SELECT ts, symbol, quantity, price, fee FROM fills WHERE {' AND '.join(clauses)} ORDER BY ts, id",
+            params
+        ).fetchall()
+    frame = pd.DataFrame(rows, columns=['ts', 'symbol', 'quantity', 'price', 'fee'])
+    frame['time'] = pd.to_datetime(frame['ts'], unit='s', utc=True)
+    return frame
+
+
+def _daily_closes(symbols, days):
+    """(day x symbol) closes on `days`, carried forward over non-trading days"""
+    rows = len(days) + 10
+    closes = np.full((len(days), len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        bars = archive.load(symbol, "1d", rows=rows)
+        if bars.empty:
+            continue
+        bar_days = to_epoch(bars.index.normalize() if bars.index.tz is None
+                            else bars.index.tz_localize(None).normalize())
+        position = np.searchsorted(bar_days, days, side='right') - 1
+        known = position >= 0
+        closes[known, j] = bars['Close'].to_numpy(dtype=float)[position[known]]
+    return closes
+
+
+def equity_curve(account=DEFAULT_ACCOUNT, starting_balance=STARTING_BALANCE, end=None):
+    """Daily cash, market value and equity of an account from its first fill to `end` (default: today)"""
+    history = fills(account)
+    if history.empty:
+        return pd.DataFrame(columns=['Cash', 'Market Value', 'Equity'])
+
+    end = pd.Timestamp.now(tz='UTC') if end is None else pd.Timestamp(end)
+    index = pd.date_range(history['time'].iloc[0].normalize().tz_localize(None),
+                          end.tz_localize(None).normalize() if end.tzinfo else end.normalize(), freq='D')
+    days = to_epoch(index)
+    symbols = list(dict.fromkeys(history['symbol']))
+
+    # Bucket each fill onto its day and symbol
+    day = np.searchsorted(days, history['ts'].to_numpy(), side='right') - 1
+    column = pd.Index(symbols).get_indexer(history['symbol'])
+    quantity = history['quantity'].to_numpy(dtype=float)
+    traded = np.zeros((len(days), len(symbols)))
+    np.add.at(traded, (day, column), quantity)
+    cash_flow = np.bincount(day, weights=-(quantity * history['price'].to_numpy() + history['fee'].to_numpy()),
+                            minlength=len(days))
+
+    positions = np.cumsum(traded, axis=0)
+    cash = starting_balance + np.cumsum(cash_flow)
+
+    # Mark to market; before a symbol's first stored close fall back to its fill prices
+    closes = _daily_closes(symbols, days)
+    last_fill_price = np.full((len(days), len(symbols)), np.nan)
+    last_fill_price[day, column] = history['price'].to_numpy(dtype=float)
+    last_fill_price = pd.DataFrame(last_fill_price).ffill().to_numpy()
+    marks = np.where(np.isnan(closes), last_fill_price, closes)
+    market_value = np.nansum(positions * marks, axis=1)
+
+    return pd.DataFrame({'Cash': cash, 'Market Value': market_value, 'Equity': cash + market_value}, index=index)
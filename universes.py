@@ -0,0 +1,136 @@
+"""Symbol universes loaded from universes/*.json and bulk cache warm-up.
+
+Each universe file looks like:
+
+    {
+      "name": "Watchlist",
+      "asset_class": "stock",
+      "intervals": ["1m", "1d"],
+      "news": true,
+      "fundamentals": true,
+      "symbols": ["AAPL", "MSFT"]
+    }
+
+warm_up() fetches bars, news and fundamentals for every configured symbol so
+the pages find them in the bar store, the daily bar archive and the process
+cache. Run it as a script to populate the on-disk stores ahead of a
+deployment:
+
+    python universes.py watchlist dow30
+"""
+import glob
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import anomaly_store
+import archive
+import factor_store
+from analytics import fetch_stock_news, get_fundamental_metrics
+from bars import get_bars
+
+UNIVERSE_DIR = os.environ.get("RSS_UNIVERSE_DIR", "universes")
+
+# Universe shown first in the page selectors
+DEFAULT_UNIVERSE = "watchlist"
+
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def load_universes(universe_dir=UNIVERSE_DIR):
+    """Return {universe id: definition} for every JSON file in universe_dir"""
+    universes = {}
+    for path in sorted(glob.glob(os.path.join(universe_dir, "*.json"))):
+        with open(path) as f:
+            definition = json.load(f)
+        universe_id = os.path.splitext(os.path.basename(path))[0]
+        definition.setdefault("name", universe_id)
+        definition.setdefault("asset_class", "stock")
+        definition.setdefault("intervals", ["1d"])
+        definition["symbols"] = [symbol.upper() for symbol in definition.get("symbols", [])]
+        universes[universe_id] = definition
+    return universes
+
+
+def universes_for(asset_class, universe_dir=UNIVERSE_DIR):
+    """Universes of one asset class, with DEFAULT_UNIVERSE first"""
+    universes = load_universes(universe_dir)
+    ids = sorted((uid for uid, u in universes.items() if u["asset_class"] == asset_class),
+                 key=lambda uid: uid != DEFAULT_UNIVERSE)
+    return {uid: universes[uid] for uid in ids}
+
+
+def get_symbols(universe_id, universe_dir=UNIVERSE_DIR):
+    """Symbols of one universe, or an empty list if it is not configured"""
+    return load_universes(universe_dir).get(universe_id, {}).get("symbols", [])
+
+
+# Function to warm every cache a page reads for one symbol
+def _warm_symbol(symbol, definition):
+    errors = []
+    for interval in definition["intervals"]:
+        try:
+            data = get_bars(symbol, interval, base=interval)
+            # Keep the anomaly history current so cross-symbol screens cover the whole universe
+            if not data.empty:
+                anomaly_store.update(symbol, interval, data['Close'].pct_change().dropna())
+        except Exception as e:
+            errors.append(f"{symbol} {interval} bars: {e}")
+    if "1d" in definition["intervals"]:
+        # The dashboard reads full daily history from the memory-mapped archive
+        try:
+            archive.sync(symbol, "1d")
+        except Exception as e:
+            errors.append(f"{symbol} 1d archive: {e}")
+    if definition.get("news", definition["asset_class"] == "stock"):
+        try:
+            fetch_stock_news(symbol)
+        except Exception as e:
+            errors.append(f"{symbol} news: {e}")
+    if definition.get("fundamentals", definition["asset_class"] == "stock"):
+        try:
+            get_fundamental_metrics(symbol)
+        except Exception as e:
+            errors.append(f"{symbol} fundamentals: {e}")
+    return errors
+
+
+def warm_up(universe_ids=None, workers=8):
+    """Bulk-fetch bars, news and fundamentals for the given (default: all) universes; returns errors"""
+    universes = load_universes()
+    if universe_ids:
+        universes = {uid: universes[uid] for uid in universe_ids if uid in universes}
+
+    # Reference series are shared by every fundamentals lookup
+    factor_store.refresh_all()
+
+    jobs = {}
+    for definition in universes.values():
+        for symbol in definition["symbols"]:
+            jobs.setdefault(symbol, definition)
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for symbol_errors in executor.map(lambda item: _warm_symbol(*item), jobs.items()):
+            errors.extend(symbol_errors)
+    return errors
+
+
+def start_warm_up(universe_ids=None):
+    """Run warm_up() once per process in a background thread"""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, args=(universe_ids,), daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+if __name__ == "__main__":
+    failures = warm_up(sys.argv[1:] or None)
+    for failure in failures:
+        print(failure)
+    print(f"Warm-up finished with {len(failures)} errors")
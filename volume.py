@@ -0,0 +1,168 @@
+"""Intraday volume analytics: session VWAP bands and volume profile.
+
+VWAP and its volume-weighted standard-deviation bands come from
+indicators.session_vwap_values, the same session sums the indicator
+library uses for its VWAP column. The volume profile spreads each bar's
+volume evenly over the price buckets between its low and high with two
+bincounts over quantized prices (a difference array) and a cumulative
+sum. Buckets sit on a fixed grid of multiples of the bucket size, which
+is taken from the session's first bar, so a profile grown bar by bar is
+identical to one rebuilt from scratch. Profiles are kept per (symbol,
+session) for the life of the process and only bars newer than the last
+one folded in are added on refresh; the still-forming bar is added to a
+copy for display and never stored. The value area grows from the point
+of control, one neighbouring bucket at a time.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from events import to_epoch
+
+# Fraction of session volume inside the value area
+VALUE_AREA = 0.7
+
+# Profiles kept per process (a few sessions per symbol)
+MAX_PROFILES = 512
+
+
+def session_vwap(data, num_std=(1, 2)):
+    """DataFrame of session VWAP and ±n standard-deviation bands for intraday bars"""
+    typical = ((data['High'] + data['Low'] + data['Close']) / 3).to_numpy(dtype=float).ravel()
+    volume = data['Volume'].to_numpy(dtype=float).ravel()
+    vwap, std = indicators.session_vwap_values(typical, volume, data.index)
+
+    bands = {'VWAP': vwap}
+    for k in num_std:
+        bands[f'VWAP +{k}σ'] = vwap + k * std
+        bands[f'VWAP -{k}σ'] = vwap - k * std
+    return pd.DataFrame(bands, index=data.index)
+
+
+def bucket_size_for(price):
+    """A round price bucket of roughly 0.1% of `price`"""
+    return 10.0 ** np.floor(np.log10(max(price, 1e-9) * 0.001))
+
+
+class VolumeProfile:
+    """Volume per price bucket, grown as bars arrive"""
+
+    def __init__(self, bucket_size, first=None):
+        self.bucket_size = bucket_size
+        self.first = first  # grid index of bucket 0 (its low is first * bucket_size)
+        self.volume = np.zeros(0)
+        self.last_time = None
+
+    @property
+    def origin(self):
+        """Price of the low edge of bucket 0"""
+        return (self.first or 0) * self.bucket_size
+
+    def _spread(self, low, high, volume):
+        """Per-bucket volume of bars spread evenly from low to high, on this profile's grid"""
+        lo = np.floor(low / self.bucket_size).astype(np.int64)
+        hi = np.floor(high / self.bucket_size).astype(np.int64)
+        if self.first is None:
+            self.first = int(lo.min())
+        shift = max(0, self.first - int(lo.min()))
+        if shift:
+            # Extend the grid below the current first bucket
+            self.first -= shift
+            self.volume = np.r_[np.zeros(shift), self.volume]
+        lo, hi = lo - self.first, hi - self.first
+        per_bucket = volume / (hi - lo + 1)
+        size = max(len(self.volume), int(hi.max()) + 1)
+        # Difference array: +v at the low bucket, -v just past the high bucket
+        diff = (np.bincount(lo, weights=per_bucket, minlength=size + 1)
+                - np.bincount(hi + 1, weights=per_bucket, minlength=size + 1))
+        return np.cumsum(diff)[:size]
+
+    def add(self, low, high, volume):
+        ok = ~(np.isnan(low) | np.isnan(high) | np.isnan(volume))
+        if not ok.any():
+            return self
+        added = self._spread(low[ok], high[ok], volume[ok])
+        if len(added) > len(self.volume):
+            self.volume = np.r_[self.volume, np.zeros(len(added) - len(self.volume))]
+        self.volume[:len(added)] += added
+        return self
+
+    def copy(self):
+        profile = VolumeProfile(self.bucket_size, self.first)
+        profile.volume = self.volume.copy()
+        profile.last_time = self.last_time
+        return profile
+
+    def prices(self):
+        """Mid price of every bucket"""
+        return self.origin + (np.arange(len(self.volume)) + 0.5) * self.bucket_size
+
+    def point_of_control(self):
+        return float(self.prices()[np.argmax(self.volume)]) if self.volume.any() else None
+
+    def value_area(self, fraction=VALUE_AREA):
+        """(low, high) prices of the contiguous range around the point of control holding `fraction` of the volume
+
+        Starting at the point of control, the larger of the two neighbouring buckets is added until the
+        range holds `fraction` of the session's volume.
+        """
+        if not self.volume.any():
+            return None, None
+        volume = self.volume
+        lo = hi = int(np.argmax(volume))
+        inside, target = volume[lo], fraction * volume.sum()
+        while inside < target and (lo > 0 or hi < len(volume) - 1):
+            below = volume[lo - 1] if lo > 0 else -1.0
+            above = volume[hi + 1] if hi < len(volume) - 1 else -1.0
+            if above >= below:
+                hi += 1
+                inside += above
+            else:
+                lo -= 1
+                inside += below
+        return float(self.origin + lo * self.bucket_size), float(self.origin + (hi + 1) * self.bucket_size)
+
+    def to_frame(self):
+        return pd.DataFrame({'Price': self.prices(), 'Volume': self.volume})
+
+
+_profiles = {}
+_lock = threading.Lock()
+
+
+def session_profile(symbol, data, bucket_size=None):
+    """Volume profile of the latest session in `data` (1m bars), folding in only bars not seen before.
+
+    `bucket_size` defaults to bucket_size_for() the open of the session's first bar, which does not
+    change as the session goes on, so the result equals a profile rebuilt from the whole session.
+    """
+    if data.empty:
+        return None
+    session = data.index[-1].normalize()
+    bars = data[data.index >= session]
+    epochs = to_epoch(bars.index)
+    low = bars['Low'].to_numpy(dtype=float).ravel()
+    high = bars['High'].to_numpy(dtype=float).ravel()
+    volume = bars['Volume'].to_numpy(dtype=float).ravel()
+
+    with _lock:
+        key = (symbol, session)
+        profile = _profiles.get(key)
+        if profile is None:
+            opens = bars['Open' if 'Open' in bars else 'Close'].to_numpy(dtype=float).ravel()
+            opens = opens[np.isfinite(opens)]
+            profile = VolumeProfile(bucket_size or bucket_size_for(opens[0] if len(opens) else 1.0))
+            _profiles[key] = profile
+            while len(_profiles) > MAX_PROFILES:
+                _profiles.pop(next(iter(_profiles)))
+
+        # The last bar is still forming; store only completed ones
+        new = np.ones(len(epochs) - 1, dtype=bool) if profile.last_time is None else epochs[:-1] > profile.last_time
+        if new.any():
+            profile.add(low[:-1][new], high[:-1][new], volume[:-1][new])
+            profile.last_time = int(epochs[:-1][new][-1])
+        current = profile.copy()
+
+    return current.add(low[-1:], high[-1:], volume[-1:])
@@ -0,0 +1,252 @@
+"""Local warehouse of fundamental statements with cross-ticker screening.
+
+refresh() downloads every annual and quarterly statement (balance sheet,
+income statement, cash flow) plus the numeric quote fields of `info` for a
+list of symbols and stores them in one long, columnar Parquet table:
+
+    symbol | statement | item | period | value
+
+with symbol, statement and item as categoricals. Only refresh() touches
+the network. At query time the table is read once per process (and again
+only when the file changes), every (symbol, statement, item) series is
+ranked newest-first, and the metrics of all symbols (P/E, ROE, WACC, ...)
+are computed as whole columns from the latest annual values and cached
+per table version and rate inputs (the MAX_CACHED_METRICS most recently
+used). screen() is then a handful of numpy masks over that frame.
+
+    python warehouse.py --universe dow30 --workers 8
+"""
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from analytics import DEBT_ITEMS, cost_of_capital, total_debt
+from config import data_path
+
+COLUMNS = ['symbol', 'statement', 'item', 'period', 'value']
+
+# yfinance Ticker attributes stored, by statement name
+STATEMENTS = {
+    'balance_sheet': 'balance_sheet',
+    'financials': 'financials',
+    'cashflow': 'cashflow',
+    'quarterly_balance_sheet': 'quarterly_balance_sheet',
+    'quarterly_financials': 'quarterly_financials',
+    'quarterly_cashflow': 'quarterly_cashflow',
+}
+
+# Numeric `info` fields stored under the "info" statement, dated by download day
+INFO_FIELDS = ['marketCap', 'beta', 'trailingPE', 'forwardPE', 'priceToBook', 'currentPrice',
+               'sharesOutstanding', 'dividendYield', 'returnOnEquity', 'returnOnAssets']
+
+METRICS = ['Market Cap', 'P/E Ratio', 'ROE', 'ROA', 'Gross Margin', 'Profit Margin', 'Debt to Equity',
+           'Current Ratio', 'Revenue Growth', 'Beta', 'Tax Rate', 'Cost of Debt', 'Cost of Equity', 'WACC']
+
+OPS = ['<', '<=', '>', '>=']
+
+# Metric frames kept per (risk-free rate, market return), least recently used evicted first
+MAX_CACHED_METRICS = 32
+
+_lock = threading.Lock()
+_table = None
+_loaded_mtime = None
+_metrics = OrderedDict()
+
+
+def _warehouse_file():
+    return data_path('warehouse', 'statements.parquet')
+
+
+def _long(frame, symbol, statement):
+    """Stack a yfinance (item x period) statement into long rows"""
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    stacked = frame.apply(pd.to_numeric, errors='coerce').stack().rename('value').reset_index()
+    stacked.columns = ['item', 'period', 'value']
+    stacked = stacked.dropna(subset=['value'])
+    stacked['period'] = pd.to_datetime(stacked['period'])
+    return stacked.assign(symbol=symbol, statement=statement)[COLUMNS]
+
+
+def fetch_statements(symbol):
+    """Long rows of every stored statement and info field of one symbol"""
+    ticker = yf.Ticker(symbol)
+    frames = [_long(getattr(ticker, attribute), symbol, statement) for statement, attribute in STATEMENTS.items()]
+    info = ticker.info or {}
+    values = {field: info.get(field) for field in INFO_FIELDS if isinstance(info.get(field), (int, float))}
+    frames.append(pd.DataFrame({
+        'symbol': symbol, 'statement': 'info', 'item': list(values),
+        'period': pd.Timestamp.now().normalize(), 'value': list(values.values()),
+    }, columns=COLUMNS))
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+
+
+def _categorize(table):
+    table = table.astype({'value': float})
+    table['period'] = pd.to_datetime(table['period'])
+    for column in ('symbol', 'statement', 'item'):
+        table[column] = table[column].astype(str).astype('category')
+    return table
+
+
+def _read():
+    try:
+        return pd.read_parquet(_warehouse_file())
+    except (FileNotFoundError, OSError):
+        return _categorize(pd.DataFrame(columns=COLUMNS))
+
+
+def refresh(symbols, workers=8):
+    """Download the statements of `symbols` and replace their rows in the warehouse; returns errors"""
+    errors = []
+
+    def fetch(symbol):
+        try:
+            return fetch_statements(symbol)
+        except Exception as e:
+            errors.append(f"{symbol}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetched = [rows for rows in executor.map(fetch, symbols) if rows is not None and not rows.empty]
+    if not fetched:
+        return errors
+
+    with _lock:
+        stored = _read()
+        updated = set(pd.concat(fetched)['symbol'])
+        kept = stored[~stored['symbol'].isin(updated)]
+        table = _categorize(pd.concat([kept] + fetched, ignore_index=True))
+        # Write to a temporary file first so readers never see a partial table
+        path = _warehouse_file()
+        table.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    return errors
+
+
+def load():
+    """The warehouse table with a `rank` column (0 = newest period of each series), re-read when the file changes"""
+    global _table, _loaded_mtime
+    path = _warehouse_file()
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    with _lock:
+        if _table is not None and mtime == _loaded_mtime:
+            return _table
+        table = _read()
+        table = table.sort_values(['symbol', 'statement', 'item', 'period'], ascending=[True, True, True, False],
+                                  ignore_index=True)
+        # Position within each (symbol, statement, item) series, newest first
+        keys = np.column_stack([table[c].cat.codes.to_numpy() for c in ('symbol', 'statement', 'item')])
+        starts = np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)] if len(table) else np.zeros(0, dtype=bool)
+        first = np.maximum.accumulate(np.where(starts, np.arange(len(table)), 0))
+        table['rank'] = np.arange(len(table)) - first
+        _table, _loaded_mtime = table, mtime
+        _metrics.clear()
+        return table
+
+
+def latest(table, statement, items, rank=0):
+    """(symbol x item) matrix of the rank-th newest value of `items` in `statement`"""
+    symbols = table['symbol'].cat.categories
+    rows = table[(table['statement'] == statement) & (table['rank'] == rank) & table['item'].isin(items)]
+    position = pd.Index(items).get_indexer(rows['item'].astype(str))
+    matrix = np.full((len(symbols), len(items)), np.nan)
+    matrix[rows['symbol'].cat.codes.to_numpy(), position] = rows['value'].to_numpy()
+    return pd.DataFrame(matrix, index=symbols, columns=items)
+
+
+def compute_metrics(table, risk_free_rate, market_return):
+    """DataFrame of METRICS for every symbol in the warehouse, from the latest annual statements"""
+    income = latest(table, 'financials', ['Net Income', 'Total Revenue', 'Gross Profit', 'Interest Expense',
+                                          'Tax Provision', 'Pretax Income'])
+    previous = latest(table, 'financials', ['Total Revenue'], rank=1)
+    balance = latest(table, 'balance_sheet', ['Stockholders Equity', 'Total Assets', 'Current Assets',
+                                              'Current Liabilities'] + DEBT_ITEMS)
+    info = latest(table, 'info', INFO_FIELDS)
+
+    market_cap = info['marketCap']
+    net_income = income['Net Income']
+    equity = balance['Stockholders Equity']
+    revenue = income['Total Revenue']
+    debt = pd.Series(total_debt(*(balance[item] for item in DEBT_ITEMS)), index=balance.index)
+
+    # The dashboard's cost-of-capital calculation, applied to all symbols at once
+    tax_rate, cost_of_debt, cost_of_equity, wacc = cost_of_capital(
+        income['Interest Expense'], debt, income['Tax Provision'], income['Pretax Income'], market_cap.to_numpy(),
+        info['beta'].to_numpy(), risk_free_rate, market_return)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        metrics = pd.DataFrame({
+            'Market Cap': market_cap,
+            'P/E Ratio': info['trailingPE'].fillna(market_cap / net_income.where(net_income > 0)),
+            'ROE': net_income / equity.where(equity > 0),
+            'ROA': net_income / balance['Total Assets'],
+            'Gross Margin': income['Gross Profit'] / revenue,
+            'Profit Margin': net_income / revenue,
+            'Debt to Equity': debt / equity.where(equity > 0),
+            'Current Ratio': balance['Current Assets'] / balance['Current Liabilities'],
+            'Revenue Growth': revenue / previous['Total Revenue'] - 1,
+            'Beta': info['beta'],
+            'Tax Rate': tax_rate,
+            'Cost of Debt': cost_of_debt,
+            'Cost of Equity': cost_of_equity,
+            'WACC': wacc,
+        })
+    return metrics.replace([np.inf, -np.inf], np.nan)
+
+
+def get_metrics(risk_free_rate, market_return):
+    """Metrics of every stored symbol, recomputed only when the warehouse or the rates change"""
+    table = load()
+    key = (risk_free_rate, market_return)
+    with _lock:
+        if key in _metrics and _metrics[key][0] is table:
+            _metrics.move_to_end(key)
+            return _metrics[key][1]
+    metrics = compute_metrics(table, risk_free_rate, market_return)
+    with _lock:
+        _metrics[key] = (table, metrics)
+        _metrics.move_to_end(key)
+        while len(_metrics) > MAX_CACHED_METRICS:
+            _metrics.popitem(last=False)
+    return metrics
+
+
+def screen(metrics, filters=(), sort_by=None, ascending=False, symbols=None, limit=None):
+    """Rows of `metrics` passing every (metric, op, value) filter, ranked by `sort_by`"""
+    keep = np.ones(len(metrics), dtype=bool)
+    if symbols is not None:
+        keep &= metrics.index.isin(list(symbols))
+    with np.errstate(invalid='ignore'):
+        for metric, op, value in filters:
+            column = metrics[metric].to_numpy()
+            keep &= [column < value, column <= value, column > value, column >= value][OPS.index(op)]
+    result = metrics[keep]
+    if sort_by is not None:
+        result = result.sort_values(sort_by, ascending=ascending, na_position='last')
+    return result.head(limit) if limit else result
+
+
+if __name__ == "__main__":
+    from universes import get_symbols
+
+    parser = argparse.ArgumentParser(description="Download fundamental statements into the local warehouse")
+    parser.add_argument("--universe", default="watchlist", help="universe id from universes/*.json")
+    parser.add_argument("--workers", type=int, default=8, help="parallel downloads")
+    args = parser.parse_args()
+
+    symbols = get_symbols(args.universe)
+    started = time.time()
+    errors = refresh(symbols, workers=args.workers)
+    print(f"Stored statements for {len(symbols) - len(errors)} of {len(symbols)} symbols "
+          f"in {time.time() - started:.1f}s")
+    for error in errors:
+        print(error)